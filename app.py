@@ -1,4 +1,4 @@
-import sys, os
+import sys, os, time, gc
 
 # Handle PyInstaller vs normal execution
 BASE_PATH = (
@@ -19,12 +19,56 @@ def main() -> None:
     """
 
     game_interface = GameInterface()
+    timings = game_interface.timings
+    allocations = game_interface.allocations
+    profiler = game_interface.profiler
+    governor = game_interface.governor
+    # the objects created so far (assets, tables, surfaces) live as long as the game: keep them out of the garbage
+    # collections, so that the collections triggered while playing only scan the few objects created since
+    gc.freeze()
+    # fixed-timestep loop: the game logic advances by constant steps of simulated time, as many as the real time
+    # elapsed since the previous frame allows, while frames are rendered at whatever rate the machine sustains
+    previous_time_s = time.perf_counter()
+    accumulator_ms = 0.0
     while game_interface.state.game_running:
+        profiler.begin_iteration()
+        paused = game_interface.state.is_game_paused()
+        if paused:
+            # game time is frozen while paused: sleep until an input arrives and run a single update to handle it,
+            # instead of spinning at the frame rate
+            game_interface.wait_for_event(par.PAUSED_EVENT_WAIT_TIMEOUT_ms)
+            accumulator_ms = par.LOGIC_TIME_STEP_ms
+            previous_time_s = time.perf_counter()
+        else:
+            current_time_s = time.perf_counter()
+            accumulator_ms += min((current_time_s - previous_time_s) * 1000, par.MAX_FRAME_TIME_ms) * \
+                game_interface.playback_speed
+            previous_time_s = current_time_s
+        allocations.start("frame")
+        timings.start("frame")
+        timings.start("events")
         game_interface.process_events_and_inputs()
-        game_interface.update()
-        game_interface.draw_frame()
-        # waits until the desired fps is reached
-        game_interface.state.get_clock().tick(par.TARGET_FPS)          
+        timings.stop("events")
+        timings.start("update")
+        while accumulator_ms >= par.LOGIC_TIME_STEP_ms and game_interface.state.game_running:
+            game_interface.update(par.LOGIC_TIME_STEP_ms)
+            accumulator_ms -= par.LOGIC_TIME_STEP_ms
+        timings.stop("update")
+        # frames without visible changes (e.g. the tile resting between two gravity ticks) are not rendered
+        if governor.should_draw():
+            timings.start("draw_frame")
+            game_interface.draw_frame()
+            governor.frame_drawn()
+            timings.stop("draw_frame")
+        timings.stop("frame") # excludes the time spent waiting for the next frame
+        allocations.stop("frame")
+        if not paused:
+            # waits until the next frame is due
+            governor.wait()
+        profiler.end_iteration()
+    game_interface.dump_timings()
+    game_interface.stop_recording()
+    profiler.stop() # writes a capture interrupted by the end of the game
     pyg.quit() 
     
 if __name__ == "__main__":
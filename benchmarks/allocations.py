@@ -0,0 +1,116 @@
+"""Checks that steady-state frames allocate (nearly) nothing.
+
+Usage: python benchmarks/allocations.py [--frames N] [--peak-budget BYTES] [--seed SEED]
+
+Runs a headless game without input and tracks the memory allocated by every frame (events, logic updates and
+draw_frame) with instrumentation.FrameAllocations. Frames in which a tile locks or the statistics change are excluded,
+as they legitimately re-render the board layer and the HUD text. The check fails (exit status 1) if the p95 peak
+allocation of the remaining frames exceeds the budget, or if their median retained allocation is not zero.
+
+"""
+
+import argparse
+import os
+import sys
+
+## Project root.
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_PATH, "src"))
+# the game runs without a window or an audio device
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import parameters as par
+from instrumentation import FrameAllocations
+
+## Default number of tracked frames.
+DEFAULT_NR_OF_FRAMES = 600
+## Default budget of the p95 peak allocation of a steady-state frame in bytes.
+DEFAULT_PEAK_BUDGET_B = 1024
+## Number of frames run before the tracking starts (lazily rendered sprites, caches, etc.).
+NR_OF_WARMUP_FRAMES = 60
+## Logic updates per frame (a 60 FPS frame at the logic tick rate).
+UPDATES_PER_FRAME = round(par.LOGIC_TICK_RATE_Hz / par.TARGET_FPS)
+
+
+def measure_allocations(nr_of_frames: int = DEFAULT_NR_OF_FRAMES, seed: int = 0) -> dict:
+    """Runs a headless game without input and tracks the allocations of its steady-state frames.
+
+    @param nr_of_frames Number of tracked frames (fewer if the game ends before).
+    @param seed Seed of the tile queue.
+    @returns The statistics of FrameAllocations.get_stats() ("frame_peak" and "frame_retained").
+
+    """
+
+    from interface import GameInterface
+    game_interface = GameInterface(seed)
+    changed = [False]
+
+    def changed_callback(event: str, data: any = None) -> None:
+        changed[0] = True
+
+    game_interface.state.on("board_updated", changed_callback)
+    game_interface.state.on("stats_updated", changed_callback)
+
+    def run_frame() -> None:
+        game_interface.process_events_and_inputs()
+        for _ in range(UPDATES_PER_FRAME):
+            game_interface.update(par.LOGIC_TIME_STEP_ms)
+        game_interface.draw_frame()
+
+    for _ in range(NR_OF_WARMUP_FRAMES):
+        run_frame()
+    allocations = FrameAllocations(True, nr_of_frames)
+    nr_of_tracked_frames = 0
+    while nr_of_tracked_frames < nr_of_frames and game_interface.state.game_running:
+        changed[0] = False
+        allocations.start("frame")
+        run_frame()
+        if changed[0]:
+            continue # not recorded, the next start() discards it
+        allocations.stop("frame")
+        nr_of_tracked_frames += 1
+    allocations.set_enabled(False)
+    return allocations.get_stats()
+
+
+def check_allocations(stats: dict, peak_budget: int = DEFAULT_PEAK_BUDGET_B) -> list:
+    """
+    @param stats Statistics returned by measure_allocations().
+    @param peak_budget Maximum p95 peak allocation of a frame in bytes.
+    @returns The descriptions of the failed checks (empty if the frames are within budget).
+
+    """
+
+    failures = []
+    if stats["frame_peak"]["p95"] > peak_budget:
+        failures.append(f"p95 peak allocation {stats['frame_peak']['p95']:.0f} B exceeds {peak_budget} B")
+    if stats["frame_retained"]["p50"] != 0:
+        failures.append(f"median retained allocation is {stats['frame_retained']['p50']:.0f} B")
+    return failures
+
+
+def main() -> None:
+    """Runs the frames, prints the allocation statistics and checks them against the budget.
+
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=DEFAULT_NR_OF_FRAMES, help="number of tracked frames")
+    parser.add_argument("--peak-budget", type=int, default=DEFAULT_PEAK_BUDGET_B,
+                        help="maximum p95 peak allocation of a frame in bytes (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the tile queue")
+    args = parser.parse_args()
+
+    stats = measure_allocations(args.frames, args.seed)
+    for phase, phase_stats in stats.items():
+        print(f"{phase:<16} " + "  ".join(f"{key} {phase_stats[key]:8.0f} B" for key in ("p50", "p95", "p99", "max")))
+    failures = check_allocations(stats, args.peak_budget)
+    for failure in failures:
+        print(failure)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Seeded board fixtures for the benchmarks.
+
+Boards are built through the public GameState API, by locking tiles where they land after a hard drop, so that they
+look like boards reached while playing (uneven skyline, a few holes) rather than synthetic patterns.
+
+"""
+
+import random
+import parameters as par
+from geometry import TILE_CELLS
+from state import GameState
+
+
+## Fixture name -> average column height (in rows) the board is filled to.
+BOARD_FILL_HEIGHTS = {"empty": 0,
+                      "half_full": par.GRID_NR_OF_ROWS // 2,
+                      "near_top_out": par.GRID_NR_OF_ROWS - 4}
+## Row the candidate placements are dropped from (above the board, where every configuration fits).
+_DROP_START_ROW = -par.TILE_CONFIG_IDX_MAX
+
+
+class PlacedTile:
+    """Minimal stand-in for a Tile at a fixed grid position, accepted by the GameState methods that take a tile."""
+
+
+    def __init__(self, tile_type: str, cfg_idx: int, row: int, col: int) -> None:
+        """Initializes the tile.
+
+        @param tile_type Tile type.
+        @param cfg_idx Configuration (rotation) index.
+        @param row Board row of the configuration matrix top-left corner.
+        @param col Board column of the configuration matrix top-left corner.
+        @returns None.
+
+        """
+
+        ## Tile type.
+        self._type = tile_type
+        ## Configuration (rotation) index.
+        self._cfg_idx = cfg_idx
+        ## Board row of the configuration matrix top-left corner.
+        self._row = row
+        ## Board column of the configuration matrix top-left corner.
+        self._col = col
+
+
+    def get_current_type(self) -> str:
+        """
+
+        @returns The tile type.
+
+        """
+
+        return self._type
+
+
+    def get_cfg_idx(self) -> int:
+        """
+
+        @returns The configuration index.
+
+        """
+
+        return self._cfg_idx
+
+
+    def get_grid_coords(self) -> tuple:
+        """
+
+        @returns The (row, col) board coordinates of the configuration matrix top-left corner.
+
+        """
+
+        return (self._row, self._col)
+
+
+def _completes_row(state: GameState, tile_type: str, cfg_idx: int, row: int, col: int) -> bool:
+    """
+
+    @param state Game state.
+    @param tile_type Tile type.
+    @param cfg_idx Configuration index.
+    @param row Board row of the configuration matrix top-left corner.
+    @param col Board column of the configuration matrix top-left corner.
+    @returns Whether locking the tile there would complete a row.
+
+    """
+
+    cells = [(row + cell_row, col + cell_col) for cell_row, cell_col in TILE_CELLS[tile_type][cfg_idx]]
+    for board_row in {cell_row for cell_row, _ in cells}:
+        if all(state.get_BOM_element(board_row, board_col) is not None or (board_row, board_col) in cells
+               for board_col in range(0, par.GRID_NR_OF_COLS)):
+            return True
+    return False
+
+
+def fill_board(state: GameState, fill_height: int, seed: int, clear_lines: bool = True) -> GameState:
+    """Locks seeded random tiles on a board until its average column height reaches fill_height.
+
+    Each tile is dropped at one of the three lowest landing placements (over all rotations and columns), picked at
+    random, which keeps the skyline uneven and leaves some holes.
+
+    @param state Game state to fill.
+    @param fill_height Target average column height in rows.
+    @param seed Random seed.
+    @param clear_lines Whether completed rows are deleted after each lock. If not, placements that would complete a
+    row are skipped, so the rows of the board completed before the call stay the only ones.
+    @returns The filled game state.
+
+    """
+
+    rng = random.Random(seed)
+    tile_types = sorted(par.TILE_SHAPES)
+    while sum(state.get_column_heights()) < fill_height * par.GRID_NR_OF_COLS:
+        tile_type = rng.choice(tile_types)
+        placements = []
+        for cfg_idx in range(0, par.TILE_CONFIG_IDX_MAX):
+            for col in range(-par.TILE_CONFIG_IDX_MAX + 1, par.GRID_NR_OF_COLS):
+                if not state.collides(tile_type, cfg_idx, _DROP_START_ROW, col):
+                    row = _DROP_START_ROW + state.get_drop_distance(tile_type, cfg_idx, _DROP_START_ROW, col)
+                    if not clear_lines and _completes_row(state, tile_type, cfg_idx, row, col):
+                        continue
+                    placements.append((row, rng.random(), cfg_idx, col))
+        placements.sort(reverse=True)
+        row, _, cfg_idx, col = rng.choice(placements[:3])
+        state.update_occupancy_matrix(PlacedTile(tile_type, cfg_idx, row, col))
+        if clear_lines:
+            state.delete_completed_rows()
+    return state
+
+
+def make_board(name: str, seed: int = 0) -> GameState:
+    """
+
+    @param name Fixture name (see BOARD_FILL_HEIGHTS).
+    @param seed Random seed.
+    @returns A new game state with the fixture board.
+
+    """
+
+    return fill_board(GameState(), BOARD_FILL_HEIGHTS[name], seed)
+
+
+def make_completed_rows_board(nr_of_rows: int, seed: int = 0) -> GameState:
+    """Builds a board whose bottom rows are completed (not deleted yet) under a half-full stack.
+
+    @param nr_of_rows Number of completed rows (even, they are filled with O tiles).
+    @param seed Random seed.
+    @returns A new game state with the board.
+
+    """
+
+    state = GameState()
+    for row in range(par.GRID_NR_OF_ROWS - nr_of_rows, par.GRID_NR_OF_ROWS, 2):
+        for col in range(0, par.GRID_NR_OF_COLS, 2):
+            # the O tile occupies columns 1-2 and rows 1-2 of its configuration matrix
+            state.update_occupancy_matrix(PlacedTile("O", 0, row - 1, col - 1))
+    return fill_board(state, BOARD_FILL_HEIGHTS["half_full"], seed, clear_lines=False)
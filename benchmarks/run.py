@@ -0,0 +1,303 @@
+"""Microbenchmarks of the engine and renderer hot paths.
+
+Usage: python benchmarks/run.py [--output PATH] [--baseline PATH] [--threshold RATIO] [--save-baseline] [--filter TEXT]
+
+Every benchmark runs on seeded board fixtures (see fixtures.py) and reports the median and minimum time per call over
+several rounds. Results are written as JSON and, if a baseline exists, compared to it: a benchmark whose median is
+slower than the baseline by more than the threshold is reported as a regression and the script exits with status 1.
+Baselines depend on the machine, so they are meant to be saved locally (--save-baseline) before an optimization and
+compared against after it.
+
+"""
+
+import argparse
+import copy
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+## Project root.
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_PATH, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# the renderer benchmarks run without a window or an audio device
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import parameters as par
+from tile import Tile
+from generator import RANDOMIZERS, PieceQueue
+from fixtures import BOARD_FILL_HEIGHTS, fill_board, make_board, make_completed_rows_board
+
+## Default path of the results file.
+DEFAULT_OUTPUT_PATH = os.path.join(ROOT_PATH, "benchmarks", "results.json")
+## Default path of the baseline file.
+DEFAULT_BASELINE_PATH = os.path.join(ROOT_PATH, "benchmarks", "baseline.json")
+## Default regression threshold (relative slowdown of the median).
+DEFAULT_THRESHOLD = 0.10
+## Number of timed rounds per benchmark.
+NR_OF_ROUNDS = 7
+## Minimum duration of a timed round in seconds (the number of calls per round is calibrated to reach it).
+MIN_ROUND_TIME_s = 0.02
+## Seed of the board fixtures and of the tile queues.
+SEED = 0
+
+## Registered benchmarks: (name, factory) pairs, the factory returning a (call, setup) pair where setup (or None) is
+## run before every call, outside of the timed section.
+BENCHMARKS = []
+
+
+def benchmark(name: str, boards: tuple = tuple(BOARD_FILL_HEIGHTS)) -> callable:
+    """Registers a benchmark factory once per board fixture.
+
+    @param name Benchmark name.
+    @param boards Names of the fixtures to run the benchmark on, passed to the factory (board fixtures by default).
+    @returns The decorator.
+
+    """
+
+    def register(factory: callable) -> callable:
+        for board in boards:
+            BENCHMARKS.append((f"{name}[{board}]", lambda board=board: factory(board)))
+        return factory
+    return register
+
+
+def _make_tile(state) -> Tile:
+    """
+
+    @param state Game state.
+    @returns A new tile with a seeded queue, spawned on the board.
+
+    """
+
+    return Tile(state, PieceQueue(SEED))
+
+
+@benchmark("GameState.contact_detection")
+def _contact_detection(board: str) -> tuple:
+    state = make_board(board, SEED)
+    tile = _make_tile(state)
+    return (lambda: state.contact_detection(tile), None)
+
+
+@benchmark("GameState.delete_completed_rows")
+def _delete_completed_rows(board: str) -> tuple:
+    state = make_board(board, SEED)
+    return (state.delete_completed_rows, None) # steady state: no tile locked since the last call
+
+
+@benchmark("GameState.delete_completed_rows_4_lines", boards=("half_full",))
+def _delete_completed_rows_4_lines(board: str) -> tuple:
+    template = make_completed_rows_board(4, SEED)
+    states = []
+
+    def setup() -> None:
+        states.append(copy.deepcopy(template))
+
+    return (lambda: states.pop().delete_completed_rows(), setup)
+
+
+@benchmark("Tile.compute_smallest_drop_distance")
+def _compute_smallest_drop_distance(board: str) -> tuple:
+    state = make_board(board, SEED)
+    tile = _make_tile(state)
+    return (lambda: tile.compute_smallest_drop_distance(state), None)
+
+
+@benchmark("GameState.resolve_rotation")
+def _resolve_rotation(board: str) -> tuple:
+    # replaces the former Tile._rotation_allowed_check
+    state = make_board(board, SEED)
+    tile = _make_tile(state)
+    row, col = tile.get_grid_coords()
+    return (lambda: state.resolve_rotation(tile.get_current_type(), tile.get_cfg_idx(), row, col), None)
+
+
+@benchmark("Tile.update_position")
+def _update_position(board: str) -> tuple:
+    state = make_board(board, SEED)
+    tile = _make_tile(state)
+    state.keys_pressed = frozenset()
+    return (lambda: tile.update_position(state, 0), None)
+
+
+@benchmark("Tile.update_position_rotate")
+def _update_position_rotate(board: str) -> tuple:
+    state = make_board(board, SEED)
+    tile = _make_tile(state)
+    state.keys_pressed = frozenset({par.ROTATE})
+    return (lambda: tile.update_position(state, 0), None)
+
+
+def _make_engine(board: str):
+    """
+
+    @param board Name of the board fixture.
+    @returns A new engine with a seeded tile queue, on the fixture board.
+
+    """
+
+    from engine import GameEngine
+    engine = GameEngine(seed=SEED)
+    fill_board(engine.state, BOARD_FILL_HEIGHTS[board], SEED)
+    return engine
+
+
+@benchmark("GameEngine.snapshot")
+def _snapshot(board: str) -> tuple:
+    engine = _make_engine(board)
+    return (engine.snapshot, None)
+
+
+@benchmark("GameEngine.restore")
+def _restore(board: str) -> tuple:
+    engine = _make_engine(board)
+    snapshot = engine.snapshot()
+    return (lambda: engine.restore(snapshot), None)
+
+
+@benchmark("PieceQueue.pop", boards=tuple(RANDOMIZERS))
+def _piece_queue_pop(randomizer: str) -> tuple:
+    pieces = PieceQueue(SEED, randomizer)
+    return (pieces.pop, None)
+
+
+@benchmark("GameInterface.draw_frame")
+def _draw_frame(board: str) -> tuple:
+    from interface import GameInterface
+    game_interface = GameInterface(SEED)
+    fill_board(game_interface.state, BOARD_FILL_HEIGHTS[board], SEED)
+    game_interface.draw_frame() # first frame: layers rendered, whole window pushed
+    return (game_interface.draw_frame, None)
+
+
+@benchmark("GameInterface.draw_frame_moving_tile")
+def _draw_frame_moving_tile(board: str) -> tuple:
+    from interface import GameInterface
+    game_interface = GameInterface(SEED)
+    fill_board(game_interface.state, BOARD_FILL_HEIGHTS[board], SEED)
+    game_interface.draw_frame()
+    tile = game_interface.engine.tile
+    offsets = [1]
+
+    def setup() -> None:
+        # move the tile back and forth so that its area is redrawn every frame
+        tile.col += offsets[0]
+        offsets[0] = -offsets[0]
+
+    return (game_interface.draw_frame, setup)
+
+
+def _time_round(call: callable, setup: callable, number: int) -> float:
+    """
+
+    @param call Benchmarked call.
+    @param setup Call run before each benchmarked call outside of the timed section, or None.
+    @param number Number of calls.
+    @returns The average time per call in seconds.
+
+    """
+
+    if setup is None:
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        return (time.perf_counter() - start) / number
+    total = 0.0
+    for _ in range(number):
+        setup()
+        start = time.perf_counter()
+        call()
+        total += time.perf_counter() - start
+    return total / number
+
+
+def run_benchmark(factory: callable) -> dict:
+    """Calibrates and runs a benchmark.
+
+    @param factory Benchmark factory.
+    @returns The median and minimum time per call in microseconds and the number of calls per round.
+
+    """
+
+    call, setup = factory()
+    number = 1
+    while True:
+        round_time = _time_round(call, setup, number) * number
+        if round_time >= MIN_ROUND_TIME_s or number >= 1_000_000:
+            break
+        number *= 10 if round_time < MIN_ROUND_TIME_s / 10 else 2
+    per_call_times = [_time_round(call, setup, number) for _ in range(NR_OF_ROUNDS)]
+    return {"median_us": statistics.median(per_call_times) * 1e6,
+            "min_us": min(per_call_times) * 1e6,
+            "calls_per_round": number}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Prints the results next to the baseline.
+
+    @param results Benchmark results, indexed by name.
+    @param baseline Baseline results, indexed by name (may be empty).
+    @param threshold Relative slowdown of the median above which a benchmark is a regression.
+    @returns The names of the regressed benchmarks.
+
+    """
+
+    regressions = []
+    width = max(len(name) for name in results)
+    for name, result in results.items():
+        line = f"{name:<{width}}  {result['median_us']:10.2f} us"
+        if name in baseline:
+            change = result["median_us"] / baseline[name]["median_us"] - 1
+            line += f"  ({change:+.1%} vs baseline)"
+            if change > threshold:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+    return regressions
+
+
+def main() -> None:
+    """Runs the benchmarks, writes the results and compares them to the baseline.
+
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_PATH, help="results JSON file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown of the median reported as a regression (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true", help="also save the results as the new baseline")
+    parser.add_argument("--filter", default="", help="only run the benchmarks whose name contains this text")
+    args = parser.parse_args()
+
+    results = {name: run_benchmark(factory) for name, factory in BENCHMARKS if args.filter in name}
+    if not results:
+        print(f"No benchmark name contains {args.filter!r}")
+        sys.exit(1)
+    report = {"meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "python": platform.python_version(),
+                       "platform": platform.platform()},
+              "results": results}
+    with open(args.output, "w") as output_file:
+        json.dump(report, output_file, indent=4)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(report, baseline_file, indent=4)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import io
+import json
+import mmap
+import os
+import struct
+
+
+# Asset pack file format: all assets in a single file, memory-mapped at startup.
+#
+#   magic (8 bytes) | format version (uint32) | index size in bytes (uint32) | index | asset data
+#
+# The index is UTF-8 encoded JSON mapping the asset paths (relative to the project root, "/" separated) to the
+# [offset, size] of their data, offsets being counted from the start of the asset data. Integers are little-endian.
+
+## Magic bytes at the start of an asset pack.
+PACK_MAGIC = b"TETRSPAK"
+## Version of the asset pack format.
+PACK_VERSION = 1
+## Header layout: magic, format version, index size.
+_HEADER = struct.Struct("<8sII")
+
+
+class PackedFileView(io.RawIOBase):
+    """Read-only, seekable file-like view of an asset inside a memory-mapped pack.
+
+    Reads copy straight from the mapped pages into the caller's buffer, there is no intermediate copy of the asset.
+
+    """
+
+
+    def __init__(self, view: memoryview) -> None:
+        """Initializes the view.
+
+        @param view Memoryview of the asset bytes.
+        @returns None.
+
+        """
+
+        super().__init__()
+        ## Asset bytes.
+        self._view = view
+        ## Current read position.
+        self._pos = 0
+
+
+    def readable(self) -> bool:
+        """
+
+        @returns True, the view can be read.
+
+        """
+
+        return True
+
+
+    def seekable(self) -> bool:
+        """
+
+        @returns True, the view supports random access.
+
+        """
+
+        return True
+
+
+    def readinto(self, buffer) -> int:
+        """Reads up to len(buffer) bytes into buffer.
+
+        @param buffer Writable buffer.
+        @returns The number of bytes read (0 at the end of the asset).
+
+        """
+
+        size = min(len(buffer), len(self._view) - self._pos)
+        if size <= 0:
+            return 0
+        memoryview(buffer).cast("B")[:size] = self._view[self._pos:self._pos + size]
+        self._pos += size
+        return size
+
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        """Moves the read position.
+
+        @param offset Offset in bytes.
+        @param whence io.SEEK_SET, io.SEEK_CUR or io.SEEK_END.
+        @returns The new read position.
+
+        """
+
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = len(self._view) + offset
+        else:
+            raise ValueError(f"invalid whence: {whence}")
+        if pos < 0:
+            raise ValueError(f"negative seek position: {pos}")
+        self._pos = pos
+        return self._pos
+
+
+    def tell(self) -> int:
+        """
+
+        @returns The current read position.
+
+        """
+
+        return self._pos
+
+
+    def getbuffer(self) -> memoryview:
+        """
+
+        @returns A memoryview of the whole asset (no copy).
+
+        """
+
+        return self._view
+
+
+class AssetPack:
+    """Memory-mapped asset pack (see the format description above)."""
+
+
+    def __init__(self, path: str) -> None:
+        """Maps the pack file and reads its index.
+
+        @param path Path of the pack file.
+        @returns None.
+
+        """
+
+        with open(path, "rb") as pack_file:
+            ## Read-only mapping of the whole pack file (stays valid after the file is closed).
+            self._mmap = mmap.mmap(pack_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, index_size = _HEADER.unpack_from(self._mmap, 0)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            raise ValueError(f"{path} is not a version {PACK_VERSION} asset pack")
+        data_offset = _HEADER.size + index_size
+        ## Asset (offset in the file, size) pairs, indexed by asset path.
+        self._index = {name: (data_offset + offset, size) for name, (offset, size) in
+                       json.loads(self._mmap[_HEADER.size:data_offset].decode("utf-8")).items()}
+        ## Memoryview of the whole mapping, sliced without copying.
+        self._view = memoryview(self._mmap)
+
+
+    def __contains__(self, relative_path: str) -> bool:
+        """
+
+        @param relative_path Asset path relative to the project root.
+        @returns Whether the asset is in the pack.
+
+        """
+
+        return relative_path.replace(os.sep, "/") in self._index
+
+
+    def get_names(self) -> list:
+        """
+
+        @returns The paths of the packed assets.
+
+        """
+
+        return list(self._index)
+
+
+    def get_buffer(self, relative_path: str) -> memoryview:
+        """
+
+        @param relative_path Asset path relative to the project root.
+        @returns A memoryview of the asset bytes (no copy).
+
+        """
+
+        offset, size = self._index[relative_path.replace(os.sep, "/")]
+        return self._view[offset:offset + size]
+
+
+    def open(self, relative_path: str) -> PackedFileView:
+        """Opens an asset for reading.
+
+        @param relative_path Asset path relative to the project root.
+        @returns A file-like view of the asset, which can be passed to the pygame loaders.
+
+        """
+
+        return PackedFileView(self.get_buffer(relative_path))
+
+
+def write_pack(root_path: str, relative_paths: list, pack_path: str) -> None:
+    """Writes an asset pack.
+
+    @param root_path Folder the asset paths are relative to (the project root).
+    @param relative_paths Paths of the assets to pack, relative to root_path.
+    @param pack_path Path of the pack file to write.
+    @returns None.
+
+    """
+
+    names = sorted(relative_path.replace(os.sep, "/") for relative_path in relative_paths)
+    index = {}
+    offset = 0
+    for name in names:
+        size = os.path.getsize(os.path.join(root_path, name))
+        index[name] = [offset, size]
+        offset += size
+    index_bytes = json.dumps(index).encode("utf-8")
+    with open(pack_path, "wb") as pack_file:
+        pack_file.write(_HEADER.pack(PACK_MAGIC, PACK_VERSION, len(index_bytes)))
+        pack_file.write(index_bytes)
+        for name in names:
+            with open(os.path.join(root_path, name), "rb") as asset_file:
+                pack_file.write(asset_file.read())
@@ -0,0 +1,229 @@
+import hashlib
+import os
+import threading
+import wave
+import pygame as pyg
+import pygame.freetype
+from utils import open_resource, get_cache_path, get_asset_pack, get_resource_path
+
+
+class AssetManager:
+    """Loads and shares the game assets.
+
+    Assets needed by the first frame (images, fonts) are loaded on demand on the calling thread and shared: one font
+    object is created per size. Non-critical assets (sound effects and music) are loaded on a background thread, so the
+    window shows up without waiting for them; until they are ready get_sound() returns None and the sound is simply
+    not played. The game can also do without them: an asset that fails to load is left out (its error is kept in
+    load_errors) and the game runs without that sound or without music. Decoding MP3 files is slow, so decoded sound
+    effects are also cached as WAV files (keyed by the hash of the source file and the mixer settings) and later
+    launches load the cached file instead.
+
+    """
+
+
+    def __init__(self) -> None:
+        """Initializes the asset manager with empty caches.
+
+        @returns None.
+
+        """
+
+        ## Shared font objects, indexed by size.
+        self._fonts = {}
+        ## Loaded sound effects, indexed by name. Filled by the background thread.
+        self._sounds = {}
+        ## Background loading thread.
+        self._loader = None
+        ## Set by the background thread once every non-critical asset is loaded.
+        self._loaded = threading.Event()
+        ## Whether the music has been loaded. Set by the background thread.
+        self._music_loaded = False
+        ## Exceptions raised while loading the non-critical assets, indexed by asset name ("music" or the sound name).
+        self.load_errors = {}
+
+
+    def get_font(self, size: int, relative_path: str = "assets/fonts/DejaVuSans.ttf") -> pyg.freetype.Font:
+        """Returns the font of the given size, creating it on first use.
+
+        @param size Font size.
+        @param relative_path Path of the font file relative to the project root (or inside the asset pack).
+        @returns The shared font object.
+
+        """
+
+        key = (relative_path, size)
+        font = self._fonts.get(key)
+        if font is None:
+            # the font reads its file lazily, the file object stays open as long as the font exists
+            font = self._fonts[key] = pyg.freetype.Font(open_resource(relative_path), size)
+        return font
+
+
+    def load_image(self, relative_path: str) -> pyg.Surface:
+        """Loads an image.
+
+        @param relative_path Path of the image file relative to the project root (or inside the asset pack).
+        @returns The image Surface.
+
+        """
+
+        with open_resource(relative_path) as image_file:
+            return pyg.image.load(image_file, relative_path)
+
+
+    def load_in_background(self, sounds: dict, music: str = None) -> None:
+        """Starts loading the sound effects and the music on a background thread.
+
+        @param sounds Paths of the sound effect files relative to the project root, indexed by sound name.
+        @param music Path of the music file relative to the project root, or None.
+        @returns None.
+
+        """
+
+        self._loader = threading.Thread(target=self._load, args=(sounds, music), name="asset-loader", daemon=True)
+        self._loader.start()
+
+
+    def _load(self, sounds: dict, music: str) -> None:
+        """Background thread body: loads the music and the sound effects.
+
+        @param sounds Paths of the sound effect files relative to the project root, indexed by sound name.
+        @param music Path of the music file relative to the project root, or None.
+        @returns None.
+
+        """
+
+        try:
+            if music is not None:
+                try:
+                    pyg.mixer.music.load(self._get_mixer_source(music)) # streamed, nothing to decode upfront
+                    self._music_loaded = True
+                except (pyg.error, OSError) as error:
+                    self.load_errors["music"] = error
+            for name, relative_path in sounds.items():
+                try:
+                    self._sounds[name] = self._load_sound(relative_path)
+                except (pyg.error, OSError) as error:
+                    self.load_errors[name] = error
+        finally:
+            self._loaded.set()
+
+
+    def _get_mixer_source(self, relative_path: str) -> any:
+        """Gets a file path the mixer can read an audio asset from, extracting it from the asset pack to the cache if
+        needed.
+
+        Audio files must not be read by the mixer through Python file objects: the mixer reads them while holding the
+        audio lock (the audio thread streaming the music, the loader thread decoding the sound effects) and would then
+        need the GIL, deadlocking with the main thread pausing or resuming the music, which takes the audio lock while
+        holding the GIL.
+
+        @param relative_path Path of the audio file relative to the project root.
+        @returns The path of a file with the asset (or, if the cache cannot be written, a file object reading it from
+        the pack).
+
+        """
+
+        asset_pack = get_asset_pack()
+        if asset_pack is None or relative_path not in asset_pack:
+            return get_resource_path(relative_path)
+        source_bytes = asset_pack.get_buffer(relative_path)
+        digest = hashlib.sha1(source_bytes).hexdigest()[:16]
+        file_name, extension = os.path.splitext(os.path.basename(relative_path))
+        cached_path = os.path.join(get_cache_path(), f"{file_name}-{digest}{extension}")
+        if not os.path.exists(cached_path):
+            try:
+                os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+                temp_path = f"{cached_path}.{os.getpid()}.tmp"
+                with open(temp_path, "wb") as cached_file:
+                    cached_file.write(source_bytes)
+                os.replace(temp_path, cached_path) # never leave a partially written file under the cached name
+            except OSError:
+                return open_resource(relative_path) # read-only location: stream from the pack after all
+        return cached_path
+
+
+    def _load_sound(self, relative_path: str) -> pyg.mixer.Sound:
+        """Loads a sound effect, from the decoded WAV cache if possible.
+
+        @param relative_path Path of the sound file relative to the project root.
+        @returns The Sound.
+
+        """
+
+        if os.path.splitext(relative_path)[1].lower() == ".wav":
+            return pyg.mixer.Sound(self._get_mixer_source(relative_path))
+
+        with open_resource(relative_path) as source_file:
+            source_bytes = source_file.read()
+        mixer_settings = pyg.mixer.get_init()
+        digest = hashlib.sha1(source_bytes + repr(mixer_settings).encode()).hexdigest()[:16]
+        file_name = os.path.splitext(os.path.basename(relative_path))[0]
+        cached_path = os.path.join(get_cache_path(), f"{file_name}-{digest}.wav")
+        if os.path.exists(cached_path):
+            try:
+                return pyg.mixer.Sound(cached_path)
+            except pyg.error:
+                pass # unreadable cache file: decode the source file again and rewrite it
+
+        sound = pyg.mixer.Sound(self._get_mixer_source(relative_path))
+        self._write_wav_cache(sound, mixer_settings, cached_path)
+        return sound
+
+
+    def _write_wav_cache(self, sound: pyg.mixer.Sound, mixer_settings: tuple, cached_path: str) -> None:
+        """Writes the decoded samples of a sound to a WAV file. Only 16-bit signed samples (the default mixer format)
+        are cached, other formats are decoded again at every launch.
+
+        @param sound Decoded Sound.
+        @param mixer_settings Mixer (frequency, format, channels), as returned by pyg.mixer.get_init().
+        @param cached_path Path of the WAV file.
+        @returns None.
+
+        """
+
+        frequency, sample_format, channels = mixer_settings
+        if sample_format != -16:
+            return
+        try:
+            os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+            temp_path = f"{cached_path}.{os.getpid()}.tmp"
+            with wave.open(temp_path, "wb") as wav_file:
+                wav_file.setnchannels(channels)
+                wav_file.setsampwidth(2)
+                wav_file.setframerate(frequency)
+                wav_file.writeframes(sound.get_raw())
+            os.replace(temp_path, cached_path) # never leave a partially written file under the cached name
+        except OSError:
+            pass # read-only location: the cache is only an optimization
+
+
+    def is_ready(self) -> bool:
+        """
+
+        @returns Whether the background loading has completed (successfully or not, see load_errors).
+
+        """
+
+        return self._loaded.is_set()
+
+
+    def has_music(self) -> bool:
+        """
+
+        @returns Whether the music has been loaded and can be played.
+
+        """
+
+        return self._music_loaded
+
+
+    def get_sound(self, name: str) -> pyg.mixer.Sound:
+        """
+
+        @param name Sound effect name.
+        @returns The sound effect, or None if it has not been loaded yet.
+
+        """
+
+        return self._sounds.get(name)
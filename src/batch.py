@@ -0,0 +1,333 @@
+import numpy as np
+import parameters as par
+import geometry as geo
+from generator import PieceQueue
+
+
+# Batch simulation of many independent games with NumPy. All boards are stored in a single (N, rows, cols) array
+# and every step is applied to all of them at once with vectorized collision, lock, line-clear and scoring, following
+# the rules implemented by GameState and Tile. Inputs are discrete per-step actions (one per board) rather than held
+# keys, which is the natural interface for bots and regression runs: an action has the effect of GameEngine.step with
+# the corresponding key as only input.
+
+## No action.
+ACTION_NONE = 0
+## Move the tile one cell to the left.
+ACTION_LEFT = 1
+## Move the tile one cell to the right.
+ACTION_RIGHT = 2
+## Rotate the tile (same direction and wall kicks as Tile).
+ACTION_ROTATE = 3
+## Move the tile one cell down and score a soft drop (at most once per SOFT_DROP_TIME_INTERVAL_ms, as Tile).
+ACTION_SOFT_DROP = 4
+## Drop the tile to the lowest reachable row and score a hard drop.
+ACTION_HARD_DROP = 5
+
+## Tile types, the board stores (index + 1) of a type and 0 for empty cells (same ids as GameState).
+TILE_TYPES = tuple(par.TILE_SHAPES)
+## Index of each tile type in TILE_TYPES.
+_TYPE_IDXS = {tile_type: idx for idx, tile_type in enumerate(TILE_TYPES)}
+## Filled cell offsets as an array of shape (types, configurations, 4, 2), the last axis being (row, col).
+_CELL_OFFSETS = np.array([geo.TILE_CELLS[tile_type] for tile_type in TILE_TYPES], dtype=np.int16)
+## Spawn column of each tile type.
+_SPAWN_COLS = np.array([int(par.GRID_NR_OF_COLS / 2) - 2 if tile_type in ("I", "O") else int(par.GRID_NR_OF_COLS / 2) - 1
+                        for tile_type in TILE_TYPES], dtype=np.int16)
+## Score per number of lines cleared at once (index 0 for no lines), multiplied by the level.
+_LINE_CLEAR_SCORES = np.array([0] + [par.LINE_CLEAR_SCORE_MULTIPLIERS[nr] for nr in range(1, 5)], dtype=np.int64)
+
+
+def _build_kick_arrays() -> tuple:
+    """Converts the counter-clockwise kicks of par.ROTATION_SYSTEM to arrays.
+
+    @returns The (row, col) kick offsets as an array of shape (types, configurations, kicks, 2), padded with zeros past
+    the number of kicks of each configuration, and the number of kicks as an array of shape (types, configurations).
+
+    """
+
+    kick_tables = geo.KICK_TABLES[par.ROTATION_SYSTEM]
+    max_nr_of_kicks = max(len(kicks) for kicks_per_type in kick_tables.values() for kicks in kicks_per_type.values())
+    offsets = np.zeros((len(TILE_TYPES), par.TILE_CONFIG_IDX_MAX, max_nr_of_kicks, 2), dtype=np.int16)
+    nr_of_kicks = np.zeros((len(TILE_TYPES), par.TILE_CONFIG_IDX_MAX), dtype=np.int16)
+    for type_idx, tile_type in enumerate(TILE_TYPES):
+        for cfg_idx in range(0, par.TILE_CONFIG_IDX_MAX):
+            kicks = kick_tables[tile_type][(cfg_idx, (cfg_idx + 1) % par.TILE_CONFIG_IDX_MAX)]
+            offsets[type_idx, cfg_idx, :len(kicks)] = kicks
+            nr_of_kicks[type_idx, cfg_idx] = len(kicks)
+    return offsets, nr_of_kicks
+
+
+## Rotation kick offsets and number of kicks per (type, configuration), see _build_kick_arrays.
+_KICK_OFFSETS, _NR_OF_KICKS = _build_kick_arrays()
+
+
+class BatchEngine:
+    """Vectorized simulator advancing N independent games per step.
+
+    Boards, tiles, timers and statistics of all games are stored in NumPy arrays indexed by the board number. Games
+    that are over are frozen and ignored by subsequent steps. Each game is dealt its tiles by its own PieceQueue, so
+    board i plays exactly the game of a GameEngine seeded with seed + i and fed the same inputs (same scores, lines
+    and levels).
+
+    """
+
+
+    def __init__(self, nr_of_boards: int, seed: int = None, randomizer: str = par.RANDOMIZER) -> None:
+        """Initializes N empty games.
+
+        @param nr_of_boards Number of games simulated in parallel.
+        @param seed Seed of the tile sequence of board 0, board i using seed + i (None for random seeds).
+        @param randomizer Randomizer name drawing the tile types (see generator.RANDOMIZERS).
+        @returns None.
+
+        """
+
+        ## Number of games simulated in parallel.
+        self.nr_of_boards = nr_of_boards
+        ## Piece queue of each game.
+        self.pieces = [PieceQueue(seed + idx if seed is not None else None, randomizer) for idx in range(nr_of_boards)]
+        ## Boards of all games (N x rows x cols), storing the tile type id of each cell (0 if empty).
+        self.boards = np.zeros((nr_of_boards, par.GRID_NR_OF_ROWS, par.GRID_NR_OF_COLS), dtype=np.uint8)
+        ## Upcoming tile type indices (N x TILE_QUEUE_SIZE), column 0 being the current tile.
+        self.tile_queues = np.array([[_TYPE_IDXS[tile_type] for tile_type in pieces.get_preview()]
+                                     for pieces in self.pieces], dtype=np.int8).reshape(nr_of_boards, par.TILE_QUEUE_SIZE)
+        ## Current tile type index of each game.
+        self.tile_types = self.tile_queues[:, 0].copy()
+        ## Current configuration (rotation) index of each game.
+        self.cfg_idxs = np.zeros(nr_of_boards, dtype=np.int8)
+        ## Board row of the current tile's top-left corner in each game.
+        self.rows = np.full(nr_of_boards, par.TILE_SPAWN_ROW, dtype=np.int16)
+        ## Board column of the current tile's top-left corner in each game.
+        self.cols = _SPAWN_COLS[self.tile_types]
+        ## Score of each game.
+        self.scores = np.zeros(nr_of_boards, dtype=np.int64)
+        ## Total lines cleared in each game.
+        self.lines = np.zeros(nr_of_boards, dtype=np.int32)
+        ## Level of each game.
+        self.levels = np.ones(nr_of_boards, dtype=np.int32)
+        ## Whether each game is still running.
+        self.running = np.ones(nr_of_boards, dtype=bool)
+        ## Gravity interval of each game in milliseconds.
+        self._fall_time_intervals_ms = np.full(nr_of_boards, par.INITIAL_FALL_TIME_INTERVAL_ms, dtype=np.int32)
+        ## Milliseconds accumulated towards the next gravity tick of each game.
+        self._fall_timers_ms = np.zeros(nr_of_boards)
+        ## Milliseconds accumulated towards the next soft drop permission of each game.
+        self._soft_drop_timers_ms = np.zeros(nr_of_boards)
+        ## Whether the tile of each game is due to fall by one row (see Tile.is_falling).
+        self._is_falling = np.zeros(nr_of_boards, dtype=bool)
+        ## Whether the tile of each game may soft drop (see Tile.can_soft_drop).
+        self._can_soft_drop = np.zeros(nr_of_boards, dtype=bool)
+        ## Milliseconds each tile has spent in contact with the ground.
+        self._down_contact_timers_ms = np.zeros(nr_of_boards)
+
+
+    def _collides(self, idx: np.ndarray, types: np.ndarray, cfgs: np.ndarray, rows: np.ndarray, cols: np.ndarray,
+                  ceiling: bool = False) -> np.ndarray:
+        """Checks whether tiles placed at the given cells overlap the walls, the floor or occupied cells.
+
+        @param idx Board indices to check.
+        @param types Tile type indices (one per board in idx).
+        @param cfgs Configuration indices (one per board in idx).
+        @param rows Board rows of the tiles' top-left corners (one per board in idx).
+        @param cols Board columns of the tiles' top-left corners (one per board in idx).
+        @param ceiling If True, filled cells above the spawn row (TILE_SPAWN_ROW) are treated as colliding as well.
+        @returns A boolean array, True where the tile collides.
+
+        """
+
+        offsets = _CELL_OFFSETS[types, cfgs]
+        cell_rows = rows[:, None] + offsets[:, :, 0]
+        cell_cols = cols[:, None] + offsets[:, :, 1]
+        out_of_bounds = (cell_cols < 0) | (cell_cols >= par.GRID_NR_OF_COLS) | (cell_rows >= par.GRID_NR_OF_ROWS)
+        if ceiling:
+            out_of_bounds |= cell_rows < par.TILE_SPAWN_ROW
+        occupied = self.boards[idx[:, None],
+                               np.clip(cell_rows, 0, par.GRID_NR_OF_ROWS - 1),
+                               np.clip(cell_cols, 0, par.GRID_NR_OF_COLS - 1)] != 0
+        occupied &= (cell_rows >= 0) & ~out_of_bounds # cells above the board are empty
+        return (out_of_bounds | occupied).any(axis=1)
+
+
+    def _move_laterally(self, idx: np.ndarray, delta: int) -> None:
+        """Moves the tiles of the given boards by delta columns where permitted.
+
+        @param idx Board indices.
+        @param delta Column offset (-1 or 1).
+        @returns None.
+
+        """
+
+        if idx.size == 0:
+            return
+        blocked = self._collides(idx, self.tile_types[idx], self.cfg_idxs[idx], self.rows[idx], self.cols[idx] + delta)
+        self.cols[idx[~blocked]] += delta
+
+
+    def _rotate(self, idx: np.ndarray) -> None:
+        """Rotates the tiles of the given boards, applying the same wall kicks as GameState.resolve_rotation.
+
+        @param idx Board indices.
+        @returns None.
+
+        """
+
+        pending = idx
+        for kick in range(0, _KICK_OFFSETS.shape[2]):
+            pending = pending[kick < _NR_OF_KICKS[self.tile_types[pending], self.cfg_idxs[pending]]]
+            if pending.size == 0:
+                return
+            offsets = _KICK_OFFSETS[self.tile_types[pending], self.cfg_idxs[pending], kick]
+            new_cfgs = (self.cfg_idxs[pending] + 1) % par.TILE_CONFIG_IDX_MAX
+            new_rows = self.rows[pending] + offsets[:, 0]
+            new_cols = self.cols[pending] + offsets[:, 1]
+            blocked = self._collides(pending, self.tile_types[pending], new_cfgs, new_rows, new_cols, ceiling=True)
+            done = pending[~blocked]
+            self.cfg_idxs[done] = new_cfgs[~blocked]
+            self.rows[done] = new_rows[~blocked]
+            self.cols[done] = new_cols[~blocked]
+            pending = pending[blocked]
+
+
+    def _drop_distances(self, idx: np.ndarray) -> np.ndarray:
+        """Computes how many rows the tiles of the given boards can drop.
+
+        @param idx Board indices.
+        @returns The drop distance of each tile.
+
+        """
+
+        distances = np.zeros(idx.size, dtype=np.int16)
+        moving = np.ones(idx.size, dtype=bool)
+        while moving.any():
+            sub = idx[moving]
+            blocked = self._collides(sub, self.tile_types[sub], self.cfg_idxs[sub], self.rows[sub] + distances[moving] + 1,
+                                     self.cols[sub])
+            moving_idx = np.flatnonzero(moving)
+            distances[moving_idx[~blocked]] += 1
+            moving[moving_idx[blocked]] = False
+        return distances
+
+
+    def _lock(self, idx: np.ndarray) -> None:
+        """Writes the tiles of the given boards into their boards.
+
+        @param idx Board indices.
+        @returns None.
+
+        """
+
+        offsets = _CELL_OFFSETS[self.tile_types[idx], self.cfg_idxs[idx]]
+        cell_rows = self.rows[idx, None] + offsets[:, :, 0]
+        cell_cols = self.cols[idx, None] + offsets[:, :, 1]
+        visible = cell_rows >= 0 # cells above the board are discarded
+        board_idx = np.broadcast_to(idx[:, None], cell_rows.shape)
+        self.boards[board_idx[visible], cell_rows[visible], cell_cols[visible]] = \
+            np.broadcast_to(self.tile_types[idx, None] + 1, cell_rows.shape)[visible]
+
+
+    def _clear_rows(self, idx: np.ndarray) -> None:
+        """Clears the completed rows of the given boards and updates the statistics, in the order of
+        GameState.delete_completed_rows (the lines are scored at the level reached with them).
+
+        @param idx Board indices.
+        @returns None.
+
+        """
+
+        boards = self.boards[idx]
+        completed = (boards != 0).all(axis=2)
+        nr_of_completed = completed.sum(axis=1)
+        cleared = nr_of_completed > 0
+        if not cleared.any():
+            return
+        # move completed rows to the top (stable, so that the other rows keep their order) and empty them
+        order = np.argsort(~completed[cleared], axis=1, kind="stable")
+        boards_cleared = np.take_along_axis(boards[cleared], order[:, :, None], axis=1)
+        boards_cleared[np.arange(par.GRID_NR_OF_ROWS)[None, :] < nr_of_completed[cleared, None]] = 0
+        self.boards[idx[cleared]] = boards_cleared
+
+        self.lines[idx] += nr_of_completed
+        level_up = (self.lines[idx] >= self.levels[idx] * par.MAX_LINES_PER_LEVEL) & (self.levels[idx] < par.MAX_LEVEL)
+        self.levels[idx[level_up]] += 1
+        self._fall_time_intervals_ms[idx[level_up]] -= par.FALL_TIME_INTERVAL_DELTA_ms
+        self.scores[idx] += _LINE_CLEAR_SCORES[nr_of_completed] * self.levels[idx]
+
+
+    def _spawn(self, idx: np.ndarray) -> None:
+        """Spawns the next tile of the queue on the given boards and ends the games where it overlaps or is in contact.
+
+        As in Tile, the new tile is checked against the board before the completed rows are cleared.
+
+        @param idx Board indices.
+        @returns None.
+
+        """
+
+        self.tile_queues[idx, :-1] = self.tile_queues[idx, 1:]
+        for board_idx in idx:
+            pieces = self.pieces[board_idx]
+            pieces.pop()
+            self.tile_queues[board_idx, -1] = _TYPE_IDXS[pieces.peek(par.TILE_QUEUE_SIZE - 1)]
+        self.tile_types[idx] = self.tile_queues[idx, 0]
+        self.cfg_idxs[idx] = 0
+        self.rows[idx] = par.TILE_SPAWN_ROW
+        self.cols[idx] = _SPAWN_COLS[self.tile_types[idx]]
+        self._is_falling[idx] = False
+        self._can_soft_drop[idx] = False
+        overlap = self._collides(idx, self.tile_types[idx], self.cfg_idxs[idx], self.rows[idx], self.cols[idx])
+        contact = self._collides(idx, self.tile_types[idx], self.cfg_idxs[idx], self.rows[idx] + 1, self.cols[idx])
+        self.running[idx[overlap | contact]] = False
+
+
+    def step(self, actions: np.ndarray, dt_ms: float) -> None:
+        """Advances all running games by one step.
+
+        @param actions Action of each game for this step (one of the ACTION_* constants), shape (N,).
+        @param dt_ms Milliseconds of simulated time elapsed since the last step.
+        @returns None.
+
+        """
+
+        actions = np.asarray(actions)
+        active = self.running.copy()
+
+        self._fall_timers_ms[active] += dt_ms
+        falling = active & (self._fall_timers_ms >= self._fall_time_intervals_ms)
+        self._fall_timers_ms[falling] %= self._fall_time_intervals_ms[falling]
+        self._is_falling |= falling
+        self._soft_drop_timers_ms[active] += dt_ms
+        soft_drop_allowed = active & (self._soft_drop_timers_ms >= par.SOFT_DROP_TIME_INTERVAL_ms)
+        self._soft_drop_timers_ms[soft_drop_allowed] %= par.SOFT_DROP_TIME_INTERVAL_ms
+        self._can_soft_drop |= soft_drop_allowed
+
+        self._move_laterally(np.flatnonzero(active & (actions == ACTION_LEFT)), -1)
+        self._move_laterally(np.flatnonzero(active & (actions == ACTION_RIGHT)), 1)
+        self._rotate(np.flatnonzero(active & (actions == ACTION_ROTATE)))
+
+        idx = np.flatnonzero(active)
+        contact = np.zeros(self.nr_of_boards, dtype=bool)
+        contact[idx] = self._collides(idx, self.tile_types[idx], self.cfg_idxs[idx], self.rows[idx] + 1, self.cols[idx])
+        free = active & ~contact
+
+        soft_drop = free & (actions == ACTION_SOFT_DROP)
+        self.rows[soft_drop & self._can_soft_drop] += 1
+        self.scores[soft_drop & self._can_soft_drop] += 1
+        self._can_soft_drop[soft_drop] = False
+
+        hard_drop = np.flatnonzero(free & (actions == ACTION_HARD_DROP))
+        if hard_drop.size != 0:
+            distances = self._drop_distances(hard_drop)
+            self.rows[hard_drop] += distances
+            self.scores[hard_drop] += par.SCORE_MULTIPLIER_HARD_DROP * distances
+
+        gravity = free & self._is_falling & (actions != ACTION_SOFT_DROP) & (actions != ACTION_HARD_DROP)
+        self.rows[gravity] += 1
+        self._is_falling[gravity] = False
+
+        locking = np.flatnonzero(active & contact & (self._down_contact_timers_ms >= par.DOWN_CONTACT_TIMEOUT_ms))
+        self._down_contact_timers_ms[locking] = 0
+        self._down_contact_timers_ms[active & contact] += dt_ms
+        if locking.size != 0:
+            self._lock(locking)
+            self._spawn(locking)
+            self._clear_rows(locking)
+            self.running[locking[(self.boards[locking, 0] != 0).any(axis=1)]] = False # GameState.game_over_check
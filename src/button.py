@@ -1,6 +1,7 @@
 import pygame as pyg
+import pygame.freetype
 import parameters as par
-from utils import get_resource_path
+from utils import open_resource
 
 
 class Button():
@@ -12,18 +13,20 @@ class Button():
 	"""
 
 
-	def __init__(self, TLC_coords: tuple, text: str = '', font_size: int = par.DEFAULT_BUTTON_FONT_SIZE, text_color: tuple = par.BLACK) -> None:
+	def __init__(self, TLC_coords: tuple, text: str = '', font_size: int = par.DEFAULT_BUTTON_FONT_SIZE, text_color: tuple = par.BLACK,
+			  font: pyg.freetype.Font = None) -> None:
 		"""Initializes the Button.
 
 		@param TLC_coords Coordinates of the top-left corner of the button.
 		@param text Text to display on the button.
 		@param font_size Font size of the button text.
 		@param text_color Color of the button text.
+		@param font Shared font object to render the text with (e.g. from AssetManager.get_font), created from font_size if None.
 		@returns None.
 
 		"""
 
-		text_font = pyg.freetype.Font(get_resource_path("assets/fonts/DejaVuSans.ttf"), font_size)
+		text_font = font if font is not None else pyg.freetype.Font(open_resource("assets/fonts/DejaVuSans.ttf"), font_size)
 		## Rendered pygame Surface for the button text. Used when blitting the label.
 		self._text_surface, _ = text_font.render(text, text_color)
 		## Bounding rect of the button.
@@ -56,6 +59,32 @@ class Button():
 			self._clicked = False
 
 
+	def get_rect(self) -> pyg.Rect:
+		"""
+
+		@returns The bounding rect of the button.
+
+		"""
+
+		return self._rect
+
+
+	def get_state(self) -> str:
+		"""Updates the mouse-over and clicked states and returns the resulting visual state.
+
+		@returns "idle", "hover" or "active" (the keys of the button colors without the "button_" prefix).
+
+		"""
+
+		self._update_button_state()
+		if not self._mouse_over:
+			return "idle"
+		elif self._mouse_over and not self._clicked:
+			return "hover"
+		else:
+			return "active"
+
+
 	def is_activated(self) -> bool:
 		"""Checks if the button has been activated (by clicking and releasing).
 
@@ -82,13 +111,7 @@ class Button():
 		"""
 		
 		# TODO: check border radius validity -> should not be larger than half the smallest side of the button
-		self._update_button_state()
-		if not self._mouse_over:
-			pyg.draw.rect(surface, colors["button_idle"], self._rect, border_radius=border_radius)
-		elif self._mouse_over and not self._clicked:
-			pyg.draw.rect(surface, colors["button_hover"], self._rect, border_radius=border_radius)
-		else:
-			pyg.draw.rect(surface, colors["button_active"], self._rect, border_radius=border_radius)
+		pyg.draw.rect(surface, colors["button_" + self.get_state()], self._rect, border_radius=border_radius)
 
 		surface.blit(self._text_surface, (self._rect.centerx - self._text_surface.get_width() // 2,
 										self._rect.centery - self._text_surface.get_height() // 2))
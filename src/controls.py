@@ -0,0 +1,116 @@
+import parameters as par
+
+
+class InputHandler:
+    """Turns timestamped key presses and releases into the actions of each logic step.
+
+    Keys are identified by their names (see the hotkeys in parameters) and timestamps are in milliseconds of
+    simulated time, so the handler does not depend on pygame. Every press is remembered until the next poll, so that a
+    tap shorter than a frame is never lost. Lateral movement keys trigger once when pressed and then auto-repeat every
+    ARR milliseconds after being held for DAS milliseconds (delayed auto shift), rotation and hard drop trigger once
+    per press, while soft drop and pause are reported for as long as they are held.
+
+    """
+
+
+    ## Keys auto-repeating while held, after the delayed auto shift.
+    _REPEATING_KEYS = (par.LEFT, par.RIGHT)
+    ## Keys triggering once per press.
+    _SINGLE_SHOT_KEYS = (par.ROTATE, par.HARD_DROP)
+    ## Actions of a step without any key pressed or held, shared so that idle steps allocate nothing.
+    _NO_ACTIONS = frozenset()
+
+
+    def __init__(self, das_ms: float = par.DAS_ms, arr_ms: float = par.ARR_ms) -> None:
+        """Initializes the input handler with no key held.
+
+        @param das_ms Delayed auto shift: how long (ms) a lateral movement key is held before it starts repeating.
+        @param arr_ms Auto repeat rate: interval (ms) between repeated lateral movements (0 to repeat every step).
+        @returns None.
+
+        """
+
+        ## Delayed auto shift in milliseconds.
+        self._das_ms = das_ms
+        ## Auto repeat interval in milliseconds.
+        self._arr_ms = arr_ms
+        ## Keys currently held.
+        self._held = set()
+        ## Keys pressed since the last poll, reported once even if already released.
+        self._pressed = set()
+        ## Simulated time (ms) of the next auto-repeat of each held repeating key.
+        self._next_repeat_ms = {}
+
+
+    def press(self, key_name: str, time_ms: float) -> None:
+        """Registers a key press.
+
+        @param key_name Name of the pressed key.
+        @param time_ms Simulated time of the press in milliseconds.
+        @returns None.
+
+        """
+
+        if key_name in self._held:
+            return # ignore the key repeat events of the OS
+        self._held.add(key_name)
+        self._pressed.add(key_name)
+        if key_name in self._REPEATING_KEYS:
+            self._next_repeat_ms[key_name] = time_ms + self._das_ms
+
+
+    def release(self, key_name: str, time_ms: float) -> None:
+        """Registers a key release.
+
+        @param key_name Name of the released key.
+        @param time_ms Simulated time of the release in milliseconds.
+        @returns None.
+
+        """
+
+        self._held.discard(key_name)
+        self._next_repeat_ms.pop(key_name, None)
+
+
+    def release_all(self) -> None:
+        """Releases all keys (e.g. when the window loses focus and the releases would not be received).
+
+        @returns None.
+
+        """
+
+        self._held.clear()
+        self._pressed.clear()
+        self._next_repeat_ms.clear()
+
+
+    def is_held(self, key_name: str) -> bool:
+        """
+
+        @param key_name Key name.
+        @returns Whether the key is currently held.
+
+        """
+
+        return key_name in self._held
+
+
+    def poll(self, time_ms: float) -> frozenset:
+        """Computes the actions of the logic step ending at the given time.
+
+        @param time_ms Simulated time of the logic step in milliseconds.
+        @returns The key names of the actions to apply during the step.
+
+        """
+
+        if not self._pressed and not self._held:
+            return self._NO_ACTIONS
+        actions = set(self._pressed)
+        for key_name, next_repeat_ms in self._next_repeat_ms.items():
+            if time_ms >= next_repeat_ms:
+                actions.add(key_name)
+                self._next_repeat_ms[key_name] = max(next_repeat_ms + self._arr_ms, time_ms)
+        actions.update(key_name for key_name in self._held
+                       if key_name not in self._REPEATING_KEYS and key_name not in self._SINGLE_SHOT_KEYS)
+        self._pressed.clear()
+        return frozenset(actions)
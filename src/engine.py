@@ -0,0 +1,169 @@
+import parameters as par
+from state import GameState
+from tile import Tile
+from generator import PieceQueue
+from replay import ReplayRecorder
+from instrumentation import FrameTimings
+
+
+class GameEngine:
+    """Headless simulation core of the game.
+
+    Owns the game state and the falling tile and advances them through an explicit step(inputs, dt_ms) call.
+    Gravity and soft-drop pacing are driven by the simulated time passed to step() instead of pygame timers, so that
+    the engine never imports pygame and can run as fast as the caller steps it (e.g. to simulate games in worker
+    processes). snapshot() and restore() capture and put back the whole game (state, tile and timers) in a few
+    microseconds, which is what search-based bots, rollback and save states are built on. A game can be recorded as a
+    replay (see replay.py) and re-simulated exactly from its seed and inputs.
+
+    """
+
+    ## Attributes of the engine (no per-instance __dict__, see __init__ for their description).
+    __slots__ = ("state", "pieces", "tile", "_fall_time_interval_ms", "_fall_timer_ms", "_soft_drop_timer_ms",
+                 "timings", "recorder")
+
+
+    def __init__(self, timings: FrameTimings = None, seed: int = None,
+                 randomizer: str = par.RANDOMIZER) -> None:
+        """Initializes the engine with a new game.
+
+        @param timings Timings the phases of each step are recorded into (disabled timings if None).
+        @param seed Seed of the tile sequence (None for a random seed), games with the same seed and randomizer are
+        dealt the same tiles.
+        @param randomizer Name of the randomizer drawing the tile types (see generator.RANDOMIZERS).
+        @returns None.
+
+        """
+
+        ## Current game state.
+        self.state = GameState()
+        ## Queue dealing the tile types of the game (its seed is pieces.seed).
+        self.pieces = PieceQueue(seed, randomizer)
+        ## Current tetromino tile.
+        self.tile = Tile(self.state, self.pieces)
+        ## Current gravity/fall interval in milliseconds.
+        self._fall_time_interval_ms = par.INITIAL_FALL_TIME_INTERVAL_ms
+        ## Milliseconds accumulated towards the next gravity tick.
+        self._fall_timer_ms = 0
+        ## Milliseconds accumulated towards the next soft-drop tick.
+        self._soft_drop_timer_ms = 0
+        ## Phase timings of the steps.
+        self.timings = timings if timings is not None else FrameTimings()
+        ## Recorder of the steps of the game, None when not recording.
+        self.recorder = None
+        self.state.on("level_up", self._level_up_callback)
+
+
+    def _level_up_callback(self, event: str, data: any = None) -> None:
+        """Callback invoked when level-up occurs.
+
+        @param event Event name.
+        @param data Optional data.
+        @returns None.
+
+        """
+
+        if event == "level_up":
+            # speed up tile descent
+            self._fall_time_interval_ms -= par.FALL_TIME_INTERVAL_DELTA_ms
+        else:
+            pass
+
+
+    def _advance_timers(self, dt_ms: float) -> None:
+        """Advances the gravity and soft-drop timers and flags the tile accordingly.
+
+        @param dt_ms Milliseconds of simulated time elapsed since the last step.
+        @returns None.
+
+        """
+
+        self._fall_timer_ms += dt_ms
+        if self._fall_timer_ms >= self._fall_time_interval_ms:
+            self._fall_timer_ms %= self._fall_time_interval_ms
+            self.tile.is_falling = True
+
+        self._soft_drop_timer_ms += dt_ms
+        if self._soft_drop_timer_ms >= par.SOFT_DROP_TIME_INTERVAL_ms:
+            self._soft_drop_timer_ms %= par.SOFT_DROP_TIME_INTERVAL_ms
+            self.tile.can_soft_drop = True
+
+
+    def snapshot(self) -> tuple:
+        """Captures the game as an immutable value.
+
+        The piece queue and its random generator are part of the snapshot, so a restored game is dealt the same tiles.
+
+        @returns A tuple holding the game state and tile snapshots and the gravity and soft-drop timers, to be passed
+        to restore().
+
+        """
+
+        return (self.state.snapshot(), self.tile.snapshot(),
+                self._fall_time_interval_ms, self._fall_timer_ms, self._soft_drop_timer_ms)
+
+
+    def restore(self, snapshot: tuple) -> None:
+        """Puts the game back as it was when a snapshot was taken (the event listeners are kept and notified).
+
+        @param snapshot Value returned by snapshot().
+        @returns None.
+
+        """
+
+        state_snapshot, tile_snapshot, self._fall_time_interval_ms, self._fall_timer_ms, self._soft_drop_timer_ms = \
+            snapshot
+        self.state.restore(state_snapshot)
+        self.tile.restore(tile_snapshot)
+
+
+    def start_recording(self, path: str) -> None:
+        """Starts recording the game as a replay, to be called before the first step.
+
+        @param path Path of the replay file.
+        @returns None.
+
+        """
+
+        self.recorder = ReplayRecorder(path, self.pieces.seed, self.pieces.randomizer_name)
+
+
+    def stop_recording(self) -> None:
+        """Stops recording the game (if recording) and waits for the replay file to be written.
+
+        @returns None.
+
+        """
+
+        if self.recorder is not None:
+            self.recorder.close(self.state.get_score(), self.state.get_lines())
+            self.recorder = None
+
+
+    def step(self, inputs: frozenset, dt_ms: float) -> None:
+        """Advances the game by dt_ms milliseconds of simulated time.
+
+        @param inputs Key names (see the hotkeys in parameters) of the actions to apply during this step, e.g. as
+        computed by controls.InputHandler: lateral movements, rotation and hard drop are applied once per step they are
+        present in, soft drop for as long as it is present.
+        @param dt_ms Milliseconds of simulated time elapsed since the last step.
+        @returns None.
+
+        """
+
+        if not self.state.game_running:
+            return
+        if self.recorder is not None:
+            self.recorder.record(inputs, dt_ms)
+        self.state.keys_pressed = inputs
+        self._advance_timers(dt_ms)
+        timings = self.timings
+        timings.start("update_position")
+        self.tile.update_position(self.state, dt_ms)
+        timings.stop("update_position")
+        timings.start("delete_completed_rows")
+        self.state.delete_completed_rows()
+        timings.stop("delete_completed_rows")
+        timings.start("game_over_check")
+        self.state.game_over_check()
+        timings.stop("game_over_check")
@@ -0,0 +1,359 @@
+import random
+from abc import ABC, abstractmethod
+import parameters as par
+
+## Tile types, in the order of par.TILE_SHAPES.
+TILE_TYPES = tuple(par.TILE_SHAPES)
+
+
+class Randomizer(ABC):
+    """Base class of the tile type randomizers.
+
+    A randomizer draws tile types from the random generator of its game, in bulk: generate() returns as many types as
+    requested at once, so that the per-spawn overhead is paid once per refill of the piece queue. Randomizers which
+    depend on the types drawn before (bag contents, history) expose that memory through get_state() and set_state(),
+    so that the piece queue can be snapshotted and restored.
+
+    """
+
+    __slots__ = ("_rng",)
+
+
+    def __init__(self, rng: random.Random) -> None:
+        """Initializes the randomizer.
+
+        @param rng Random generator of the game.
+        @returns None.
+
+        """
+
+        ## Random generator of the game.
+        self._rng = rng
+
+
+    @abstractmethod
+    def generate(self, count: int) -> list:
+        """Draws the next tile types.
+
+        @param count Number of tile types to draw.
+        @returns The tile types, in order.
+
+        """
+
+
+    def get_state(self) -> tuple:
+        """
+
+        @returns An immutable value holding what the randomizer remembers of the types drawn so far.
+
+        """
+
+        return ()
+
+
+    def set_state(self, state: tuple) -> None:
+        """Puts back what the randomizer remembered when get_state() was called.
+
+        @param state Value returned by get_state().
+        @returns None.
+
+        """
+
+        pass
+
+
+class UniformRandomizer(Randomizer):
+    """Draws every tile type independently with the same probability (long droughts and floods are possible)."""
+
+    __slots__ = ()
+
+
+    def generate(self, count: int) -> list:
+        """Draws the next tile types.
+
+        @param count Number of tile types to draw.
+        @returns The tile types, in order.
+
+        """
+
+        return self._rng.choices(TILE_TYPES, k=count)
+
+
+class BagRandomizer(Randomizer):
+    """Deals the tile types from shuffled bags holding one tile of each type (the "7-bag" of the Tetris guideline).
+
+    Every type comes once in each group of seven consecutive tiles, so the same type never comes more than twice in a
+    row and at most twelve tiles separate two tiles of the same type.
+
+    """
+
+    __slots__ = ("_bag",)
+
+
+    def __init__(self, rng: random.Random) -> None:
+        """Initializes the randomizer with an empty bag.
+
+        @param rng Random generator of the game.
+        @returns None.
+
+        """
+
+        super().__init__(rng)
+        ## Tile types left in the current bag, in dealing order.
+        self._bag = ()
+
+
+    def generate(self, count: int) -> list:
+        """Draws the next tile types.
+
+        @param count Number of tile types to draw.
+        @returns The tile types, in order.
+
+        """
+
+        tile_types = list(self._bag)
+        while len(tile_types) < count:
+            bag = list(TILE_TYPES)
+            self._rng.shuffle(bag)
+            tile_types.extend(bag)
+        self._bag = tuple(tile_types[count:])
+        del tile_types[count:]
+        return tile_types
+
+
+    def get_state(self) -> tuple:
+        """
+
+        @returns The tile types left in the current bag.
+
+        """
+
+        return self._bag
+
+
+    def set_state(self, state: tuple) -> None:
+        """Puts back the tile types left in the bag when get_state() was called.
+
+        @param state Value returned by get_state().
+        @returns None.
+
+        """
+
+        self._bag = state
+
+
+class HistoryRandomizer(Randomizer):
+    """Draws the tile types uniformly, but rerolls a type found among the last ones drawn (as in the TGM series).
+
+    Up to HISTORY_RANDOMIZER_ROLLS draws are made per tile, the last one being kept even if it is in the history. The
+    history starts with the types of HISTORY_RANDOMIZER_START, which keeps the first tiles from being S or Z tiles.
+
+    """
+
+    __slots__ = ("_history",)
+
+
+    def __init__(self, rng: random.Random) -> None:
+        """Initializes the randomizer with the starting history.
+
+        @param rng Random generator of the game.
+        @returns None.
+
+        """
+
+        super().__init__(rng)
+        ## Last tile types drawn, oldest first.
+        self._history = tuple(par.HISTORY_RANDOMIZER_START)
+
+
+    def generate(self, count: int) -> list:
+        """Draws the next tile types.
+
+        @param count Number of tile types to draw.
+        @returns The tile types, in order.
+
+        """
+
+        choice = self._rng.choice
+        history = list(self._history)
+        tile_types = []
+        for _ in range(count):
+            for _ in range(par.HISTORY_RANDOMIZER_ROLLS):
+                tile_type = choice(TILE_TYPES)
+                if tile_type not in history:
+                    break
+            del history[0]
+            history.append(tile_type)
+            tile_types.append(tile_type)
+        self._history = tuple(history)
+        return tile_types
+
+
+    def get_state(self) -> tuple:
+        """
+
+        @returns The last tile types drawn.
+
+        """
+
+        return self._history
+
+
+    def set_state(self, state: tuple) -> None:
+        """Puts back the history of when get_state() was called.
+
+        @param state Value returned by get_state().
+        @returns None.
+
+        """
+
+        self._history = state
+
+
+## Randomizer classes, indexed by the names accepted by PieceQueue (see RANDOMIZER in parameters).
+RANDOMIZERS = {"uniform": UniformRandomizer, "bag": BagRandomizer, "history": HistoryRandomizer}
+
+
+class PieceQueue:
+    """Upcoming tile types of a game, drawn by a pluggable randomizer from a random generator seeded per game.
+
+    The types are kept in a fixed-size ring buffer which is refilled in bulk by the randomizer whenever fewer types
+    than the preview needs (TILE_QUEUE_SIZE) are left, so that spawning a tile only advances the read index. The queue
+    is only used by the game thread and takes no locks. Two queues with the same seed and randomizer deal the same
+    sequence, which makes games reproducible (benchmarks, bot comparisons, replays).
+
+    """
+
+    __slots__ = ("seed", "randomizer_name", "_rng", "_randomizer", "_buffer", "_head", "_count", "_rng_state")
+
+
+    def __init__(self, seed: int = None, randomizer: str = par.RANDOMIZER,
+                 capacity: int = par.PIECE_QUEUE_BUFFER_SIZE) -> None:
+        """Initializes the queue and draws its first tile types.
+
+        @param seed Seed of the random generator of the game (None for a seed drawn from the random module).
+        @param randomizer Randomizer name (see RANDOMIZERS).
+        @param capacity Number of tile types held by the ring buffer (at least TILE_QUEUE_SIZE).
+        @returns None.
+
+        """
+
+        if randomizer not in RANDOMIZERS:
+            raise ValueError(f"Invalid randomizer: {randomizer}. Must be one of {', '.join(RANDOMIZERS)}.")
+        ## Seed of the random generator of the game.
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        ## Name of the randomizer drawing the tile types.
+        self.randomizer_name = randomizer
+        ## Random generator of the game.
+        self._rng = random.Random(self.seed)
+        ## Randomizer drawing the tile types.
+        self._randomizer = RANDOMIZERS[randomizer](self._rng)
+        ## Ring buffer of the upcoming tile types.
+        self._buffer = [None] * max(capacity, par.TILE_QUEUE_SIZE)
+        ## Index of the current tile type in the ring buffer.
+        self._head = 0
+        ## Number of upcoming tile types in the ring buffer (current one included).
+        self._count = 0
+        ## State of the random generator since the last refill, read lazily by snapshot() (None until then).
+        self._rng_state = None
+        self._refill()
+
+
+    def _refill(self) -> None:
+        """Fills the free slots of the ring buffer with newly drawn tile types.
+
+        @returns None.
+
+        """
+
+        capacity = len(self._buffer)
+        count = capacity - self._count
+        tile_types = self._randomizer.generate(count)
+        tail = (self._head + self._count) % capacity
+        first_count = min(count, capacity - tail) # slots up to the end of the buffer, the rest wraps around
+        self._buffer[tail:tail + first_count] = tile_types[:first_count]
+        self._buffer[0:count - first_count] = tile_types[first_count:]
+        self._count = capacity
+        self._rng_state = None
+
+
+    def peek(self, idx: int = 0) -> str:
+        """
+
+        @param idx Position in the queue (0 for the current tile, smaller than TILE_QUEUE_SIZE).
+        @returns The tile type at that position.
+
+        """
+
+        return self._buffer[(self._head + idx) % len(self._buffer)]
+
+
+    def get_preview(self, count: int = par.TILE_QUEUE_SIZE) -> tuple:
+        """
+
+        @param count Number of tile types (at most TILE_QUEUE_SIZE).
+        @returns The upcoming tile types, current one first.
+
+        """
+
+        return tuple(self.peek(idx) for idx in range(0, count))
+
+
+    def pop(self) -> str:
+        """Removes the current tile type from the queue, refilling the ring buffer if needed.
+
+        @returns The removed tile type.
+
+        """
+
+        tile_type = self._buffer[self._head]
+        self._head = (self._head + 1) % len(self._buffer)
+        self._count -= 1
+        if self._count < par.TILE_QUEUE_SIZE:
+            self._refill()
+        return tile_type
+
+
+    def snapshot(self) -> tuple:
+        """Captures the queue as an immutable value.
+
+        The state of the random generator only changes when the ring buffer is refilled, so it is read once per refill
+        and shared by the snapshots taken in between.
+
+        @returns A tuple holding the ring buffer contents and indices, the randomizer state and the random generator
+        state, to be passed to restore().
+
+        """
+
+        if self._rng_state is None:
+            self._rng_state = self._rng.getstate()
+        return (tuple(self._buffer), self._head, self._count, self._randomizer.get_state(), self._rng_state)
+
+
+    def restore(self, snapshot: tuple) -> None:
+        """Puts the queue back as it was when a snapshot was taken: it deals the same tile types afterwards.
+
+        @param snapshot Value returned by snapshot() on this queue.
+        @returns None.
+
+        """
+
+        buffer, self._head, self._count, randomizer_state, rng_state = snapshot
+        if rng_state is not self._rng_state:
+            self._rng.setstate(rng_state)
+            self._rng_state = rng_state
+        self._randomizer.set_state(randomizer_state)
+        self._buffer[:] = buffer
+
+
+def generate_sequence(seed: int, count: int, randomizer: str = par.RANDOMIZER) -> tuple:
+    """Pre-generates the tile types dealt to a game, e.g. to compare bots on the same sequence.
+
+    @param seed Seed of the random generator of the game.
+    @param count Number of tile types.
+    @param randomizer Randomizer name (see RANDOMIZERS).
+    @returns The first count tile types the PieceQueue of a game with this seed and randomizer deals.
+
+    """
+
+    return tuple(RANDOMIZERS[randomizer](random.Random(seed)).generate(count))
@@ -0,0 +1,214 @@
+import parameters as par
+
+
+# Precomputed tetromino geometry, derived once at import from par.TILE_SHAPES. Every table is indexed as
+# TABLE[tile_type][cfg_idx] and only describes the filled cells of the 4x4 configuration matrix, so that hot
+# loops iterate over the four minos of a tile instead of all sixteen cells of its matrix. There are no left/right edge
+# profiles: lateral contact is detected with the row bitmasks (see GameState.collides), only the bottom profiles are
+# needed for the drop distance.
+
+
+def _get_cells(cfg_matrix: list) -> tuple:
+    """
+    @param cfg_matrix 4x4 configuration matrix.
+    @returns The (row, col) offsets of the filled cells, ordered row by row.
+
+    """
+
+    return tuple((row, col) for row in range(0, par.TILE_CONFIG_IDX_MAX)
+                            for col in range(0, par.TILE_CONFIG_IDX_MAX) if cfg_matrix[row][col] == 1)
+
+
+def _get_row_masks(cells: tuple) -> tuple:
+    """
+    @param cells Filled cell offsets.
+    @returns A tuple of (row offset, bitmask) pairs for the non-empty rows, where bit col is set when the cell at
+    column col is filled.
+
+    """
+
+    masks = {}
+    for row, col in cells:
+        masks[row] = masks.get(row, 0) | (1 << col)
+    return tuple(sorted(masks.items()))
+
+
+def _get_bottom_profile(cells: tuple) -> tuple:
+    """
+    @param cells Filled cell offsets.
+    @returns A tuple of (col offset, lowest row offset) pairs, one per non-empty column.
+
+    """
+
+    profile = {}
+    for row, col in cells:
+        profile[col] = max(profile.get(col, row), row)
+    return tuple(sorted(profile.items()))
+
+
+def _get_bounding_box(cells: tuple) -> tuple:
+    """
+    @param cells Filled cell offsets.
+    @returns The (top row offset, left col offset, number of rows, number of cols) of the smallest box containing the
+    filled cells.
+
+    """
+
+    rows = [row for row, _ in cells]
+    cols = [col for _, col in cells]
+    return (min(rows), min(cols), max(rows) - min(rows) + 1, max(cols) - min(cols) + 1)
+
+
+def _get_outline_segments(cells: tuple) -> tuple:
+    """Computes the outer border of the tile, i.e. the cell edges that are not shared by two filled cells.
+
+    @param cells Filled cell offsets.
+    @returns A tuple of ((x_start, y_start), (x_end, y_end)) segments, in cell units relative to the top-left
+    corner of the configuration matrix.
+
+    """
+
+    filled = set(cells)
+    segments = []
+    for row, col in cells:
+        if (row - 1, col) not in filled: # top edge
+            segments.append(((col, row), (col + 1, row)))
+        if (row, col - 1) not in filled: # left edge
+            segments.append(((col, row), (col, row + 1)))
+        if (row + 1, col) not in filled: # bottom edge
+            segments.append(((col, row + 1), (col + 1, row + 1)))
+        if (row, col + 1) not in filled: # right edge
+            segments.append(((col + 1, row), (col + 1, row + 1)))
+    return tuple(segments)
+
+
+def _build_table(builder: callable) -> dict:
+    """Builds a geometry table by applying a builder function to the filled cells of every tile configuration.
+
+    @param builder Function mapping the filled cell offsets of a configuration to the table entry.
+    @returns A dict mapping each tile type to a tuple with one entry per configuration index.
+
+    """
+
+    return {tile_type: tuple(builder(cells) for cells in cells_per_cfg)
+            for tile_type, cells_per_cfg in TILE_CELLS.items()}
+
+
+## Filled cell (row, col) offsets per tile type and configuration index.
+TILE_CELLS = {tile_type: tuple(_get_cells(cfg_matrix) for cfg_matrix in cfg_matrices)
+              for tile_type, cfg_matrices in par.TILE_SHAPES.items()}
+## (row offset, bitmask) pairs of the non-empty rows per tile type and configuration index.
+TILE_ROW_MASKS = _build_table(_get_row_masks)
+## (col offset, lowest row offset) pairs per tile type and configuration index.
+TILE_BOTTOM_PROFILES = _build_table(_get_bottom_profile)
+## (top row offset, left col offset, number of rows, number of cols) bounding boxes per tile type and configuration index.
+TILE_BOUNDING_BOXES = _build_table(_get_bounding_box)
+## Outer border segments (in cell units) per tile type and configuration index, used to draw the drop preview.
+TILE_OUTLINE_SEGMENTS = _build_table(_get_outline_segments)
+
+
+# Wall kick tables. KICK_TABLES[rotation_system][tile_type][(from_cfg_idx, to_cfg_idx)] is the tuple of (row, col)
+# offsets tried in order when rotating, the first one leading to a free position wins.
+
+
+def _get_classic_kicks(tile_type: str) -> dict:
+    """Builds the kick table of the game's own rule: try in place, then one cell to the right, then one cell to the
+    left. The I tile does not kick.
+
+    @param tile_type Tile type.
+    @returns A dict mapping (from_cfg_idx, to_cfg_idx) to the kick offsets.
+
+    """
+
+    kicks = ((0, 0),) if tile_type == "I" else ((0, 0), (0, 1), (0, -1))
+    return {(cfg_idx, (cfg_idx + step) % par.TILE_CONFIG_IDX_MAX): kicks
+            for cfg_idx in range(0, par.TILE_CONFIG_IDX_MAX) for step in (1, -1)}
+
+
+## SRS kick offsets (x right, y up) of the J, L, S, T and Z tiles, indexed by (from, to) SRS state (0, R=1, 2, L=3).
+_SRS_JLSTZ_KICKS_XY = {(0, 1): ((0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)),
+                       (1, 0): ((0, 0), (1, 0), (1, -1), (0, 2), (1, 2)),
+                       (1, 2): ((0, 0), (1, 0), (1, -1), (0, 2), (1, 2)),
+                       (2, 1): ((0, 0), (-1, 0), (-1, 1), (0, -2), (-1, -2)),
+                       (2, 3): ((0, 0), (1, 0), (1, 1), (0, -2), (1, -2)),
+                       (3, 2): ((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)),
+                       (3, 0): ((0, 0), (-1, 0), (-1, -1), (0, 2), (-1, 2)),
+                       (0, 3): ((0, 0), (1, 0), (1, 1), (0, -2), (1, -2))}
+## SRS kick offsets (x right, y up) of the I tile, indexed by (from, to) SRS state (0, R=1, 2, L=3).
+_SRS_I_KICKS_XY = {(0, 1): ((0, 0), (-2, 0), (1, 0), (-2, -1), (1, 2)),
+                   (1, 0): ((0, 0), (2, 0), (-1, 0), (2, 1), (-1, -2)),
+                   (1, 2): ((0, 0), (-1, 0), (2, 0), (-1, 2), (2, -1)),
+                   (2, 1): ((0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1)),
+                   (2, 3): ((0, 0), (2, 0), (-1, 0), (2, 1), (-1, -2)),
+                   (3, 2): ((0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1)),
+                   (3, 0): ((0, 0), (1, 0), (-2, 0), (1, -2), (-2, 1)),
+                   (0, 3): ((0, 0), (-1, 0), (2, 0), (-1, 2), (2, -1))}
+## SRS state of each configuration index (the spawn configurations of par.TILE_SHAPES point down, i.e. SRS state 2,
+## and increasing the index rotates counter-clockwise).
+_SRS_STATES = (2, 1, 0, 3)
+## Filled cell (row, col) offsets of each tile type in SRS state 0, within its SRS bounding box (4x4 for the I tile,
+## 3x3 for the others, the O tile does not rotate).
+_SRS_SPAWN_CELLS = {"I": ((1, 0), (1, 1), (1, 2), (1, 3)),
+                    "J": ((0, 0), (1, 0), (1, 1), (1, 2)),
+                    "L": ((0, 2), (1, 0), (1, 1), (1, 2)),
+                    "O": ((0, 1), (0, 2), (1, 1), (1, 2)),
+                    "S": ((0, 1), (0, 2), (1, 0), (1, 1)),
+                    "T": ((0, 1), (1, 0), (1, 1), (1, 2)),
+                    "Z": ((0, 0), (0, 1), (1, 1), (1, 2))}
+
+
+def _get_srs_offset(tile_type: str, cfg_idx: int) -> tuple:
+    """Computes where a configuration matrix of par.TILE_SHAPES sits relative to the SRS bounding box of its state.
+
+    @param tile_type Tile type.
+    @param cfg_idx Configuration index.
+    @returns The (row, col) offset of the filled cells of the configuration matrix from those of the SRS state.
+
+    """
+
+    srs_cells = _SRS_SPAWN_CELLS[tile_type]
+    if tile_type != "O":
+        box_size = 4 if tile_type == "I" else 3
+        for _ in range(0, _SRS_STATES[cfg_idx]):
+            srs_cells = tuple((col, box_size - 1 - row) for row, col in srs_cells) # clockwise
+    srs_cells = sorted(srs_cells)
+    cells = sorted(TILE_CELLS[tile_type][cfg_idx])
+    offset = (cells[0][0] - srs_cells[0][0], cells[0][1] - srs_cells[0][1])
+    if any((row - offset[0], col - offset[1]) != srs_cell for (row, col), srs_cell in zip(cells, srs_cells)):
+        raise ValueError(f"Configuration {cfg_idx} of the {tile_type} tile does not have the shape of SRS state "
+                         f"{_SRS_STATES[cfg_idx]}")
+    return offset
+
+
+def _get_srs_kicks(tile_type: str) -> dict:
+    """Builds the SRS kick table of a tile type, converted to (row, col) offsets and configuration indices.
+
+    SRS kicks are defined for tiles rotating within their SRS bounding boxes, whereas the configuration matrices of
+    par.TILE_SHAPES place the filled cells differently (e.g. the J, L and T tiles pointing up sit one row lower). The
+    kicks are therefore shifted by the difference between the positions of the two configurations in their SRS boxes,
+    so that the tiles end up in the cells SRS puts them in.
+
+    @param tile_type Tile type.
+    @returns A dict mapping (from_cfg_idx, to_cfg_idx) to the kick offsets.
+
+    """
+
+    kicks_xy = _SRS_I_KICKS_XY if tile_type == "I" else _SRS_JLSTZ_KICKS_XY
+    offsets = [_get_srs_offset(tile_type, cfg_idx) for cfg_idx in range(0, par.TILE_CONFIG_IDX_MAX)]
+    kicks = {}
+    for cfg_idx in range(0, par.TILE_CONFIG_IDX_MAX):
+        for step in (1, -1):
+            to_cfg_idx = (cfg_idx + step) % par.TILE_CONFIG_IDX_MAX
+            row_shift = offsets[cfg_idx][0] - offsets[to_cfg_idx][0]
+            col_shift = offsets[cfg_idx][1] - offsets[to_cfg_idx][1]
+            if tile_type == "O":
+                kicks_rc = ((0, 0),)
+            else:
+                kicks_rc = tuple((-y, x) for x, y in kicks_xy[(_SRS_STATES[cfg_idx], _SRS_STATES[to_cfg_idx])])
+            kicks[(cfg_idx, to_cfg_idx)] = tuple((row + row_shift, col + col_shift) for row, col in kicks_rc)
+    return kicks
+
+
+## Kick offsets per rotation system, tile type and (from, to) configuration index.
+KICK_TABLES = {"classic": {tile_type: _get_classic_kicks(tile_type) for tile_type in par.TILE_SHAPES},
+               "srs": {tile_type: _get_srs_kicks(tile_type) for tile_type in par.TILE_SHAPES}}
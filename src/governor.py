@@ -0,0 +1,101 @@
+import parameters as par
+
+
+class FrameGovernor:
+    """Decides which frames are rendered and paces the main loop.
+
+    Keeps a version number of what is on screen, bumped by invalidate() whenever something visible changes (tile
+    movements, board and statistics updates, pause menu hover, etc.). A frame is only rendered if the version changed
+    since the last rendered frame, so that while the tile rests between two gravity ticks without input the main loop
+    only processes events and logic updates. invalidate() has the signature of an event callback, so it can be
+    subscribed directly to the events of the game state and the tile.
+
+    Pacing modes (par.FRAME_PACING):
+    - "tick": sleeps until the next frame is due (lowest CPU usage, frame times as precise as the OS sleep).
+    - "tick_busy_loop": busy-waits until the next frame is due (precise frame times, keeps a CPU core busy).
+    - "vsync": the display update of a rendered frame waits for the display refresh. Skipped frames do not reach the
+      display, so they are paced like in "tick" mode.
+
+    """
+
+    ## Supported pacing modes.
+    PACING_MODES = ("tick", "tick_busy_loop", "vsync")
+
+
+    def __init__(self, clock, pacing: str = par.FRAME_PACING, target_fps: int = par.TARGET_FPS,
+                 skip_unchanged_frames: bool = par.SKIP_UNCHANGED_FRAMES) -> None:
+        """Initializes the governor, the first frame being due.
+
+        @param clock Clock pacing the main loop (pygame.time.Clock).
+        @param pacing Pacing mode, one of PACING_MODES.
+        @param target_fps Target frames per second.
+        @param skip_unchanged_frames Whether frames without changes are skipped.
+        @returns None.
+
+        """
+
+        if pacing not in self.PACING_MODES:
+            raise ValueError(f"Invalid frame pacing mode: {pacing}. Must be one of {', '.join(self.PACING_MODES)}.")
+        ## Clock pacing the main loop.
+        self._clock = clock
+        ## Pacing mode.
+        self.pacing = pacing
+        ## Target frames per second.
+        self._target_fps = target_fps
+        ## Whether frames without changes are skipped.
+        self._skip_unchanged_frames = skip_unchanged_frames
+        ## Version of the screen content, bumped by every visible change.
+        self._version = 1
+        ## Version of the last rendered frame.
+        self._drawn_version = 0
+        ## Whether the last frame was rendered.
+        self._last_frame_drawn = False
+
+
+    def invalidate(self, event: str = None, data: any = None) -> None:
+        """Flags the screen content as changed, so that the next frame is rendered. Can be used as an event callback.
+
+        @param event Name of the event that changed the screen content (unused).
+        @param data Optional data associated with the event (unused).
+        @returns None.
+
+        """
+
+        self._version += 1
+
+
+    def should_draw(self) -> bool:
+        """
+
+        @returns Whether the current frame has to be rendered.
+
+        """
+
+        return self._version != self._drawn_version or not self._skip_unchanged_frames
+
+
+    def frame_drawn(self) -> None:
+        """Records that the current frame was rendered.
+
+        @returns None.
+
+        """
+
+        self._drawn_version = self._version
+        self._last_frame_drawn = True
+
+
+    def wait(self) -> None:
+        """Waits until the next frame is due, according to the pacing mode.
+
+        @returns None.
+
+        """
+
+        drawn, self._last_frame_drawn = self._last_frame_drawn, False
+        if self.pacing == "tick_busy_loop":
+            self._clock.tick_busy_loop(self._target_fps)
+        elif self.pacing == "vsync" and drawn:
+            self._clock.tick() # the display update already waited for the refresh
+        else:
+            self._clock.tick(self._target_fps)
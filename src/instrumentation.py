@@ -0,0 +1,231 @@
+import csv
+import json
+import time
+import tracemalloc
+from array import array
+import parameters as par
+
+
+class FrameTimings:
+    """Opt-in, low-overhead timing of the phases of a frame.
+
+    Every phase (e.g. "events", "update_position", "display_update") is timed between a start() and a stop() call with
+    time.perf_counter_ns. The durations of the last samples of each phase are kept in a fixed-size ring buffer, so
+    memory stays bounded however long the session lasts, and are summarized as percentiles on demand. While disabled,
+    start() and stop() return immediately. Does not depend on pygame, so the engine can be timed headless as well.
+
+    """
+
+    ## Unit of the recorded samples.
+    UNIT = "ms"
+
+
+    def __init__(self, enabled: bool = False, capacity: int = par.TIMINGS_RING_BUFFER_SIZE) -> None:
+        """Initializes the timings with empty ring buffers.
+
+        @param enabled Whether timings are recorded.
+        @param capacity Number of samples kept per phase.
+        @returns None.
+
+        """
+
+        ## Whether timings are recorded.
+        self.enabled = enabled
+        ## Number of samples kept per phase.
+        self._capacity = capacity
+        ## Start timestamp (ns) of the running measurement of each phase.
+        self._starts = {}
+        ## Ring buffer of the last samples of each phase, indexed by phase name (in order of first use).
+        self._samples = {}
+        ## Total number of samples recorded per phase (the next write index is this count modulo the capacity).
+        self._counts = {}
+
+
+    def start(self, phase: str) -> None:
+        """Starts timing a phase.
+
+        @param phase Phase name.
+        @returns None.
+
+        """
+
+        if self.enabled:
+            self._starts[phase] = time.perf_counter_ns()
+
+
+    def stop(self, phase: str) -> None:
+        """Stops timing a phase and records its duration.
+
+        @param phase Phase name.
+        @returns None.
+
+        """
+
+        if not self.enabled:
+            return
+        end_ns = time.perf_counter_ns()
+        start_ns = self._starts.pop(phase, None)
+        if start_ns is None:
+            return # enabled while the phase was running
+        self._record(phase, (end_ns - start_ns) / 1e6)
+
+
+    def _record(self, phase: str, value: float) -> None:
+        """Writes a sample into the ring buffer of a phase.
+
+        @param phase Phase name.
+        @param value Sample value.
+        @returns None.
+
+        """
+
+        samples = self._samples.get(phase)
+        if samples is None:
+            samples = self._samples[phase] = array('d', bytes(8 * self._capacity))
+            self._counts[phase] = 0
+        count = self._counts[phase]
+        samples[count % self._capacity] = value
+        self._counts[phase] = count + 1
+
+
+    def get_stats(self) -> dict:
+        """Summarizes the samples currently held in the ring buffers.
+
+        @returns A dict indexed by phase name of dicts with the number of samples ("count") and the "p50", "p95", "p99"
+        and "max" samples (durations in milliseconds for the timings).
+
+        """
+
+        stats = {}
+        for phase, samples in self._samples.items():
+            count = min(self._counts[phase], self._capacity)
+            ordered = sorted(samples[:count])
+            stats[phase] = {"count": count,
+                            "p50": self._percentile(ordered, 50),
+                            "p95": self._percentile(ordered, 95),
+                            "p99": self._percentile(ordered, 99),
+                            "max": ordered[-1]}
+        return stats
+
+
+    def _percentile(self, ordered: list, percent: float) -> float:
+        """
+
+        @param ordered Sorted, non-empty samples.
+        @param percent Percentile (0-100).
+        @returns The nearest-rank percentile of the samples.
+
+        """
+
+        rank = max(1, -(-len(ordered) * percent // 100)) # ceil without floats
+        return ordered[int(rank) - 1]
+
+
+    def dump(self, json_path: str, csv_path: str) -> None:
+        """Writes the percentiles of every phase to a JSON file and a CSV file.
+
+        @param json_path Path of the JSON file, or None to skip it.
+        @param csv_path Path of the CSV file, or None to skip it.
+        @returns None.
+
+        """
+
+        stats = self.get_stats()
+        if json_path is not None:
+            with open(json_path, "w") as json_file:
+                json.dump({"unit": self.UNIT, "phases": stats}, json_file, indent=4)
+        if csv_path is not None:
+            with open(csv_path, "w", newline="") as csv_file:
+                writer = csv.writer(csv_file)
+                writer.writerow(["phase", "count"] + [f"{key}_{self.UNIT}" for key in ("p50", "p95", "p99", "max")])
+                for phase, phase_stats in stats.items():
+                    writer.writerow([phase, phase_stats["count"]] +
+                                    [f"{phase_stats[key]:.4f}" for key in ("p50", "p95", "p99", "max")])
+
+
+class FrameAllocations(FrameTimings):
+    """Opt-in tracking of the memory allocated by each frame, with tracemalloc.
+
+    For every tracked phase (normally the whole main loop iteration), two samples are recorded in bytes:
+    "<phase>_peak", the peak of the memory allocated during the phase on top of what was allocated when it started,
+    which reveals short-lived garbage (temporary lists, tuples, Rects, etc.), and "<phase>_retained", the memory still
+    allocated when it ends. A steady-state frame should allocate close to nothing: the churn adds up to garbage
+    collector runs, which show up as stutter. Only one phase can be tracked at a time, since tracemalloc has a single
+    peak counter. tracemalloc slows the interpreter down noticeably, so it only runs while the tracking is enabled.
+
+    """
+
+    ## Unit of the recorded samples.
+    UNIT = "B"
+
+
+    def __init__(self, enabled: bool = False, capacity: int = par.TIMINGS_RING_BUFFER_SIZE) -> None:
+        """Initializes the tracking with empty ring buffers, starting tracemalloc if enabled.
+
+        @param enabled Whether allocations are tracked.
+        @param capacity Number of samples kept per phase.
+        @returns None.
+
+        """
+
+        super().__init__(False, capacity)
+        ## Sample names of each tracked phase: (peak, retained), indexed by phase name.
+        self._sample_names = {}
+        ## Whether tracemalloc was started by this tracker (and is stopped when the tracking is disabled).
+        self._owns_tracemalloc = False
+        self.set_enabled(enabled)
+
+
+    def set_enabled(self, enabled: bool) -> None:
+        """Starts or stops tracking allocations (and tracemalloc, unless it was started by someone else).
+
+        @param enabled Whether allocations are tracked.
+        @returns None.
+
+        """
+
+        if enabled and not self.enabled:
+            self._owns_tracemalloc = not tracemalloc.is_tracing()
+            if self._owns_tracemalloc:
+                tracemalloc.start()
+        elif not enabled and self.enabled:
+            self._starts.clear()
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+        self.enabled = enabled
+
+
+    def start(self, phase: str) -> None:
+        """Starts tracking the allocations of a phase.
+
+        @param phase Phase name.
+        @returns None.
+
+        """
+
+        if self.enabled:
+            if phase not in self._sample_names:
+                self._sample_names[phase] = (phase + "_peak", phase + "_retained")
+            # read twice: the first reading allocates the int holding it, the second one accounts for that int
+            self._starts[phase] = tracemalloc.get_traced_memory()[0]
+            self._starts[phase] = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+
+
+    def stop(self, phase: str) -> None:
+        """Stops tracking the allocations of a phase and records its peak and retained bytes.
+
+        @param phase Phase name.
+        @returns None.
+
+        """
+
+        if not self.enabled:
+            return
+        current_size, peak_size = tracemalloc.get_traced_memory()
+        start_size = self._starts.pop(phase, None)
+        if start_size is None:
+            return # enabled while the phase was running
+        peak_name, retained_name = self._sample_names[phase]
+        self._record(peak_name, peak_size - start_size)
+        self._record(retained_name, current_size - start_size)
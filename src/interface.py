@@ -1,9 +1,17 @@
+import os
+import time
 import pygame as pyg
 import parameters as par
-from tile import *
-from state import *
+from engine import GameEngine
+from controls import InputHandler
 from button import *
-from utils import get_resource_path
+from sprites import BlockAtlas
+from assets import AssetManager
+from instrumentation import FrameTimings, FrameAllocations
+from profiling import ProfilerCapture
+from governor import FrameGovernor
+from replay import Replay, ReplayPlayer
+import geometry as geo
 
 class GameInterface:
     """Main interface to the game.
@@ -13,58 +21,97 @@ class GameInterface:
 
     """
 
-    def __init__(self) -> None:
+    ## Event types queued only while the game is paused.
+    _PAUSE_MENU_EVENT_TYPES = [pyg.MOUSEMOTION, pyg.MOUSEBUTTONDOWN, pyg.MOUSEBUTTONUP]
+    ## Event type posted by the mixer when the main theme stops playing (end of the track or music stopped).
+    _MUSIC_END_EVENT_TYPE = pyg.event.custom_type()
+    ## Event types signalling that the window contents were lost (e.g. the window was uncovered or restored).
+    _EXPOSE_EVENT_TYPES = [pyg.WINDOWEXPOSED, pyg.VIDEOEXPOSE]
+
+
+    def __init__(self, seed: int = None) -> None:
         """Initializes the game interface.
 
+        @param seed Seed of the tile sequence (None for the seed set by the TETRIS_SEED environment variable, or a
+        random seed if it is not set). Ignored when watching a replay (TETRIS_REPLAY environment variable).
         @returns None.
         
         """
         
         pyg.init() # initialize pygame modules
         
+        ## Frame pacing mode (see FrameGovernor).
+        self._pacing = par.FRAME_PACING
         ## pygame display Surface for the main game window.
-        self._game_window = pyg.display.set_mode((par.GAME_WINDOW_WIDTH, par.GAME_WINDOW_HEIGHT))
+        self._game_window = None
+        if self._pacing == "vsync":
+            # vsync needs a renderer, which the SCALED mode provides
+            try:
+                self._game_window = pyg.display.set_mode((par.GAME_WINDOW_WIDTH, par.GAME_WINDOW_HEIGHT), pyg.SCALED,
+                                                         vsync=1)
+            except pyg.error:
+                self._pacing = "tick" # vsync not available
+        if self._game_window is None:
+            self._game_window = pyg.display.set_mode((par.GAME_WINDOW_WIDTH, par.GAME_WINDOW_HEIGHT))
         pyg.display.set_caption(f"Tetris v{par.APP_VERSION}")
+        # only queue the event types handled by _event_handler
+        pyg.event.set_blocked(None)
+        pyg.event.set_allowed([pyg.QUIT, pyg.KEYDOWN, pyg.KEYUP, pyg.WINDOWFOCUSLOST, self._MUSIC_END_EVENT_TYPE]
+                              + self._EXPOSE_EVENT_TYPES)
+        
         
+        ## Asset loader, shares fonts and loads the audio in the background.
+        self._assets = AssetManager()
+        # Set up music and sfx (not needed by the first frame, loaded on a background thread)
+        self._assets.load_in_background(sounds={"rotation": 'assets/audio/rotation.mp3',
+                                                "single": 'assets/audio/single.mp3',
+                                                "double": 'assets/audio/double.mp3',
+                                                "triple": 'assets/audio/triple.mp3',
+                                                "tetris": 'assets/audio/tetris.mp3'},
+                                        music='assets/audio/tetris-theme.mp3')
+        ## Whether the main theme still has to be started (once the music is loaded).
+        self._main_theme_pending = True
+        ## Position in the main theme (s) at which it was last started.
+        self._music_start_s = 0.0
+        ## Position in the main theme (s) at which it was stopped by the pause, None if it was not playing.
+        self._music_paused_at_s = None
         
+
         ## Game window icon Surface.
-        self._icon = pyg.image.load(get_resource_path('assets/images/tetris_icon.png')) # https://www.freepik.com/icons/tetris Icon by Freepik
+        self._icon = self._assets.load_image('assets/images/tetris_icon.png') # https://www.freepik.com/icons/tetris Icon by Freepik
         pyg.display.set_icon(self._icon)
         
         
         ## Game logo Surface (scaled).
-        self._logo = pyg.image.load(get_resource_path('assets/images/tetris_logo.png'))
+        self._logo = self._assets.load_image('assets/images/tetris_logo.png')
         self._logo = pyg.transform.smoothscale_by(self._logo, par.LOGO_SCALE_FACTOR)
         
         
         ## First font object for rendering text.
-        self._text_font_1 = pyg.freetype.Font(get_resource_path("assets/fonts/DejaVuSans.ttf"), par.FONT_SIZE_1)
+        self._text_font_1 = self._assets.get_font(par.FONT_SIZE_1)
 
         ## Second font object for rendering text.
-        self._text_font_2 = pyg.freetype.Font(get_resource_path("assets/fonts/DejaVuSans.ttf"), par.FONT_SIZE_2)
-        
-        
-        # Set up music and sfx
-
-        pyg.mixer.music.load(get_resource_path('assets/audio/tetris-theme.mp3'))
-        ## Rotation sound effect
-        self._rotation_sfx = pyg.mixer.Sound(get_resource_path('assets/audio/rotation.mp3'))
-        ## Single line clear sound effect
-        self._single_sfx = pyg.mixer.Sound(get_resource_path('assets/audio/single.mp3'))
-        ## Double line clear sound effect
-        self._double_sfx = pyg.mixer.Sound(get_resource_path('assets/audio/double.mp3'))
-        ## Triple line clear sound effect
-        self._triple_sfx = pyg.mixer.Sound(get_resource_path('assets/audio/triple.mp3'))
-        ## Tetris (4 lines) clear sound effect
-        self._tetris_sfx = pyg.mixer.Sound(get_resource_path('assets/audio/tetris.mp3'))
-
-        ## Current gravity/fall interval in milliseconds.
-        self._fall_time_interval_ms = par.INITIAL_FALL_TIME_INTERVAL_ms
+        self._text_font_2 = self._assets.get_font(par.FONT_SIZE_2)
+
+        ## pygame Clock used to cap the rendering rate.
+        self._clock = pyg.time.Clock()
+        ## Frame governor: skips the frames without visible changes and paces the main loop.
+        self.governor = FrameGovernor(self._clock, self._pacing)
+        ## Key codes of the hotkeys, indexed by the key names defined in parameters.
+        self._key_codes = {key_name: pyg.key.key_code(key_name)
+                           for key_name in (par.LEFT, par.RIGHT, par.DOWN, par.ROTATE, par.HARD_DROP, par.PAUSE)}
+        ## Hotkey names, indexed by key code.
+        self._key_names = {key_code: key_name for key_name, key_code in self._key_codes.items()}
+        ## Converts the key events into the actions of each logic step (DAS/ARR, single-shot keys).
+        self._input_handler = InputHandler()
+        ## Simulated time (ms) since the game started, advanced by the logic updates and used to timestamp key events.
+        self._sim_time_ms = 0.0
         
         # set up time invariant surfaces
 
         ## Transparent overlay surface for pause menu.
         self._transparent_overlay = pyg.Surface((par.GAME_WINDOW_WIDTH, par.GAME_WINDOW_HEIGHT), pyg.SRCALPHA)
+        self._transparent_overlay.fill(par.TRANSPARENT_GREY)
         ## Surface for pause information text.
         self._pause_info_text_surface, _ = self._text_font_1.render(f'Press "Esc" to pause the game', par.WHITE)
         ## Surface for the next tile in queue text.
@@ -78,57 +125,164 @@ class GameInterface:
         self._lines_text_pos = (self._level_text_pos[0], \
             self._level_text_pos[1] + self._text_font_1.get_sized_height() + par.STATS_VERTICAL_SPACING)
         
-        ## Event to detect if tile needs to fall by one square due to gravity, triggered at regular time intervals
-        self._gravity_tick_ev = pyg.USEREVENT + 0 # event ID = 24 (up to 32, but first 23 are used by pygame already)
-        ## Event to detect if tile can soft drop, triggered at regular time intervals
-        self._soft_drop_ev = pyg.USEREVENT + 1
-        pyg.time.set_timer(self._gravity_tick_ev, self._fall_time_interval_ms) 
-        pyg.time.set_timer(self._soft_drop_ev, par.SOFT_DROP_TIME_INTERVAL_ms)
-        
-        ## Resume button (shown in pause menu).
-        self._resume_button = Button(par.RESUME_BUTTON_POS, 'Resume')
+        # set up render layers
+
+        ## Pre-rendered block sprites.
+        self._block_atlas = BlockAtlas()
+        ## Static background layer (logo, grids and labels), rendered once.
+        self._background_layer = pyg.Surface((par.GAME_WINDOW_WIDTH, par.GAME_WINDOW_HEIGHT)).convert()
+        self._render_background_layer()
+        ## Screen area covered by the board layer: the playfield grid plus room for the outermost block borders.
+        self._board_layer_rect = pyg.Rect(par.GRID_TLC_x - par.BLOCK_BORDER_THICKNESS,
+                                          par.GRID_TLC_y - par.BLOCK_BORDER_THICKNESS,
+                                          par.GRID_NR_OF_COLS * par.GRID_ELEM_SIZE + 2 * par.BLOCK_BORDER_THICKNESS,
+                                          par.GRID_NR_OF_ROWS * par.GRID_ELEM_SIZE + 2 * par.BLOCK_BORDER_THICKNESS)
+        ## Locked board layer (grid and locked blocks), re-rendered only when the board changes.
+        self._board_layer = pyg.Surface(self._board_layer_rect.size).convert()
+        ## Whether the board layer needs to be re-rendered before the next frame.
+        self._board_layer_dirty = True
+
+        ## Cached HUD text per statistic: (text, rendered Surface, screen rect), indexed by statistic name.
+        self._hud_surfaces = {}
+        ## Whether the statistics changed since the HUD text was last rendered.
+        self._hud_dirty = True
+
+        # dirty rectangle tracking
+
+        ## Content key and screen rect of each dynamic element drawn in the previous frame, indexed by element name.
+        self._drawn_elements = {}
+        ## Screen rects changed during the current frame, pushed to the display at the end of the frame.
+        self._dirty_rects = []
+        ## Whether the next frame has to push the whole window to the display (first frame, after resuming).
+        self._full_update_pending = True
+        ## Whether the pause menu has been pushed to the display since the game was paused.
+        self._pause_menu_shown = False
+        ## Paused frame (game scene under the overlay, without the resume button), composited once per pause.
+        self._paused_frame = None
+        ## Visual state of the resume button as last pushed to the display.
+        self._resume_button_state = None
+        ## Events received while waiting for input, handled by the next _event_handler call.
+        self._pending_events = []
 
+        ## Resume button (shown in pause menu).
+        self._resume_button = Button(par.RESUME_BUTTON_POS, 'Resume',
+                                     font=self._assets.get_font(par.DEFAULT_BUTTON_FONT_SIZE))
+
+        # instrumentation
+
+        ## Frame phase timings, recorded if enabled in parameters or by the TETRIS_INSTRUMENTATION environment variable.
+        self.timings = FrameTimings(par.INSTRUMENTATION_ENABLED or os.environ.get("TETRIS_INSTRUMENTATION") == "1")
+        ## Key code of the frame timings overlay toggle.
+        self._timings_overlay_key_code = pyg.key.key_code(par.TIMINGS_OVERLAY)
+        ## Whether the frame timings overlay is shown.
+        self._timings_overlay_shown = False
+        ## Rendered frame timings overlay, refreshed every par.TIMINGS_OVERLAY_REFRESH_FRAMES frames.
+        self._timings_overlay_surface = None
+        ## Screen rect of the frame timings overlay.
+        self._timings_overlay_rect = None
+        ## Frames drawn since the frame timings overlay was last refreshed.
+        self._timings_overlay_age = 0
+        ## Font of the frame timings overlay.
+        self._timings_overlay_font = self._assets.get_font(par.TIMINGS_OVERLAY_FONT_SIZE)
+        ## Per-frame allocation tracking, enabled in parameters or by the TETRIS_ALLOCATIONS environment variable.
+        self.allocations = FrameAllocations(par.ALLOCATIONS_TRACKING_ENABLED or
+                                            os.environ.get("TETRIS_ALLOCATIONS") == "1")
+        ## Key code of the allocation tracking toggle.
+        self._allocations_tracking_key_code = pyg.key.key_code(par.ALLOCATIONS_TRACKING)
+        ## On-demand profiler of main loop iterations.
+        self.profiler = ProfilerCapture()
+        ## Key code of the profiler capture hotkey.
+        self._profiler_capture_key_code = pyg.key.key_code(par.PROFILER_CAPTURE)
+        if os.environ.get("TETRIS_PROFILE_ITERATIONS"):
+            self.profiler.request(int(os.environ["TETRIS_PROFILE_ITERATIONS"]))
+
+        replay = Replay(os.environ["TETRIS_REPLAY"]) if os.environ.get("TETRIS_REPLAY") else None
+        if seed is None and os.environ.get("TETRIS_SEED"):
+            seed = int(os.environ["TETRIS_SEED"])
+        ## Headless game engine, advanced by fixed logic time steps.
+        self.engine = GameEngine(self.timings, seed) if replay is None else \
+            GameEngine(self.timings, replay.seed, replay.randomizer)
+        ## Player feeding the recorded inputs to the engine when watching a replay (None when playing).
+        self._replay_player = ReplayPlayer(replay, self.engine) if replay is not None else None
+        ## Simulated time per real time, above 1 to fast-forward a replay (TETRIS_REPLAY_SPEED environment variable).
+        self.playback_speed = float(os.environ.get("TETRIS_REPLAY_SPEED", 1)) if replay is not None else 1.0
+        if replay is None and (par.REPLAY_RECORDING_ENABLED or os.environ.get("TETRIS_RECORD") == "1"):
+            self.engine.start_recording(os.path.join(par.REPLAY_OUTPUT_PATH,
+                                                     time.strftime("replay-%Y%m%d-%H%M%S") + par.REPLAY_FILE_EXTENSION))
         ## Current game state
-        self.state = GameState()
+        self.state = self.engine.state
         self.state.on("lines_completed", self._play_sfx_callback)
         self.state.on("soft_drop", self._play_sfx_callback)
         self.state.on("hard_drop", self._play_sfx_callback)
         self.state.on("rotation", self._play_sfx_callback)
         self.state.on("game_paused", self._paused_state_callback)
         self.state.on("game_resumed", self._paused_state_callback)
-        self.state.on("level_up", self._level_up_callback)
+        self.state.on("board_updated", self._board_updated_callback)
+        self.state.on("stats_updated", self._stats_updated_callback)
+        # every visible change flags the next frame for rendering
+        for event in ("board_updated", "stats_updated", "game_paused", "game_resumed"):
+            self.state.on(event, self.governor.invalidate)
 
         ## Current tetromino tile.
-        self._tile = Tile(self.state)
+        self._tile = self.engine.tile
         self._tile.on("rotation", self._play_sfx_callback)
-
-        # start playing main theme
-        self._play_main_theme()
+        self._tile.on("moved", self.governor.invalidate)
         
         
     def process_events_and_inputs(self) -> None:
-        """Calls the event handler and retrieves the user's inputs.
+        """Calls the event handler, which feeds the user's inputs to the input handler.
 
         @returns None.
 
         """
 
         self._event_handler()
-        self.state.get_current_keys()
+        # start playing main theme as soon as it is loaded
+        if self._main_theme_pending and self._assets.is_ready() and not self.state.is_game_paused():
+            if self._assets.has_music():
+                self._play_main_theme()
+            self._main_theme_pending = False
+
+
+    def wait_for_event(self, timeout_ms: int) -> None:
+        """Sleeps until an event is queued or the timeout expires, without using the CPU in the meantime.
+
+        @param timeout_ms Maximum waiting time in milliseconds.
+        @returns None.
+
+        """
+
+        event = pyg.event.wait(timeout_ms)
+        if event.type != pyg.NOEVENT:
+            self._pending_events.append(event)
 
 
-    def update(self) -> None:
+    def get_clock(self) -> pyg.time.Clock:
+        """
+
+        @returns The game clock.
+
+        """
+
+        return self._clock
+
+
+    def update(self, dt_ms: float = par.LOGIC_TIME_STEP_ms) -> None:
         """ Updates the game and tile states based on the current inputs and events.
 
+        @param dt_ms Milliseconds of simulated time to advance (one fixed logic time step).
         @returns None.
         
         """
         
-        self.state.update_pause_state(self._resume_button.is_activated())
+        self._sim_time_ms += dt_ms
+        inputs = self._input_handler.poll(self._sim_time_ms)
+        self.state.update_pause_state(par.PAUSE in inputs, self._resume_button.is_activated(), dt_ms)
         if not self.state.is_game_paused():  
-            self._tile.update_position(self.state)
-            self.state.delete_completed_rows()
-            self.state.game_over_check()
+            if self._replay_player is None:
+                self.engine.step(inputs, dt_ms)
+            elif not self._replay_player.step():
+                self.state.game_running = False # end of the replay
 
 
     def _event_handler(self) -> None:
@@ -137,18 +291,122 @@ class GameInterface:
         @returns None.
         
         """
-        for event in pyg.event.get():
+        events = self._pending_events + pyg.event.get()
+        self._pending_events.clear()
+        for event in events:
             # pressing the "X" button terminates the application
             if event.type == pyg.QUIT:
                 self.state.game_running = False
-            if event.type == self._gravity_tick_ev:
-                self._tile.is_falling = True
-            if event.type == self._soft_drop_ev:
-                self._tile.can_soft_drop = True
-            if event.type == pyg.KEYUP and event.key == par.PAUSE:
+            elif event.type == pyg.KEYDOWN or event.type == pyg.KEYUP:
+                self._key_event_handler(event)
+            elif event.type == pyg.WINDOWFOCUSLOST:
+                # key releases are not received while the window is out of focus
+                self._input_handler.release_all()
+            elif event.type in self._PAUSE_MENU_EVENT_TYPES:
+                # the resume button may change its hover/click state
+                self.governor.invalidate()
+            elif event.type in self._EXPOSE_EVENT_TYPES:
+                # only the changed areas are pushed to the display, the whole window has to be repainted
+                self._full_update_pending = True
+                self.governor.invalidate()
+            elif event.type == self._MUSIC_END_EVENT_TYPE:
+                # loop the main theme, unless it was stopped by the pause or already restarted when resuming
+                if not self.state.is_game_paused() and pyg.mixer.get_init() and pyg.mixer.music.get_pos() < 0:
+                    self._play_main_theme()
+
+
+    def _key_event_handler(self, event: pyg.event.Event) -> None:
+        """Processes a key press or release: diagnostics hotkeys, or game actions fed to the input handler.
+
+        @param event KEYDOWN or KEYUP event.
+        @returns None.
+
+        """
+
+        if event.type == pyg.KEYDOWN and self._diagnostics_key_handler(event.key):
+            return
+        if event.key not in self._key_names:
+            return
+        if event.type == pyg.KEYDOWN:
+            self._input_handler.press(self._key_names[event.key], self._sim_time_ms)
+        else:
+            self._input_handler.release(self._key_names[event.key], self._sim_time_ms)
+            if event.key == self._key_codes[par.PAUSE]:
                 self.state.pause_key_released = True
 
 
+    def _diagnostics_key_handler(self, key: int) -> bool:
+        """Handles the key presses of the diagnostics hotkeys (timings overlay, allocation tracking, profiler capture).
+
+        @param key Key code of the pressed key.
+        @returns Whether the key is a diagnostics hotkey.
+
+        """
+
+        if key == self._timings_overlay_key_code:
+            self._toggle_timings_overlay()
+        elif key == self._allocations_tracking_key_code:
+            self._toggle_allocations_tracking()
+        elif key == self._profiler_capture_key_code:
+            self.profiler.request(par.PROFILER_CAPTURE_ITERATIONS)
+        else:
+            return False
+        return True
+
+
+    def _toggle_timings_overlay(self) -> None:
+        """Shows or hides the frame timings overlay, enabling the instrumentation the first time it is shown.
+
+        @returns None.
+
+        """
+
+        self._timings_overlay_shown = not self._timings_overlay_shown
+        self.timings.enabled = True
+        self._timings_overlay_surface = None
+        self._full_update_pending = True
+        self.governor.invalidate()
+
+
+    def _toggle_allocations_tracking(self) -> None:
+        """Starts or stops tracking the allocations of each frame, showing the overlay when the tracking starts.
+
+        @returns None.
+
+        """
+
+        self.allocations.set_enabled(not self.allocations.enabled)
+        if self.allocations.enabled:
+            self._timings_overlay_shown = True
+            self._timings_overlay_surface = None
+            self._full_update_pending = True
+            self.governor.invalidate()
+
+
+    def dump_timings(self) -> None:
+        """Writes the frame timings and allocations statistics to JSON and CSV files (par.TIMINGS_DUMP_PATH and
+        par.ALLOCATIONS_DUMP_PATH), if any were recorded.
+
+        @returns None.
+
+        """
+
+        if self.timings.get_stats():
+            self.timings.dump(par.TIMINGS_DUMP_PATH + ".json", par.TIMINGS_DUMP_PATH + ".csv")
+        if self.allocations.get_stats():
+            self.allocations.dump(par.ALLOCATIONS_DUMP_PATH + ".json", par.ALLOCATIONS_DUMP_PATH + ".csv")
+
+
+    def stop_recording(self) -> None:
+        """Finishes the replay file of the game, if it is recorded.
+
+        @returns None.
+
+        """
+
+        self.engine.stop_recording()
+
+
     def _play_sfx_callback(self, event: str, data: any = None) -> None:
         """Callback triggered to play sound effects.
 
@@ -186,21 +444,35 @@ class GameInterface:
         """
 
         if event == "game_paused":
-            # Pause gravity
-            pyg.time.set_timer(self._gravity_tick_ev, 0)
-            # Pause music
-            pyg.mixer.music.pause()
+            # Stop the music and pause sound effects (gravity is paused as the engine is not stepped). The music is
+            # not paused: pygame holds the GIL in music.pause()/unpause() while waiting for the audio thread, which can
+            # be waiting for the GIL itself to notify that a sound effect finished, a deadlock. stop(), play() and the
+            # channel functions release the GIL, so the music is stopped and restarted where it was instead.
+            if pyg.mixer.get_init(): # the mixer is not initialized without audio device
+                music_pos_ms = pyg.mixer.music.get_pos() # time played since the last start, -1 if not playing
+                self._music_paused_at_s = self._music_start_s + music_pos_ms / 1000 if music_pos_ms >= 0 else None
+                pyg.mixer.music.stop()
+                pyg.mixer.pause()
+            self._pause_menu_shown = False
+            # wake up the paused loop when the mouse interacts with the resume button
+            pyg.event.set_allowed(self._PAUSE_MENU_EVENT_TYPES)
         elif event == "game_resumed":
-            # Resume gravity
-            pyg.time.set_timer(self._gravity_tick_ev, self._fall_time_interval_ms)
-            # Resume music
-            pyg.mixer.music.unpause()
+            # Resume music and sound effects
+            if pyg.mixer.get_init():
+                if self._music_paused_at_s is not None:
+                    self._play_main_theme(self._music_paused_at_s)
+                    self._music_paused_at_s = None
+                pyg.mixer.unpause()
+            pyg.event.set_blocked(self._PAUSE_MENU_EVENT_TYPES)
+            self._paused_frame = None
+            # the overlay covers the whole window
+            self._full_update_pending = True
         else:
             pass
 
 
-    def _level_up_callback(self, event: str, data: any = None) -> None: 
-        """Callback invoked when level-up occurs.
+    def _board_updated_callback(self, event: str, data: any = None) -> None:
+        """Callback invoked when tiles are locked or rows are deleted, flags the board layer for re-rendering.
 
         @param event Event name.
         @param data Optional data.
@@ -208,12 +480,19 @@ class GameInterface:
 
         """
 
-        if event == "level_up":
-            # speed up tile descent
-            self._fall_time_interval_ms -= par.FALL_TIME_INTERVAL_DELTA_ms
-            pyg.time.set_timer(self._gravity_tick_ev, self._fall_time_interval_ms)
-        else:
-            pass
+        self._board_layer_dirty = True
+
+
+    def _stats_updated_callback(self, event: str, data: any = None) -> None:
+        """Callback invoked when the score, lines or level change, flags the HUD text for re-rendering.
+
+        @param event Event name.
+        @param data Optional data.
+        @returns None.
+
+        """
+
+        self._hud_dirty = True
 
 
     def _play_sfx(self, sfx_type: str) -> None:
@@ -224,41 +503,37 @@ class GameInterface:
 
         """
 
-        if sfx_type == "rotation":
-            self._rotation_sfx.play()
-        elif sfx_type == "single":
-            self._single_sfx.play()
-        elif sfx_type == "double":
-            self._double_sfx.play()
-        elif sfx_type == "triple":
-            self._triple_sfx.play()
-        elif sfx_type == "tetris":
-            self._tetris_sfx.play()
-        elif sfx_type == "soft_drop":
-            pass  # TODO: add soft drop sfx
-        elif sfx_type == "hard_drop":
-            pass  # TODO: add hard drop sfx
-        else:
-            pass
+        # sound effects still loading (or without a sound, e.g. soft/hard drop) are skipped
+        sfx = self._assets.get_sound(sfx_type)
+        if sfx is not None:
+            sfx.play()
         
 
-    def _play_main_theme(self) -> None:
-        """ Plays the main theme in loop.
-        
+    def _play_main_theme(self, start_s: float = 0.0) -> None:
+        """ Plays the main theme, which is started again from the beginning when it ends (see _event_handler).
+
+        The track is played once per start rather than looped by the mixer, so that music.get_pos() gives the position
+        within the current pass of the track, from which the pause restarts it.
+
+        @param start_s Position in the track (s) to start from.
         @returns None.
         
         """
-        pyg.mixer.music.play(loops=-1, start=0.0, fade_ms=0)
+        pyg.mixer.music.set_endevent(self._MUSIC_END_EVENT_TYPE)
+        pyg.mixer.music.play(loops=0, start=start_s, fade_ms=0)
         pyg.mixer.music.set_volume(par.MUSIC_VOLUME)
+        self._music_start_s = start_s
 
 
-    def _draw_grid(self, nr_of_rows: int, nr_of_cols: int, TLC_coords: pyg.Vector2, color: tuple = par.DEFAULT_GRID_COLOR) -> None:
+    def _draw_grid(self, nr_of_rows: int, nr_of_cols: int, TLC_coords: pyg.Vector2, color: tuple = par.DEFAULT_GRID_COLOR,
+                   surface: pyg.Surface = None) -> None:
         """Draws a grid at the specified position with the specified dimensions.
 
         @param nr_of_rows Number of grid rows.
         @param nr_of_cols Number of grid columns.
         @param TLC_coords Top-left corner coordinates.
         @param color RGB color of grid lines.
+        @param surface Target surface (defaults to the game window).
         @returns None.
 
         """
@@ -268,7 +543,7 @@ class GameInterface:
             start_coords = (TLC_coords.x, TLC_coords.y + row_idx * par.GRID_ELEM_SIZE)
             end_coords = (TLC_coords.x + nr_of_cols * par.GRID_ELEM_SIZE, 
                         TLC_coords.y + row_idx * par.GRID_ELEM_SIZE)
-            pyg.draw.line(surface=self._game_window, color=color, 
+            pyg.draw.line(surface=surface or self._game_window, color=color, 
                         start_pos=start_coords, end_pos=end_coords,
                         width=par.GRID_THICKNESS)
         # draw vertical lines    
@@ -276,56 +551,123 @@ class GameInterface:
             start_coords = (TLC_coords.x + col_idx * par.GRID_ELEM_SIZE, TLC_coords.y)
             end_coords = (TLC_coords.x + col_idx * par.GRID_ELEM_SIZE, 
                          TLC_coords.y + par.GRID_ELEM_SIZE * nr_of_rows)
-            pyg.draw.line(surface=self._game_window, color=color, 
+            pyg.draw.line(surface=surface or self._game_window, color=color, 
                         start_pos=start_coords, end_pos=end_coords,
                         width=par.GRID_THICKNESS)
 
 
-    def _draw_block_with_borders(self, TLC_x: int, TLC_y: int, size: int, color: tuple, border_color: tuple) -> None:
-        """Draws a filled block with a border at the given TLC coordinates.
+    def _render_background_layer(self) -> None:
+        """Renders the static background layer: logo, grids and labels.
 
-        @param TLC_x X coordinate of the block top-left corner in pixels.
-        @param TLC_y Y coordinate of the block top-left corner in pixels.
-        @param size Size (width and height) of the block in pixels.
-        @param color Fill RGB color.
-        @param border_color Border RGB color.
         @returns None.
 
         """
 
-        block = pyg.Rect(TLC_x, TLC_y, size, size)
-        pyg.draw.rect(self._game_window, color, block)
-        top_left = (TLC_x, TLC_y) 
-        down_left = (top_left[0], top_left[1] + size)
-        down_right = (down_left[0] + size, down_left[1])
-        top_right = (down_right[0], down_right[1] - size)
-        pyg.draw.lines(surface=self._game_window, color=border_color, closed=True,
-                    points=[top_left, down_left, down_right, top_right],
-                    width=par.BLOCK_BORDER_THICKNESS)
+        self._background_layer.fill(par.BLACK)
+        self._background_layer.blit(self._logo, par.LOGO_POS)
+        self._background_layer.blit(self._next_piece_text_surface, par.NEXT_PIECE_TEXT_POS)
+        self._background_layer.blit(self._pause_info_text_surface, par.PAUSE_INFO_TEXT_POS)
+        # draw next piece preview grid
+        self._draw_grid(par.TILE_CONFIG_IDX_MAX, par.TILE_CONFIG_IDX_MAX, pyg.Vector2(par.NEXT_PIECE_GRID_POS), par.GREY,
+                        self._background_layer)
+        # draw board grid
+        self._draw_grid(par.GRID_NR_OF_ROWS, par.GRID_NR_OF_COLS, pyg.Vector2(par.GRID_TLC_x, par.GRID_TLC_y), par.GREY,
+                        self._background_layer)
 
 
-    def _draw_board(self) -> None:
-        """Draw the current board from the occupancy matrix.
+    def _render_board_layer(self) -> None:
+        """Renders the board layer: the background below the playfield plus the locked blocks.
 
         @returns None.
 
         """
 
+        self._board_layer.blit(self._background_layer, (0, 0), self._board_layer_rect)
+        origin_x = par.GRID_TLC_x - self._board_layer_rect.x + self._block_atlas.get_offset()
+        origin_y = par.GRID_TLC_y - self._board_layer_rect.y + self._block_atlas.get_offset()
+        blit_sequence = []
         for row in range (0, par.GRID_NR_OF_ROWS):
             for col in range (0, par.GRID_NR_OF_COLS):
-                if self.state.get_BOM_element(row, col) != None:
-                    self._draw_block_with_borders(par.GRID_TLC_x + col * par.GRID_ELEM_SIZE,
-                                                 par.GRID_TLC_y + row * par.GRID_ELEM_SIZE,
-                                                 par.GRID_ELEM_SIZE,
-                                                 self.state.get_BOM_element(row, col),
-                                                 par.WHITE)
+                color = self.state.get_BOM_element(row, col)
+                if color != None:
+                    blit_sequence.append((self._block_atlas.get(color),
+                                          (origin_x + col * par.GRID_ELEM_SIZE, origin_y + row * par.GRID_ELEM_SIZE)))
+        self._board_layer.blits(blit_sequence, doreturn=False)
+        self._board_layer_dirty = False
+
 
+    def _render_hud(self) -> None:
+        """Re-renders the text of the statistics whose value changed since they were last rendered.
+
+        @returns None.
+
+        """
+
+        for element, text, pos in (("score", f'Score:  {self.state.get_score()}', par.STATS_POS),
+                                   ("level", f'Level:   {self.state.get_level()}', self._level_text_pos),
+                                   ("lines", f'Lines:   {self.state.get_lines()}', self._lines_text_pos)):
+            cached = self._hud_surfaces.get(element)
+            if cached is None or cached[0] != text:
+                text_surface, _ = self._text_font_1.render(text, par.WHITE)
+                self._hud_surfaces[element] = (text, text_surface, text_surface.get_rect(topleft=pos))
+        self._hud_dirty = False
+
+
+    def _get_tile_rect(self, tile_type: str, cfg_idx: int, pos_x: int, pos_y: int) -> pyg.Rect:
+        """Computes the screen area covered by a tile, including its block borders.
+
+        @param tile_type Tile type.
+        @param cfg_idx Configuration (rotation) index of the tile.
+        @param pos_x Top-left corner x-position in pixels.
+        @param pos_y Top-left corner y-position in pixels.
+        @returns The covered screen rect.
+
+        """
+
+        row, col, nr_of_rows, nr_of_cols = geo.TILE_BOUNDING_BOXES[tile_type][cfg_idx]
+        margin = max(par.BLOCK_BORDER_THICKNESS, par.DROPPED_BLOCK_PREVIEW_BORDER)
+        return pyg.Rect(pos_x + par.GRID_ELEM_SIZE * col - margin, pos_y + par.GRID_ELEM_SIZE * row - margin,
+                        par.GRID_ELEM_SIZE * nr_of_cols + 2 * margin, par.GRID_ELEM_SIZE * nr_of_rows + 2 * margin)
+
+
+    def _is_drawn(self, element: str, content_key: any) -> bool:
+        """
 
-    def _draw_tile(self, tile_type: str, cfg_mat: list, pos_x: int, pos_y: int, border_color: tuple = par.WHITE) -> None:
+        @param element Name of the dynamic element.
+        @param content_key Hashable description of the element's content.
+        @returns Whether the element was drawn with the same content in the previous frame, i.e. its area is not dirty.
+
+        """
+
+        drawn = self._drawn_elements.get(element)
+        return drawn is not None and drawn[0] == content_key
+
+
+    def _mark_dirty(self, element: str, content_key: any, rect: pyg.Rect) -> None:
+        """Flags the area of a dynamic element as dirty if it changed since the previous frame.
+
+        @param element Name of the dynamic element.
+        @param content_key Hashable description of the element's content (e.g. type, rotation, position, value).
+        @param rect Screen rect covered by the element in this frame.
+        @returns None.
+
+        """
+
+        drawn = self._drawn_elements.get(element)
+        if drawn is None:
+            self._dirty_rects.append(rect)
+        elif drawn[0] != content_key:
+            self._dirty_rects.append(rect.union(drawn[1]))
+        else:
+            return
+        self._drawn_elements[element] = (content_key, rect)
+
+
+    def _draw_tile(self, tile_type: str, cfg_idx: int, pos_x: int, pos_y: int, border_color: tuple = par.WHITE) -> None:
         """Draws a tile of the given type and configuration at the specified position.
 
         @param tile_type Tile type.
-        @param cfg_mat Configuration matrix of the tile.
+        @param cfg_idx Configuration (rotation) index of the tile.
         @param pos_x Top-left corner x-position in pixels.
         @param pos_y Top-left corner y-position in pixels.
         @param border_color RGB border color.
@@ -333,123 +675,186 @@ class GameInterface:
 
         """
 
-        # draw tile with its border
-        for col in range (0, par.TILE_CONFIG_IDX_MAX):
-            for row in range (0, par.TILE_CONFIG_IDX_MAX):
-                if cfg_mat[row][col] == 1:
-                    self._draw_block_with_borders(pos_x + par.GRID_ELEM_SIZE * col,
-                                                pos_y + par.GRID_ELEM_SIZE * row,
-                                                par.GRID_ELEM_SIZE,
-                                                par.TILE_COLORS[tile_type],
-                                                border_color)
+        # draw tile with its border (pre-composited sprite, a single blit)
+        offset = self._block_atlas.get_offset()
+        self._game_window.blit(self._block_atlas.get_tile(tile_type, cfg_idx, border_color), (pos_x + offset, pos_y + offset))
 
 
-    def _draw_dropped_tile_preview(self, color: tuple = par.WHITE) -> None:
+    def _draw_dropped_tile_preview(self, color: tuple = par.WHITE) -> int:
         """Draws the outline of where the current tile would land if dropped immediately.
 
         @param color RGB color used for the outline.
-        @returns None.
+        @returns The drop distance at which the outline was drawn.
 
         """
 
         drop_distance = self._tile.compute_smallest_drop_distance(self.state)
-        # draw tile outer border at drop distance
-        for row in range (0, par.TILE_CONFIG_IDX_MAX):
-            for col in range (0, par.TILE_CONFIG_IDX_MAX):
-                if self._tile._configuration_matrix[row][col] == 1:                  
-                    if row == 0 or self._tile._configuration_matrix[row - 1][col] == 0: # lazy OR eval allows to avoid idx overflow (same below)
-                        pyg.draw.line(self._game_window, 
-                                        color, 
-                                        pyg.Vector2(self._tile.position.x + par.GRID_ELEM_SIZE * col, 
-                                                    self._tile.position.y + par.GRID_ELEM_SIZE * (row + drop_distance)),
-                                        pyg.Vector2(self._tile.position.x + par.GRID_ELEM_SIZE * (col + 1), 
-                                                    self._tile.position.y + par.GRID_ELEM_SIZE * (row + drop_distance)),
-                                        par.DROPPED_BLOCK_PREVIEW_BORDER)
-                    if col == 0 or self._tile._configuration_matrix[row][col - 1] == 0:
-                        pyg.draw.line(self._game_window, 
-                                        color, 
-                                        pyg.Vector2(self._tile.position.x + par.GRID_ELEM_SIZE * col, 
-                                                    self._tile.position.y + par.GRID_ELEM_SIZE * (row + drop_distance)),
-                                        pyg.Vector2(self._tile.position.x + par.GRID_ELEM_SIZE * col, 
-                                                    self._tile.position.y + par.GRID_ELEM_SIZE * (row + 1 + drop_distance)),
-                                        par.DROPPED_BLOCK_PREVIEW_BORDER)                            
-                    if row == par.TILE_CONFIG_IDX_MAX - 1 or self._tile._configuration_matrix[row + 1][col] == 0:
-                        pyg.draw.line(self._game_window, 
-                                        color, 
-                                        pyg.Vector2(self._tile.position.x + par.GRID_ELEM_SIZE * col, 
-                                                    self._tile.position.y + par.GRID_ELEM_SIZE * (row + 1 + drop_distance)),
-                                        pyg.Vector2(self._tile.position.x + par.GRID_ELEM_SIZE * (col + 1), 
-                                                    self._tile.position.y + par.GRID_ELEM_SIZE * (row + 1 + drop_distance)),
-                                        par.DROPPED_BLOCK_PREVIEW_BORDER)  
-                    if col == par.TILE_CONFIG_IDX_MAX - 1 or self._tile._configuration_matrix[row][col + 1] == 0:
-                        pyg.draw.line(self._game_window, 
-                                        color, 
-                                        pyg.Vector2(self._tile.position.x + par.GRID_ELEM_SIZE * (col + 1), 
-                                                    self._tile.position.y + par.GRID_ELEM_SIZE * (row + drop_distance)),
-                                        pyg.Vector2(self._tile.position.x + par.GRID_ELEM_SIZE * (col + 1), 
-                                                    self._tile.position.y + par.GRID_ELEM_SIZE * (row + 1 + drop_distance)),
-                                        par.DROPPED_BLOCK_PREVIEW_BORDER)
+        # draw tile outer border at drop distance (pre-rendered outline sprite)
+        outline = self._block_atlas.get_outline(self._tile.get_current_type(), self._tile.get_cfg_idx(), color,
+                                                par.DROPPED_BLOCK_PREVIEW_BORDER)
+        self._game_window.blit(outline, (par.GRID_TLC_x + par.GRID_ELEM_SIZE * self._tile.col
+                                         - par.DROPPED_BLOCK_PREVIEW_BORDER,
+                                         par.GRID_TLC_y + par.GRID_ELEM_SIZE * (self._tile.row + drop_distance)
+                                         - par.DROPPED_BLOCK_PREVIEW_BORDER))
+        return drop_distance
 
 
     def _draw_pause_menu(self) -> None:
-        """Draws the pause menu.
+        """Draws the pause menu. The overlay is composited over the game scene once per pause, afterwards only the
+        resume button is redrawn, and only when its hover/click state changes.
 
         @returns None.
         
         """
 
-        # Draw transparent grey overlay
-        pyg.draw.rect(self._transparent_overlay, par.TRANSPARENT_GREY, (pyg.Vector2(0,0), pyg.Vector2(par.GAME_WINDOW_WIDTH, par.GAME_WINDOW_HEIGHT)))
-        self._game_window.blit(self._transparent_overlay, par.PAUSE_MENU_TRANSPARENT_OVERLAY_POS)
-        self._resume_button.draw(self._game_window)
-        pyg.display.update()
+        if not self._pause_menu_shown:
+            # Draw transparent grey overlay
+            self._game_window.blit(self._transparent_overlay, par.PAUSE_MENU_TRANSPARENT_OVERLAY_POS)
+            self._paused_frame = self._game_window.copy()
+            self._resume_button.draw(self._game_window)
+            self._resume_button_state = self._resume_button.get_state()
+            pyg.display.update() # the overlay covers the whole window
+            self._pause_menu_shown = True
+        elif self._resume_button.get_state() != self._resume_button_state:
+            button_rect = self._resume_button.get_rect()
+            self._game_window.blit(self._paused_frame, button_rect, button_rect)
+            self._resume_button.draw(self._game_window)
+            self._resume_button_state = self._resume_button.get_state()
+            pyg.display.update(button_rect)
+        if self._full_update_pending:
+            pyg.display.update() # the window was exposed again while paused
+            self._full_update_pending = False
+
+
+    def _draw_timings_overlay(self) -> None:
+        """Draws the frame timings overlay (p50/p95/p99/max per phase, followed by the frame allocations while they are
+        tracked), re-rendering it every par.TIMINGS_OVERLAY_REFRESH_FRAMES frames.
+
+        @returns None.
+
+        """
+
+        self._timings_overlay_age += 1
+        if self._timings_overlay_surface is None or self._timings_overlay_age >= par.TIMINGS_OVERLAY_REFRESH_FRAMES:
+            self._timings_overlay_age = 0
+            timing_stats = self.timings.get_stats()
+            allocation_stats = self.allocations.get_stats()
+            rows = []
+            if timing_stats or not allocation_stats:
+                rows.append(("phase [ms]", "p50", "p95", "p99", "max"))
+                rows += [(phase, *(f"{phase_stats[key]:.2f}" for key in ("p50", "p95", "p99", "max")))
+                         for phase, phase_stats in timing_stats.items()]
+            if allocation_stats:
+                rows.append(("allocations [B]", "p50", "p95", "p99", "max"))
+                rows += [(phase, *(f"{phase_stats[key]:.0f}" for key in ("p50", "p95", "p99", "max")))
+                         for phase, phase_stats in allocation_stats.items()]
+            line_height = self._timings_overlay_font.get_sized_height() + 2
+            column_xs = (4, 170, 220, 270, 320)
+            self._timings_overlay_surface = pyg.Surface((column_xs[-1] + 50, line_height * len(rows) + 4), pyg.SRCALPHA)
+            self._timings_overlay_surface.fill((0, 0, 0, 180))
+            for row_idx, row in enumerate(rows):
+                for x, text in zip(column_xs, row):
+                    self._timings_overlay_font.render_to(self._timings_overlay_surface, (x, 2 + line_height * row_idx),
+                                                         text, par.WHITE)
+            self._timings_overlay_rect = self._timings_overlay_surface.get_rect(topleft=par.TIMINGS_OVERLAY_POS)
+        self._game_window.blit(self._timings_overlay_surface, self._timings_overlay_rect)
 
 
     def draw_frame(self) -> None:
-        """ Draws the current frame.
+        """ Draws the current frame and pushes the areas that changed to the display.
 
         @returns None.
         
         """
 
-        # TODO: only draw tile and board each time not the entire thing
-        # color background such that older tile positions do not appear
-        self._game_window.fill(par.BLACK)
-        self._game_window.blit(self._logo, par.LOGO_POS)
+        timings = self.timings
+        if self.state.is_game_paused() and self._pause_menu_shown:
+            # the paused frame is already on screen, only the resume button can change
+            timings.start("draw_pause_menu")
+            self._draw_pause_menu()
+            timings.stop("draw_pause_menu")
+            return
+
+        self._dirty_rects.clear()
+
+        # static background and locked board layers
+        timings.start("draw_layers")
+        self._game_window.blit(self._background_layer, (0, 0))
+        if self._board_layer_dirty:
+            self._render_board_layer()
+            self._dirty_rects.append(self._board_layer_rect)
+        self._game_window.blit(self._board_layer, self._board_layer_rect)
+        timings.stop("draw_layers")
+
+        # dynamic layer
+        timings.start("draw_hud")
+        if self._hud_dirty:
+            self._render_hud()
+        for element, (text, text_surface, rect) in self._hud_surfaces.items():
+            self._game_window.blit(text_surface, rect)
+            self._mark_dirty(element, text, rect)
+        timings.stop("draw_hud")
+
+        timings.start("draw_tile")
+        tile_type = self._tile.get_current_type()
+        cfg_idx = self._tile.get_cfg_idx()
+        # the tile lives in board space, its pixel position is only computed here
+        pos_x = par.GRID_TLC_x + par.GRID_ELEM_SIZE * self._tile.col
+        pos_y = par.GRID_TLC_y + par.GRID_ELEM_SIZE * self._tile.row
+        self._draw_tile(tile_type, cfg_idx, pos_x, pos_y)
+        # the screen rects are only computed when an element changed, so that an unchanged frame allocates nothing
+        content_key = (tile_type, cfg_idx, pos_x, pos_y)
+        if not self._is_drawn("tile", content_key):
+            self._mark_dirty("tile", content_key, self._get_tile_rect(tile_type, cfg_idx, pos_x, pos_y))
+        timings.stop("draw_tile")
+        # draw next tile preview
+        timings.start("draw_next_tile")
+        next_type = self._tile.get_next_type()
+        self._draw_tile(next_type,
+                       0,
+                       par.NEXT_PIECE_GRID_POS[0],
+                       par.NEXT_PIECE_GRID_POS[1])
+        if not self._is_drawn("next_tile", next_type):
+            self._mark_dirty("next_tile", next_type,
+                             self._get_tile_rect(next_type, 0, par.NEXT_PIECE_GRID_POS[0], par.NEXT_PIECE_GRID_POS[1]))
+        timings.stop("draw_next_tile")
+        timings.start("draw_drop_preview")
+        drop_distance = self._draw_dropped_tile_preview()
+        preview_pos_y = pos_y + par.GRID_ELEM_SIZE * drop_distance
+        content_key = (tile_type, cfg_idx, pos_x, preview_pos_y)
+        if not self._is_drawn("drop_preview", content_key):
+            self._mark_dirty("drop_preview", content_key, self._get_tile_rect(tile_type, cfg_idx, pos_x, preview_pos_y))
+        timings.stop("draw_drop_preview")
+
+        if self._timings_overlay_shown:
+            self._draw_timings_overlay()
+            self._dirty_rects.append(self._timings_overlay_rect)
+            self.governor.invalidate() # the statistics change every frame
 
-        score_text_surface, _ = self._text_font_1.render(f'Score:  {self.state.get_score()}', par.WHITE)
-        level_text_surface, _ = self._text_font_1.render(f'Level:   {self.state.get_level()}', par.WHITE)
-        lines_text_surface, _ = self._text_font_1.render(f'Lines:   {self.state.get_lines()}', par.WHITE)
+        if self.state.is_game_paused():
+            timings.start("draw_pause_menu")
+            self._draw_pause_menu()
+            timings.stop("draw_pause_menu")
+        else:
+            timings.start("display_update")
+            self._update_display()
+            timings.stop("display_update")
 
 
-        self._game_window.blit(score_text_surface, par.STATS_POS)
-        self._game_window.blit(level_text_surface, self._level_text_pos)
-        self._game_window.blit(lines_text_surface, self._lines_text_pos)
-        self._game_window.blit(self._next_piece_text_surface, par.NEXT_PIECE_TEXT_POS)
+    def _update_display(self) -> None:
+        """Pushes the drawn frame to the display.
 
-        self._game_window.blit(self._pause_info_text_surface, par.PAUSE_INFO_TEXT_POS)
-        
-        # draw next piece preview grid
-        self._draw_grid(par.TILE_CONFIG_IDX_MAX, par.TILE_CONFIG_IDX_MAX, par.NEXT_PIECE_GRID_POS, par.GREY)
-        # draw board grid
-        self._draw_grid(par.GRID_NR_OF_ROWS, par.GRID_NR_OF_COLS, pyg.Vector2(par.GRID_TLC_x, par.GRID_TLC_y), par.GREY)
-        self._draw_board()
-        self._draw_tile(self._tile.get_current_type(), 
-                       self._tile._configuration_matrix,
-                       self._tile.position.x,
-                       self._tile.position.y)
-        # draw next tile preview
-        self._draw_tile(self._tile.get_next_type(),
-                       par.TILE_SHAPES[self._tile.get_next_type()][0],
-                       par.NEXT_PIECE_GRID_POS.x,
-                       par.NEXT_PIECE_GRID_POS.y)
-        self._draw_dropped_tile_preview()
+        @returns None.
+
+        """
 
-        if self.state.is_game_paused():
-            self._draw_pause_menu()
         '''
         After calling the drawing functions to make the display Surface object look the way you want
         you must call update() to make the display Surface actually appear on the user’s monitor.
+        Only the areas that changed are pushed, unless the whole window is stale.
         '''
-        if not self.state.is_game_paused():
-            pyg.display.update()
\ No newline at end of file
+        if self._full_update_pending:
+            pyg.display.update()
+            self._full_update_pending = False
+        elif self._dirty_rects:
+            pyg.display.update(self._dirty_rects)
@@ -1,12 +1,26 @@
-import pygame as pyg
-
 ## Application version.
 APP_VERSION = "1.0.1"
 
 # Miscellaneous
 
-## Target frames per second used by the main loop / clock tick.
+## Target frames per second used by the main loop / clock tick (rendering rate).
 TARGET_FPS = 60
+## Rate (Hz) of the fixed-timestep game logic updates, independent of the rendering rate.
+LOGIC_TICK_RATE_Hz = 240
+## Duration (ms) of simulated time advanced by one logic update.
+LOGIC_TIME_STEP_ms = 1000 / LOGIC_TICK_RATE_Hz
+## Maximum real time (ms) simulated after a single frame, so that a long stall does not trigger a burst of updates.
+MAX_FRAME_TIME_ms = 250
+## Frame pacing mode: "tick" (sleeps until the next frame, lowest CPU usage), "tick_busy_loop" (busy-waits, more
+## accurate frame times at the cost of a CPU core) or "vsync" (frames are presented at the display refresh, falls back to
+## "tick" if vsync is not available).
+FRAME_PACING = "tick"
+## Whether frames in which nothing on screen changed are skipped (not rendered nor pushed to the display).
+SKIP_UNCHANGED_FRAMES = True
+## Delayed auto shift: how long (ms) a lateral movement key is held before the movement starts repeating.
+DAS_ms = 170
+## Auto repeat rate: interval (ms) between repeated lateral movements once DAS has elapsed.
+ARR_ms = 50
 ## Initial interval (ms) between automatic tile falls (gravity).
 INITIAL_FALL_TIME_INTERVAL_ms = 500
 ## Timeout (ms) used to confirm down contact before locking a tile.
@@ -27,8 +41,19 @@ FONT_SIZE_2 = 22
 MUSIC_VOLUME = 0.5
 ## Number of upcoming tiles queued ahead of the current tile.
 TILE_QUEUE_SIZE = 5
+## Randomizer drawing the tile types: "uniform" (independent draws), "bag" (shuffled bags of the 7 types) or "history"
+## (draws rerolled when the type was among the last ones).
+RANDOMIZER = "uniform"
+## Number of tile types drawn ahead and held by the ring buffer of the piece queue (refilled in bulk when it runs low).
+PIECE_QUEUE_BUFFER_SIZE = 64
+## Starting history of the "history" randomizer (its length is the number of types remembered).
+HISTORY_RANDOMIZER_START = ("S", "Z", "S", "Z")
+## Maximum number of draws per tile of the "history" randomizer.
+HISTORY_RANDOMIZER_ROLLS = 6
 ## Milliseconds of cooldown between pause/resume toggles.
 PAUSE_COOLDOWN_ms = 300
+## Maximum time (ms) the paused game sleeps waiting for an input event before checking its state again.
+PAUSED_EVENT_WAIT_TIMEOUT_ms = 1000
 ## Maximum playable level.
 MAX_LEVEL = 10
 ## Number of lines required per level increment.
@@ -67,14 +92,14 @@ LOGO_SCALE_FACTOR = 1.5
 STATS_POS = (660, 375)
 ## Vertical spacing (px) between statistics text lines.
 STATS_VERTICAL_SPACING = 10
-## Position for the "Next" piece label text (pygame Vector2).
-NEXT_PIECE_TEXT_POS = pyg.Vector2(480, 330)
-## Top-left position for the small next-piece 4x4 preview grid (pygame Vector2).
-NEXT_PIECE_GRID_POS = pyg.Vector2(450, 360)
+## Position for the "Next" piece label text.
+NEXT_PIECE_TEXT_POS = (480, 330)
+## Top-left position for the small next-piece 4x4 preview grid.
+NEXT_PIECE_GRID_POS = (450, 360)
 ## Position at which to blit the semi-transparent pause overlay.
 PAUSE_MENU_TRANSPARENT_OVERLAY_POS = (0, 0)
-## Position for pause information text (pygame Vector2).
-PAUSE_INFO_TEXT_POS = pyg.Vector2(450, 600)
+## Position for pause information text.
+PAUSE_INFO_TEXT_POS = (450, 600)
 
 ## Red color (RGB).
 RED = (255, 0, 0)
@@ -109,6 +134,9 @@ GRID_ELEM_SIZE = 30
 GRID_NR_OF_COLS = 10
 ## Number of rows in the main playfield grid.
 GRID_NR_OF_ROWS = 20
+## Board row of the configuration matrix top-left corner of a spawned tile (above the board, so that the first row of
+## the matrix, empty in the spawn configurations, is hidden). Rotations may use this row but not the rows above it.
+TILE_SPAWN_ROW = -1
 ## X coordinate (px) of the top-left corner of the playfield grid.
 GRID_TLC_x = 50
 ## Y coordinate (px) of the top-left corner of the playfield grid.
@@ -129,6 +157,9 @@ TILE_COLORS = {"I": CYAN,
 
 ## Maximum number of rotation configurations per tile (standard 4).
 TILE_CONFIG_IDX_MAX = 4
+## Wall kick rule used when rotating ("classic": in place, then one cell right, then one cell left, no kicks for the
+## I tile; "srs": Super Rotation System kick tables, shifted so that the tiles rotate about the SRS centers).
+ROTATION_SYSTEM = "classic"
 ## Shape configurations for each tetromino type. Each value is a list of 4 matrices (4x4) representing the rotation states.
 TILE_SHAPES = {"I": [[[0, 0, 0, 0],
                      [1, 1, 1, 1],
@@ -278,17 +309,62 @@ TILE_SHAPES = {"I": [[[0, 0, 0, 0],
                      ],                                                      
                }
 
-# Hotkeys
+# Hotkeys (pygame key names, resolved to key codes by the interface, so that this module does not depend on pygame)
 
 ## Key mapping for move left.
-LEFT = pyg.K_LEFT
+LEFT = "left"
 ## Key mapping for move right.
-RIGHT = pyg.K_RIGHT
+RIGHT = "right"
 ## Key mapping for soft drop.
-DOWN = pyg.K_DOWN
+DOWN = "down"
 ## Key mapping for rotate action.
-ROTATE = pyg.K_UP
+ROTATE = "up"
 ## Key mapping for hard drop.
-HARD_DROP = pyg.K_SPACE
+HARD_DROP = "space"
 ## Key mapping for pause/resume.
-PAUSE = pyg.K_ESCAPE
\ No newline at end of file
+PAUSE = "escape"
+## Key mapping for showing/hiding the frame timings overlay (also enables the instrumentation).
+TIMINGS_OVERLAY = "f3"
+## Key mapping for starting/stopping the per-frame allocation tracking (shown in the frame timings overlay).
+ALLOCATIONS_TRACKING = "f4"
+## Key mapping for starting a profiler capture of the next PROFILER_CAPTURE_ITERATIONS main loop iterations.
+PROFILER_CAPTURE = "f9"
+
+# Instrumentation
+
+## Whether frame phase timings are recorded from startup (also enabled by the TETRIS_INSTRUMENTATION=1 environment
+## variable, or on demand with the TIMINGS_OVERLAY key).
+INSTRUMENTATION_ENABLED = False
+## Number of samples kept per timed phase.
+TIMINGS_RING_BUFFER_SIZE = 1024
+## On-screen position of the frame timings overlay.
+TIMINGS_OVERLAY_POS = (520, 10)
+## Font size of the frame timings overlay.
+TIMINGS_OVERLAY_FONT_SIZE = 13
+## Number of frames between two refreshes of the frame timings overlay.
+TIMINGS_OVERLAY_REFRESH_FRAMES = 30
+## Path (without extension) of the JSON and CSV files the frame timings are dumped to on exit.
+TIMINGS_DUMP_PATH = "frame_timings"
+## Whether the memory allocated by each frame is tracked with tracemalloc from startup (also enabled by the
+## TETRIS_ALLOCATIONS=1 environment variable, or on demand with the ALLOCATIONS_TRACKING key). Slows down the game.
+ALLOCATIONS_TRACKING_ENABLED = False
+## Path (without extension) of the JSON and CSV files the frame allocations are dumped to on exit.
+ALLOCATIONS_DUMP_PATH = "frame_allocations"
+## Number of main loop iterations profiled per capture (the TETRIS_PROFILE_ITERATIONS environment variable requests a
+## capture of that many iterations at startup, e.g. for headless runs).
+PROFILER_CAPTURE_ITERATIONS = 600
+## Folder the profiler captures (.pstats and collapsed stacks) are written to.
+PROFILER_OUTPUT_PATH = "profiles"
+## Maximum depth of the collapsed stacks written by the profiler captures.
+PROFILER_MAX_STACK_DEPTH = 64
+
+# Replays
+
+## Whether games are recorded as replays (also enabled by the TETRIS_RECORD=1 environment variable).
+REPLAY_RECORDING_ENABLED = False
+## Folder the replays are written to.
+REPLAY_OUTPUT_PATH = "replays"
+## Extension of the replay files.
+REPLAY_FILE_EXTENSION = ".trpl"
+## Number of encoded bytes buffered by the replay recorder before they are handed to its writer thread.
+REPLAY_CHUNK_SIZE = 512
@@ -0,0 +1,162 @@
+import cProfile
+import os
+import pstats
+import time
+import parameters as par
+
+
+class ProfilerCapture:
+    """Profiles a window of main loop iterations on demand.
+
+    A capture is requested for the next N iterations (e.g. by a hotkey while playing), then cProfile runs between the
+    begin_iteration() and end_iteration() calls of those iterations only, so that hitches which show up after a long
+    session can be captured without running the whole session under the profiler. Each capture is written as a .pstats
+    file (for pstats, snakeviz, etc.) and as a collapsed-stack text file for flame graph tools (flamegraph.pl,
+    speedscope, ...).
+
+    """
+
+
+    def __init__(self, output_path: str = par.PROFILER_OUTPUT_PATH) -> None:
+        """Initializes the capture with no request pending.
+
+        @param output_path Folder the captures are written to.
+        @returns None.
+
+        """
+
+        ## Folder the captures are written to.
+        self._output_path = output_path
+        ## Profiler of the running capture, None when not capturing.
+        self._profiler = None
+        ## Number of iterations still to capture (requested ones while idle).
+        self._remaining_iterations = 0
+
+
+    def request(self, nr_of_iterations: int) -> None:
+        """Requests a capture of the next iterations. Ignored if a capture is already running.
+
+        @param nr_of_iterations Number of main loop iterations to capture.
+        @returns None.
+
+        """
+
+        if self._profiler is None and nr_of_iterations > 0:
+            self._remaining_iterations = nr_of_iterations
+
+
+    def is_capturing(self) -> bool:
+        """
+
+        @returns Whether a capture is running.
+
+        """
+
+        return self._profiler is not None
+
+
+    def begin_iteration(self) -> None:
+        """Starts the profiler if a capture was requested and is not running yet.
+
+        @returns None.
+
+        """
+
+        if self._remaining_iterations > 0 and self._profiler is None:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+
+    def end_iteration(self) -> None:
+        """Counts a captured iteration and writes the capture after the last one.
+
+        @returns None.
+
+        """
+
+        if self._profiler is None:
+            return
+        self._remaining_iterations -= 1
+        if self._remaining_iterations <= 0:
+            self.stop()
+
+
+    def stop(self) -> list:
+        """Stops the running capture (if any) and writes its files.
+
+        @returns The paths of the written files (empty if no capture was running).
+
+        """
+
+        if self._profiler is None:
+            return []
+        self._profiler.disable()
+        profiler, self._profiler = self._profiler, None
+        self._remaining_iterations = 0
+
+        os.makedirs(self._output_path, exist_ok=True)
+        base_path = os.path.join(self._output_path, time.strftime("profile-%Y%m%d-%H%M%S"))
+        pstats_path = base_path + ".pstats"
+        collapsed_path = base_path + ".collapsed.txt"
+        profiler.dump_stats(pstats_path)
+        with open(collapsed_path, "w") as collapsed_file:
+            for stack, time_us in collapse_stacks(pstats.Stats(profiler)).items():
+                collapsed_file.write(f"{stack} {time_us}\n")
+        return [pstats_path, collapsed_path]
+
+
+def _get_frame_name(function: tuple) -> str:
+    """
+
+    @param function pstats function key (file name, line number, function name).
+    @returns The flame graph frame name of the function.
+
+    """
+
+    file_name, line_number, function_name = function
+    if file_name == "~":
+        return function_name # built-in function, e.g. <method 'blit' of 'pygame.surface.Surface' objects>
+    return f"{function_name} ({os.path.basename(file_name)}:{line_number})".replace(";", ",")
+
+
+def collapse_stacks(stats: pstats.Stats, max_depth: int = par.PROFILER_MAX_STACK_DEPTH) -> dict:
+    """Converts profiling statistics to collapsed stacks.
+
+    cProfile only records caller/callee pairs, not full stacks, so stacks are rebuilt by walking the call graph from
+    the root functions: the time of a function is split among its callers in proportion to the cumulative time spent
+    through each caller, then its own time is attributed to the stack and the rest is propagated to its callees.
+    Recursive calls are not followed.
+
+    @param stats Profiling statistics.
+    @param max_depth Maximum stack depth (deeper calls are attributed to their ancestor at this depth).
+    @returns A dict mapping "root;...;function" stacks to their own time in microseconds.
+
+    """
+
+    callees = {}
+    for function, (_, _, _, _, callers) in stats.stats.items():
+        for caller, (_, _, _, caller_cumulative_time) in callers.items():
+            callees.setdefault(caller, []).append((function, caller_cumulative_time))
+
+    stacks = {}
+
+    def walk(function: tuple, fraction: float, stack: list) -> None:
+        _, _, own_time, cumulative_time, _ = stats.stats[function]
+        stack.append(_get_frame_name(function))
+        key = ";".join(stack)
+        children = [(callee, edge_time) for callee, edge_time in callees.get(function, ())
+                    if _get_frame_name(callee) not in stack]
+        if len(stack) >= max_depth:
+            stacks[key] = stacks.get(key, 0) + fraction * cumulative_time
+        else:
+            stacks[key] = stacks.get(key, 0) + fraction * own_time
+            for callee, edge_time in children:
+                callee_cumulative_time = stats.stats[callee][3]
+                if callee_cumulative_time > 0:
+                    walk(callee, fraction * edge_time / callee_cumulative_time, stack)
+        stack.pop()
+
+    for function, (_, _, _, _, callers) in stats.stats.items():
+        if not callers:
+            walk(function, 1.0, [])
+    return {stack: round(time_s * 1e6) for stack, time_s in stacks.items() if round(time_s * 1e6) > 0}
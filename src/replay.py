@@ -0,0 +1,330 @@
+import os
+import queue
+import struct
+import threading
+import zlib
+import parameters as par
+
+# Replay file layout (little endian): a header with the magic bytes, the format version, the seed of the tile sequence,
+# the logic time step in milliseconds and the randomizer name (length-prefixed), followed by the zlib stream of the
+# input records (flushed after every chunk, so that an interrupted recording can be read up to its last chunk). Only
+# the logic steps at which the set of pressed actions changes are recorded: each record is the number of steps since
+# the previous record (unsigned LEB128 varint) and the bitmask of the actions pressed from that step on (see _ACTIONS).
+# The last record has the _END_FLAG bit set instead of actions: its step count is the total number of steps, and it is
+# followed by the final score and lines (varints), which playback compares against to check the game was reproduced.
+
+## Magic bytes at the start of a replay file.
+MAGIC = b"TRPL"
+## Version of the replay file format.
+VERSION = 1
+## Header layout: magic, version, seed, logic time step (ms), randomizer name length (the name follows).
+_HEADER = struct.Struct("<4sBQdB")
+## Actions recorded in the input bitmasks, bit i standing for _ACTIONS[i] (the pause key does not reach the engine).
+_ACTIONS = (par.LEFT, par.RIGHT, par.DOWN, par.ROTATE, par.HARD_DROP)
+## Bitmask flag of the end record.
+_END_FLAG = 0x80
+## Set of actions of each input bitmask.
+_MASK_INPUTS = tuple(frozenset(action for bit, action in enumerate(_ACTIONS) if mask & (1 << bit))
+                     for mask in range(1 << len(_ACTIONS)))
+
+
+def _encode_varint(value: int) -> bytes:
+    """
+
+    @param value Non-negative integer.
+    @returns The unsigned LEB128 encoding of the value (7 bits per byte, least significant first).
+
+    """
+
+    encoded = bytearray()
+    while value >= 0x80:
+        encoded.append((value & 0x7F) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
+
+
+def _decode_varint(data: bytes, pos: int) -> tuple:
+    """
+
+    @param data Encoded data.
+    @param pos Position of the first byte of the varint.
+    @returns The decoded value and the position following the varint.
+
+    """
+
+    value = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class ReplayRecorder:
+    """Records a game as its seed followed by the delta-encoded inputs of its logic steps.
+
+    record() is called by the engine at every step and only encodes the steps at which the pressed actions change, into
+    an in-memory buffer. Full buffers are handed to a background writer thread which compresses and writes them, so the
+    game loop never waits for the compression or the file system. close() writes the end record and waits for the
+    writer thread to finish the file.
+
+    """
+
+    __slots__ = ("path", "_step_ms", "_nr_of_steps", "_last_change_step", "_last_inputs", "_last_mask", "_buffer",
+                 "_chunks", "_writer")
+
+
+    def __init__(self, path: str, seed: int, randomizer: str, step_ms: float = par.LOGIC_TIME_STEP_ms) -> None:
+        """Creates the replay file and starts the writer thread.
+
+        @param path Path of the replay file.
+        @param seed Seed of the tile sequence of the game.
+        @param randomizer Name of the randomizer drawing the tile types of the game.
+        @param step_ms Logic time step of the game in milliseconds (every recorded step must last as long).
+        @returns None.
+
+        """
+
+        ## Path of the replay file.
+        self.path = path
+        ## Logic time step of the game in milliseconds.
+        self._step_ms = step_ms
+        ## Number of steps recorded so far.
+        self._nr_of_steps = 0
+        ## Step of the last input record.
+        self._last_change_step = 0
+        ## Inputs of the last recorded step (to skip the bitmask computation while they stay the same object).
+        self._last_inputs = frozenset()
+        ## Bitmask of the inputs of the last recorded step.
+        self._last_mask = 0
+        ## Encoded records not handed to the writer thread yet.
+        self._buffer = bytearray()
+        ## Encoded chunks waiting to be written, None signalling the end of the recording.
+        self._chunks = queue.SimpleQueue()
+        name = randomizer.encode("ascii")
+        self._chunks.put(_HEADER.pack(MAGIC, VERSION, seed, step_ms, len(name)) + name)
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        replay_file = open(path, "wb")
+        ## Thread writing the chunks to the replay file.
+        self._writer = threading.Thread(target=self._write_chunks, args=(replay_file,), name="replay-writer",
+                                        daemon=True)
+        self._writer.start()
+
+
+    def _write_chunks(self, replay_file) -> None:
+        """Writes the header and the compressed chunks to the replay file until the end of the recording, then closes it
+        (writer thread).
+
+        @param replay_file Replay file opened for writing.
+        @returns None.
+
+        """
+
+        compressor = zlib.compressobj(9)
+        with replay_file:
+            replay_file.write(self._chunks.get()) # header, not compressed
+            while True:
+                chunk = self._chunks.get()
+                if chunk is None:
+                    replay_file.write(compressor.flush())
+                    return
+                replay_file.write(compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH))
+                replay_file.flush() # a crash of the game only loses the buffered records
+
+
+    def record(self, inputs: frozenset, dt_ms: float) -> None:
+        """Records a logic step.
+
+        @param inputs Key names of the actions applied during the step.
+        @param dt_ms Milliseconds of simulated time of the step.
+        @returns None.
+
+        """
+
+        if dt_ms != self._step_ms:
+            raise ValueError(f"Invalid step duration: {dt_ms} ms. Must be the recorded step of {self._step_ms} ms.")
+        if inputs is not self._last_inputs:
+            self._last_inputs = inputs
+            mask = 0
+            for bit, action in enumerate(_ACTIONS):
+                if action in inputs:
+                    mask |= 1 << bit
+            if mask != self._last_mask:
+                self._last_mask = mask
+                self._buffer += _encode_varint(self._nr_of_steps - self._last_change_step)
+                self._buffer.append(mask)
+                self._last_change_step = self._nr_of_steps
+                if len(self._buffer) >= par.REPLAY_CHUNK_SIZE:
+                    self._chunks.put(bytes(self._buffer))
+                    self._buffer.clear()
+        self._nr_of_steps += 1
+
+
+    def close(self, score: int, lines: int) -> None:
+        """Writes the end record and waits for the replay file to be written.
+
+        @param score Final score of the game.
+        @param lines Final number of cleared lines of the game.
+        @returns None.
+
+        """
+
+        if self._writer is None:
+            return
+        self._buffer += _encode_varint(self._nr_of_steps - self._last_change_step)
+        self._buffer.append(_END_FLAG)
+        self._buffer += _encode_varint(score) + _encode_varint(lines)
+        self._chunks.put(bytes(self._buffer))
+        self._buffer.clear()
+        self._chunks.put(None)
+        self._writer.join()
+        self._writer = None
+
+
+class Replay:
+    """Recorded game loaded from a replay file."""
+
+
+    def __init__(self, path: str) -> None:
+        """Loads a replay file.
+
+        A file without end record (e.g. the game crashed while recording) is loaded up to its last complete record.
+
+        @param path Path of the replay file.
+        @returns None.
+
+        """
+
+        with open(path, "rb") as replay_file:
+            data = replay_file.read()
+        if len(data) < _HEADER.size:
+            raise ValueError(f"{path} is not a replay file")
+        magic, version, seed, step_ms, name_length = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} replay file")
+        records_pos = _HEADER.size + name_length
+        ## Seed of the tile sequence.
+        self.seed = seed
+        ## Logic time step in milliseconds.
+        self.step_ms = step_ms
+        ## Name of the randomizer drawing the tile types.
+        self.randomizer = data[_HEADER.size:records_pos].decode("ascii")
+        ## Input changes: (step, bitmask of the actions pressed from that step on) pairs, in step order.
+        self.changes = []
+        ## Total number of logic steps.
+        self.nr_of_steps = 0
+        ## Final score of the recorded game (None if the file has no end record).
+        self.score = None
+        ## Final number of cleared lines of the recorded game (None if the file has no end record).
+        self.lines = None
+        data = zlib.decompressobj().decompress(data[records_pos:]) # also decodes an interrupted stream
+        pos = 0
+        step = 0
+        try:
+            while pos < len(data):
+                delta, pos = _decode_varint(data, pos)
+                mask = data[pos]
+                pos += 1
+                step += delta
+                if mask & _END_FLAG:
+                    score, pos = _decode_varint(data, pos)
+                    self.lines, pos = _decode_varint(data, pos)
+                    self.score = score
+                    break
+                self.changes.append((step, mask))
+        except IndexError:
+            pass # truncated record
+        self.nr_of_steps = step
+
+
+    def iter_inputs(self):
+        """Generates the inputs of every logic step of the game.
+
+        @returns A generator of the sets of actions applied at each step, in step order.
+
+        """
+
+        inputs = _MASK_INPUTS[0]
+        step = 0
+        for change_step, mask in self.changes:
+            while step < change_step:
+                yield inputs
+                step += 1
+            inputs = _MASK_INPUTS[mask]
+        while step < self.nr_of_steps:
+            yield inputs
+            step += 1
+
+
+class ReplayPlayer:
+    """Feeds the recorded inputs of a replay to an engine, one logic step at a time.
+
+    The engine must have been created with the seed and randomizer of the replay, so that it is dealt the same tiles:
+    the game is then re-simulated exactly, at whatever pace the caller steps it (in real time by the game interface,
+    as fast as possible by run()).
+
+    """
+
+    __slots__ = ("replay", "engine", "_inputs")
+
+
+    def __init__(self, replay: Replay, engine) -> None:
+        """Initializes the player at the first step of the replay.
+
+        @param replay Replay to play.
+        @param engine GameEngine created with the replay seed and randomizer.
+        @returns None.
+
+        """
+
+        ## Played replay.
+        self.replay = replay
+        ## Engine re-simulating the game.
+        self.engine = engine
+        ## Generator of the inputs of the remaining steps.
+        self._inputs = replay.iter_inputs()
+
+
+    def step(self) -> bool:
+        """Advances the engine by the next recorded step.
+
+        @returns Whether a step was played (False once the replay is over).
+
+        """
+
+        inputs = next(self._inputs, None)
+        if inputs is None:
+            return False
+        self.engine.step(inputs, self.replay.step_ms)
+        return True
+
+
+    def run(self) -> bool:
+        """Plays the remaining steps as fast as possible.
+
+        @returns Whether the final statistics match the recorded ones (True if the replay has no end record).
+
+        """
+
+        while self.step():
+            pass
+        return self.matches_recording()
+
+
+    def matches_recording(self) -> bool:
+        """
+
+        @returns Whether the score and lines of the engine match the final ones of the replay (True if the replay has
+        no end record).
+
+        """
+
+        if self.replay.score is None:
+            return True
+        return (self.engine.state.get_score(), self.engine.state.get_lines()) == (self.replay.score, self.replay.lines)
@@ -0,0 +1,185 @@
+import pygame as pyg
+import parameters as par
+import geometry as geo
+
+
+## Color key marking the transparent pixels of the block sprites (not used by any tile or border color).
+_COLOR_KEY = (255, 0, 255)
+
+
+class BlockAtlas:
+    """Atlas of pre-rendered block sprites.
+
+    Holds one sprite per (fill color, border color) pair, so that blocks are drawn with a single blit (or a batched
+    Surface.blits call) instead of a rect fill plus a border polyline per block. Sprites are slightly larger than a
+    grid cell to include the part of the border drawn outside of the cell, and must be blitted at get_offset() from the
+    block's top-left corner. Whole tiles (per type, configuration and border color) and drop preview outlines are
+    composited once on first use as well, so that drawing the falling tile takes a single blit and allocates nothing.
+
+    """
+
+
+    def __init__(self, size: int = par.GRID_ELEM_SIZE, border_thickness: int = par.BLOCK_BORDER_THICKNESS) -> None:
+        """Initializes the atlas and pre-renders the sprites of all tile colors with the default border.
+
+        @param size Block size (width and height) in pixels.
+        @param border_thickness Block border thickness in pixels.
+        @returns None.
+
+        """
+
+        ## Rendered sprites indexed by (fill color, border color).
+        self._sprites = {}
+        ## Composited tile sprites indexed by (tile type, configuration index, border color).
+        self._tile_sprites = {}
+        ## Rendered tile outlines indexed by (tile type, configuration index, color, line width).
+        self._outline_sprites = {}
+        ## Block size in pixels.
+        self._size = size
+        ## Block border thickness in pixels.
+        self._border_thickness = border_thickness
+        self.rebuild(size)
+
+
+    def rebuild(self, size: int) -> None:
+        """Re-renders all sprites for a new block size (e.g. after a window resize).
+
+        @param size Block size (width and height) in pixels.
+        @returns None.
+
+        """
+
+        styles = set(self._sprites) | {(color, par.WHITE) for color in par.TILE_COLORS.values()}
+        self._size = size
+        self._sprites = {}
+        self._tile_sprites = {}
+        self._outline_sprites = {}
+        for color, border_color in styles:
+            self._sprites[(color, border_color)] = self._render(color, border_color)
+
+
+    def _render(self, color: tuple, border_color: tuple) -> pyg.Surface:
+        """Renders a block sprite.
+
+        @param color Fill RGB color.
+        @param border_color Border RGB color.
+        @returns The sprite Surface.
+
+        """
+
+        margin = self._border_thickness
+        sprite = pyg.Surface((self._size + 2 * margin, self._size + 2 * margin))
+        sprite.fill(_COLOR_KEY)
+        top_left = (margin, margin)
+        down_left = (top_left[0], top_left[1] + self._size)
+        down_right = (down_left[0] + self._size, down_left[1])
+        top_right = (down_right[0], down_right[1] - self._size)
+        pyg.draw.rect(sprite, color, pyg.Rect(top_left[0], top_left[1], self._size, self._size))
+        pyg.draw.lines(surface=sprite, color=border_color, closed=True,
+                       points=[top_left, down_left, down_right, top_right],
+                       width=self._border_thickness)
+        return self._finish_sprite(sprite)
+
+
+    def get(self, color: tuple, border_color: tuple = par.WHITE) -> pyg.Surface:
+        """Returns the sprite of a block, rendering it on first use.
+
+        @param color Fill RGB color.
+        @param border_color Border RGB color.
+        @returns The sprite Surface.
+
+        """
+
+        key = (color, border_color)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            sprite = self._sprites[key] = self._render(color, border_color)
+        return sprite
+
+
+    def get_tile(self, tile_type: str, cfg_idx: int, border_color: tuple = par.WHITE) -> pyg.Surface:
+        """Returns the sprite of a whole tile, compositing it from the block sprites on first use.
+
+        The sprite covers the tile's 4x4 configuration matrix plus the block borders and must be blitted at get_offset()
+        from the matrix top-left corner, like a block sprite.
+
+        @param tile_type Tile type.
+        @param cfg_idx Configuration (rotation) index.
+        @param border_color Border RGB color.
+        @returns The sprite Surface.
+
+        """
+
+        key = (tile_type, cfg_idx, border_color)
+        sprite = self._tile_sprites.get(key)
+        if sprite is None:
+            block = self.get(par.TILE_COLORS[tile_type], border_color)
+            sprite = self._new_transparent_sprite(self._border_thickness)
+            sprite.blits([(block, (self._size * col, self._size * row)) for row, col in geo.TILE_CELLS[tile_type][cfg_idx]],
+                         doreturn=False)
+            sprite = self._tile_sprites[key] = self._finish_sprite(sprite)
+        return sprite
+
+
+    def get_outline(self, tile_type: str, cfg_idx: int, color: tuple, width: int) -> pyg.Surface:
+        """Returns the sprite of a tile's outer outline, rendering it on first use.
+
+        The sprite covers the tile's 4x4 configuration matrix plus the line width on every side and must be blitted at
+        -width pixels (along both axes) from the matrix top-left corner.
+
+        @param tile_type Tile type.
+        @param cfg_idx Configuration (rotation) index.
+        @param color Outline RGB color.
+        @param width Outline width in pixels.
+        @returns The sprite Surface.
+
+        """
+
+        key = (tile_type, cfg_idx, color, width)
+        sprite = self._outline_sprites.get(key)
+        if sprite is None:
+            sprite = self._new_transparent_sprite(width)
+            for (x_start, y_start), (x_end, y_end) in geo.TILE_OUTLINE_SEGMENTS[tile_type][cfg_idx]:
+                pyg.draw.line(sprite, color,
+                              (width + self._size * x_start, width + self._size * y_start),
+                              (width + self._size * x_end, width + self._size * y_end),
+                              width)
+            sprite = self._outline_sprites[key] = self._finish_sprite(sprite)
+        return sprite
+
+
+    def _new_transparent_sprite(self, margin: int) -> pyg.Surface:
+        """
+
+        @param margin Room around the 4x4 configuration matrix in pixels.
+        @returns A new sprite covering a configuration matrix plus the margin, filled with the color key.
+
+        """
+
+        sprite = pyg.Surface((self._size * par.TILE_CONFIG_IDX_MAX + 2 * margin,) * 2)
+        sprite.fill(_COLOR_KEY)
+        return sprite
+
+
+    def _finish_sprite(self, sprite: pyg.Surface) -> pyg.Surface:
+        """Converts a sprite to the display pixel format (if there is a display) and makes its color key transparent.
+
+        @param sprite Sprite Surface filled with the color key where transparent.
+        @returns The finished sprite Surface.
+
+        """
+
+        if pyg.display.get_surface() is not None:
+            sprite = sprite.convert() # match the display pixel format for fast blits
+        sprite.set_colorkey(_COLOR_KEY, pyg.RLEACCEL)
+        return sprite
+
+
+    def get_offset(self) -> int:
+        """
+
+        @returns The offset (in pixels, along both axes) from a block's top-left corner to the sprite's top-left corner.
+
+        """
+
+        return -self._border_thickness
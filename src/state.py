@@ -1,20 +1,43 @@
 from __future__ import annotations # for type hinting of Tile within GameState
-import pygame as pyg
 import parameters as par
+import geometry as geo
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from tile import Tile # type-only import for annotations / linters
 
 
+# Bitboard layout: every board row is packed into an int where bit (_WALL_PADDING + col) is set when the
+# cell at column col is occupied. The padding bits on both sides are always set and act as walls, so that
+# horizontal boundary checks reduce to the same AND operation used for occupied cells.
+
+## Number of always-set wall bits on each side of a bitboard row.
+_WALL_PADDING = par.TILE_CONFIG_IDX_MAX
+## Bitboard row with only the wall bits set, i.e. an empty row.
+_EMPTY_ROW = ((1 << (par.GRID_NR_OF_COLS + 2 * _WALL_PADDING)) - 1) ^ (((1 << par.GRID_NR_OF_COLS) - 1) << _WALL_PADDING)
+## Bitboard row with all bits set, i.e. a completed row (also used as the floor below the board).
+_FULL_ROW = (1 << (par.GRID_NR_OF_COLS + 2 * _WALL_PADDING)) - 1
+## Tile type ids stored in the type plane (0 is reserved for empty cells).
+_TILE_TYPE_IDS = {tile_type: idx + 1 for idx, tile_type in enumerate(par.TILE_SHAPES)}
+## Display color for each tile type id (None for empty cells).
+_TILE_ID_COLORS = (None,) + tuple(par.TILE_COLORS[tile_type] for tile_type in par.TILE_SHAPES)
+
+
 class GameState:
     """Class representing the current game state.
 
-    Tracks board occupancy, time, input cooldowns, contact conditions and game statistics such as
-    score, lines and level.
+    Tracks board occupancy, input cooldowns, contact conditions and game statistics such as
+    score, lines and level. Does not depend on pygame, time is passed in explicitly by the caller.
+    The whole state can be captured with snapshot() and put back with restore(), e.g. to let a bot search ahead or to
+    roll the game back.
 
     """
 
+    ## Attributes of the state (no per-instance __dict__, see __init__ for their description).
+    __slots__ = ("_listeners", "_game_paused", "_game_resumed_timer_ms", "_row_masks", "_type_plane",
+                 "_row_fill_counts", "_dirty_rows", "_column_heights", "_left_contact", "_right_contact",
+                 "_down_contact", "_lines", "_score", "_level", "game_running", "keys_pressed", "pause_key_released")
+
     def __init__(self) -> None:
         """ Initializes the game state.
         
@@ -26,11 +49,17 @@ class GameState:
         self._game_paused = False
         ## Milliseconds since last resume command used for pause cooldowns.
         self._game_resumed_timer_ms = 0
-        ## 2D board occupancy matrix (rows x cols), storing colors or None.
-        self._board_occupancy_matrix = [[None for _ in range(par.GRID_NR_OF_COLS)] 
-                                        for _ in range(par.GRID_NR_OF_ROWS)]
-        ## pygame Clock used for frame timing.
-        self._clock = pyg.time.Clock()
+        ## Board occupancy bitboard, one packed int per row (see _WALL_PADDING for the layout).
+        self._row_masks = [_EMPTY_ROW for _ in range(par.GRID_NR_OF_ROWS)]
+        ## Board type plane, storing the tile type id of each cell (0 if empty) row after row, cell (row, col) at index
+        ## row * GRID_NR_OF_COLS + col. Used for rendering.
+        self._type_plane = bytearray(par.GRID_NR_OF_ROWS * par.GRID_NR_OF_COLS)
+        ## Number of occupied cells in each row, updated when a tile is locked.
+        self._row_fill_counts = [0 for _ in range(par.GRID_NR_OF_ROWS)]
+        ## Rows touched by tiles locked since the last completed rows check (only these can have been completed).
+        self._dirty_rows = set()
+        ## Column height index (skyline): number of rows between the bottom and the topmost occupied cell of each column.
+        self._column_heights = [0 for _ in range(par.GRID_NR_OF_COLS)]
 
         # Contact flags
         ## True when the current tile contacts the left side or an occupied cell.
@@ -50,12 +79,10 @@ class GameState:
         
         ## Whether the main loop should keep running.
         self.game_running = True
+        ## Key names (see the hotkeys in parameters) of the actions to apply during the current step, set every step.
+        self.keys_pressed = frozenset()
         ## Debounce flag for the pause key.
         self.pause_key_released = False
-        ## Debounce flag to prevent continuous lateral movement.
-        self.lateral_movement_disabled = False
-        ## Debounce flag to prevent continuous rotation.
-        self.rotation_disabled = False 
         
         
     def on(self, event, callback) -> None:
@@ -105,19 +132,107 @@ class GameState:
 
         """
 
-        return self._board_occupancy_matrix[row][col]
-    
-    
-    def get_clock(self) -> pyg.time.Clock:
+        return _TILE_ID_COLORS[self._type_plane[row * par.GRID_NR_OF_COLS + col]]
+
+
+    def _get_row_mask(self, row: int) -> int:
+        """Returns the bitboard row at the given index, treating rows below the board as the floor.
+
+        @param row Row index (may lie outside of the board).
+        @returns The bitboard row.
+
+        """
+
+        if row >= par.GRID_NR_OF_ROWS:
+            return _FULL_ROW
+        elif row < 0:
+            return _EMPTY_ROW
+        return self._row_masks[row]
+
+
+    def get_column_heights(self) -> list:
         """
 
-        @returns The game clock.
+        @returns The height of each column, i.e. the number of rows between the bottom and its topmost occupied cell.
 
         """
 
-        return self._clock
-    
+        return self._column_heights
+
+
+    def get_drop_distance(self, tile_type: str, cfg_idx: int, row: int, col: int) -> int:
+        """Computes how many rows a tile configuration placed at the given cell can drop before it lands.
+
+        Uses the column height index when every bottom cell of the tile lies above the surface of its column, which
+        reduces the computation to a min over at most four columns. Falls back to a bitboard scan when the tile is
+        tucked below the surface (e.g. under an overhang).
+
+        @param tile_type Tile type.
+        @param cfg_idx Configuration (rotation) index.
+        @param row Board row of the configuration matrix top-left corner.
+        @param col Board column of the configuration matrix top-left corner.
+        @returns The drop distance in number of cells.
+
+        """
+
+        drop_distance = par.GRID_NR_OF_ROWS
+        for col_offset, row_offset in geo.TILE_BOTTOM_PROFILES[tile_type][cfg_idx]:
+            surface_row = par.GRID_NR_OF_ROWS - self._column_heights[col + col_offset]
+            distance = surface_row - (row + row_offset) - 1
+            if distance < 0:
+                break # below the surface of this column
+            if distance < drop_distance:
+                drop_distance = distance
+        else:
+            return drop_distance
+
+        drop_distance = 0
+        while not self.collides(tile_type, cfg_idx, row + drop_distance + 1, col):
+            drop_distance += 1
+        return drop_distance
+
+
+    def resolve_rotation(self, tile_type: str, cfg_idx: int, row: int, col: int, step: int = 1) -> tuple:
+        """Resolves a rotation against the board using the kick table of par.ROTATION_SYSTEM, without mutating anything.
+
+        @param tile_type Tile type.
+        @param cfg_idx Current configuration (rotation) index.
+        @param row Current board row of the configuration matrix top-left corner.
+        @param col Current board column of the configuration matrix top-left corner.
+        @param step Configuration index increment (1 to rotate counter-clockwise, -1 to rotate clockwise).
+        @returns The resolved (cfg_idx, row, col) pose, or None if every kick position is blocked.
+
+        """
+
+        to_cfg_idx = (cfg_idx + step) % par.TILE_CONFIG_IDX_MAX
+        for row_offset, col_offset in geo.KICK_TABLES[par.ROTATION_SYSTEM][tile_type][(cfg_idx, to_cfg_idx)]:
+            if not self.collides(tile_type, to_cfg_idx, row + row_offset, col + col_offset, ceiling=True):
+                return (to_cfg_idx, row + row_offset, col + col_offset)
+        return None
+
+
+    def collides(self, tile_type: str, cfg_idx: int, row: int, col: int, ceiling: bool = False) -> bool:
+        """Checks whether a tile configuration placed at the given cell overlaps the walls, the floor or an occupied cell.
+
+        @param tile_type Tile type.
+        @param cfg_idx Configuration (rotation) index.
+        @param row Board row of the configuration matrix top-left corner.
+        @param col Board column of the configuration matrix top-left corner.
+        @param ceiling If True, filled cells above the spawn row (TILE_SPAWN_ROW) are treated as colliding as well.
+        @returns True if the tile collides, False otherwise.
 
+        """
+
+        shift = col + _WALL_PADDING
+        for row_offset, mask in geo.TILE_ROW_MASKS[tile_type][cfg_idx]:
+            board_row = row + row_offset
+            if ceiling and board_row < par.TILE_SPAWN_ROW:
+                return True
+            if self._get_row_mask(board_row) & (mask << shift):
+                return True
+        return False
+    
+    
     def get_contact_flags(self, direction: str) -> bool:
         """Returns the contact flag for the specified direction.
 
@@ -166,39 +281,6 @@ class GameState:
         return self._level
 
 
-    def get_current_keys(self) -> None:
-        """Updates the current keys pressed state.
-
-        @returns None.
-        
-        """
-        
-        self.keys_pressed = pyg.key.get_pressed()
-    
-
-    def lateral_movement_check(self) -> None:
-        """Checks if lateral movement keys have been released to re-enable lateral movement.
-
-        @returns None.
-        
-        """
-
-        if self.lateral_movement_disabled and \
-                ((not self.keys_pressed[par.LEFT]) and (not self.keys_pressed[par.RIGHT])):
-            self.lateral_movement_disabled = False
-
-
-    def rotation_check(self) -> None:
-        """Checks if rotation key has been released to re-enable rotation.
-
-        @returns None.
-        
-        """
-
-        if self.rotation_disabled and (not self.keys_pressed[par.ROTATE]):
-            self.rotation_disabled = False
-
-
     def update_occupancy_matrix(self, tile: Tile) -> None:
         """Updates the board occupancy matrix with the current tile's position and configuration.
 
@@ -207,12 +289,20 @@ class GameState:
 
         """
 
-        for row in range(0, len(tile.get_cfg_matrix())):
-            for col in range(0, len(tile.get_cfg_matrix())):
-                if tile.get_cfg_matrix()[row][col] == 1:
-                    row_ = int((tile.position.y - par.GRID_TLC_y) / par.GRID_ELEM_SIZE) + row
-                    col_ = int((tile.position.x - par.GRID_TLC_x) / par.GRID_ELEM_SIZE) + col
-                    self._board_occupancy_matrix[row_][col_] = par.TILE_COLORS[tile.get_current_type()]
+        tile_row, tile_col = tile.get_grid_coords()
+        type_id = _TILE_TYPE_IDS[tile.get_current_type()]
+        for row_offset, col_offset in geo.TILE_CELLS[tile.get_current_type()][tile.get_cfg_idx()]:
+            row = tile_row + row_offset
+            if row < 0: # cells above the board are discarded
+                continue
+            col = tile_col + col_offset
+            self._row_masks[row] |= 1 << (col + _WALL_PADDING)
+            self._type_plane[row * par.GRID_NR_OF_COLS + col] = type_id
+            self._row_fill_counts[row] += 1
+            self._dirty_rows.add(row)
+            if par.GRID_NR_OF_ROWS - row > self._column_heights[col]:
+                self._column_heights[col] = par.GRID_NR_OF_ROWS - row
+        self._emit("board_updated")
 
 
     def contact_detection(self, tile: Tile) -> None:
@@ -223,68 +313,23 @@ class GameState:
 
         """
 
-        # Check contact on the left
-        self._left_contact = False # reset every frame
-        for row in range(0, len(tile.get_cfg_matrix())):
-            if self._left_contact == True:
-                break
-            for col in range(0, len(tile.get_cfg_matrix())):
-                row_ = int((tile.position.y - par.GRID_TLC_y) / par.GRID_ELEM_SIZE) + row
-                col_left_ = int((tile.position.x - par.GRID_TLC_x) / par.GRID_ELEM_SIZE) + col - 1
-                if tile.get_cfg_matrix()[row][col] == 1 and \
-                        (col_left_ < 0 or \
-                        self._board_occupancy_matrix[row_][col_left_] != None):
-                    self._left_contact = True
-                    break
-
-        # Check contact on the right
-        self._right_contact = False # reset every frame
-        for row in range(0, len(tile.get_cfg_matrix())):
-            if self._right_contact == True:
-                break
-            for col in range(len(tile.get_cfg_matrix()) - 1, -1, -1):
-               row_ = int((tile.position.y - par.GRID_TLC_y) / par.GRID_ELEM_SIZE) + row
-               col_right_ = int((tile.position.x - par.GRID_TLC_x) / par.GRID_ELEM_SIZE) + col + 1
-               if tile.get_cfg_matrix()[row][col] == 1 and \
-                        (col_right_ > par.GRID_NR_OF_COLS - 1 or \
-                        self._board_occupancy_matrix[row_][col_right_] != None):
-                    self._right_contact = True
-                    break
-        
-        # Check contact at the bottom
-        self._down_contact = False # reset every frame
-        for row in range(len(tile.get_cfg_matrix()) - 1, -1, -1):
-            if self._down_contact == True:
-                break
-            for col in range(0, len(tile.get_cfg_matrix())):
-                row_down_ = int((tile.position.y - par.GRID_TLC_y) / par.GRID_ELEM_SIZE) + row + 1
-                col_ = int((tile.position.x - par.GRID_TLC_x) / par.GRID_ELEM_SIZE) + col
-                if tile.get_cfg_matrix()[row][col] == 1 and \
-                          (row_down_ > par.GRID_NR_OF_ROWS - 1 or \
-                        self._board_occupancy_matrix[row_down_][col_] != None):
-                    self._down_contact = True
-                    break
+        tile_type = tile.get_current_type()
+        cfg_idx = tile.get_cfg_idx()
+        row, col = tile.get_grid_coords()
+        self._left_contact = self.collides(tile_type, cfg_idx, row, col - 1)
+        self._right_contact = self.collides(tile_type, cfg_idx, row, col + 1)
+        self._down_contact = self.collides(tile_type, cfg_idx, row + 1, col)
 
 
     def _get_completed_rows_list(self) -> list:
         """
         
-        @returns A list of row indices that are completely filled (i.e. no None values) in the board occupancy matrix.
+        @returns A list of row indices, among the rows touched since the last check, that are completely filled,
+        ordered bottom -> top.
         
         """
-        col_completion_count = 0
-        row_complete_list = []
-        for row in range(par.GRID_NR_OF_ROWS - 1, -1, -1): # bottom -> top
-            for col in range(0, par.GRID_NR_OF_COLS):
-                if self._board_occupancy_matrix[row][col] != None:
-                    col_completion_count += 1
-                else: 
-                    col_completion_count = 0
-                    break
-                if col_completion_count == par.GRID_NR_OF_COLS:
-                    row_complete_list.append(row)
-                    col_completion_count = 0
-        return row_complete_list
+
+        return sorted((row for row in self._dirty_rows if self._row_fill_counts[row] == par.GRID_NR_OF_COLS), reverse=True)
    
 
     def increase_score(self, event : str, nr_of_completed_rows : int = None, drop_distance : int = None) -> None:
@@ -307,7 +352,8 @@ class GameState:
             self._score += par.SCORE_MULTIPLIER_HARD_DROP * drop_distance
             self._emit(event, drop_distance)
         else:
-            pass
+            return
+        self._emit("stats_updated")
 
 
     def _increase_level(self) -> None:
@@ -318,6 +364,7 @@ class GameState:
         if self._level < par.MAX_LEVEL:
             self._level += 1
             self._emit("level_up")
+            self._emit("stats_updated")
 
 
     def _level_up_check(self) -> None:
@@ -331,83 +378,124 @@ class GameState:
 
     def delete_completed_rows(self) -> None:
         """ Deletes completed rows, updates score and level accordingly, and drops blocks above the deleted rows downwards.
+
+        Returns immediately unless a tile has been locked since the last call.
         
         """
 
+        if not self._dirty_rows:
+            return
         completed_rows_list = self._get_completed_rows_list()
+        self._dirty_rows.clear()
+        if len(completed_rows_list) == 0:
+            return
+
         self._lines += len(completed_rows_list)
         self._level_up_check()
+        self.increase_score("lines_completed", nr_of_completed_rows=len(completed_rows_list))
+        # remove completed rows (bottom -> top, so that the remaining indices stay valid) and reinsert empty ones on top
+        for row in completed_rows_list:
+            del self._row_masks[row]
+            del self._type_plane[row * par.GRID_NR_OF_COLS:(row + 1) * par.GRID_NR_OF_COLS]
+            del self._row_fill_counts[row]
+        nr_of_completed_rows = len(completed_rows_list)
+        self._row_masks[0:0] = [_EMPTY_ROW] * nr_of_completed_rows
+        self._type_plane[0:0] = bytes(nr_of_completed_rows * par.GRID_NR_OF_COLS)
+        self._row_fill_counts[0:0] = [0] * nr_of_completed_rows
+        self._update_column_heights()
+        self._emit("board_updated")
+
+
+    def _update_column_heights(self) -> None:
+        """Recomputes the column height index from the bitboard, scanning rows top -> bottom until every column is found.
 
-        if len(completed_rows_list) != 0:
-            self.increase_score("lines_completed", nr_of_completed_rows=len(completed_rows_list))
-            for col in range(0, par.GRID_NR_OF_COLS):
-                for row in completed_rows_list:
-                    self._board_occupancy_matrix[row][col] = None
-            self._post_deletion_drop(completed_rows_list)
-
-
-    def _drop_block(self, row_start: int, row_end: int, drop_distance: int) -> None:
-        """Drops a block of rows downwards by the specified distance.
-
-        @param row_start Lower row index (inclusive).
-        @param row_end Higher row index (inclusive).
-        @param drop_distance Number of rows to drop.
-        @returns None.
-        
-        """
-
-        for row in range(row_end + 1, row_start - 1, -1): # in inverse order otherwise it does not work!
-            for col in range(0, par.GRID_NR_OF_COLS):
-                    if self._board_occupancy_matrix[row][col] != None:
-                        self._board_occupancy_matrix[row + drop_distance][col] = self._board_occupancy_matrix[row][col]
-                        self._board_occupancy_matrix[row][col] = None
-
-
-    def _post_deletion_drop(self, completed_rows_list: list) -> None:
-        """Drops the blocks above the deleted rows downwards to fill the gaps.
-
-        @param completed_rows_list List of deleted row indices (in descending order).
         @returns None.
 
         """
 
-        idx  = 0
-        distance = 1
-        while (idx < len(completed_rows_list) and idx + distance < len(completed_rows_list)):
-            if (completed_rows_list[idx + distance] == completed_rows_list[idx] - distance):
-                distance += 1
-            else:
-                row_start = completed_rows_list[idx + distance] + 1
-                row_end = completed_rows_list[idx] - 1
-                self._drop_block(row_start, row_end, distance)
-                idx += 1
-                distance = 1
-        self._drop_block(0, completed_rows_list[-1] - 1, distance)
+        found_mask = 0
+        for row in range(0, par.GRID_NR_OF_ROWS):
+            new_mask = (self._row_masks[row] ^ _EMPTY_ROW) & ~found_mask
+            if new_mask:
+                found_mask |= new_mask
+                for col in range(0, par.GRID_NR_OF_COLS):
+                    if new_mask & (1 << (col + _WALL_PADDING)):
+                        self._column_heights[col] = par.GRID_NR_OF_ROWS - row
+                if found_mask == _FULL_ROW ^ _EMPTY_ROW:
+                    return
+        for col in range(0, par.GRID_NR_OF_COLS):
+            if not found_mask & (1 << (col + _WALL_PADDING)):
+                self._column_heights[col] = 0
 
 
-    def update_pause_state(self, resume_button_activated: bool) -> None:
+    def update_pause_state(self, pause_pressed: bool, resume_button_activated: bool, dt_ms: float) -> None:
         """Updates the game pause state and notifies listeners.
         
+        @param pause_pressed Indicates if the pause key is currently held.
         @param resume_button_activated Indicates if the resume button has been activated.
+        @param dt_ms Milliseconds elapsed since the last update.
         @returns None.
             
         """
 
-        self._game_resumed_timer_ms += self._clock.get_time()
+        self._game_resumed_timer_ms += dt_ms
         
-        if not self._game_paused and self.keys_pressed[par.PAUSE] and self._game_resumed_timer_ms > par.PAUSE_COOLDOWN_ms:
+        if not self._game_paused and pause_pressed and self._game_resumed_timer_ms > par.PAUSE_COOLDOWN_ms:
             self._game_paused = True
             self.pause_key_released = False
             self._emit("game_paused")
 
         if (self._game_paused and resume_button_activated) or \
-           (self._game_paused and self.keys_pressed[par.PAUSE] and self.pause_key_released):
+           (self._game_paused and pause_pressed and self.pause_key_released):
             self._game_resumed_timer_ms = 0
             self._game_paused = False
             self._emit("game_resumed")
             
 
 
+    def snapshot(self) -> tuple:
+        """Captures the game state (everything but the event listeners) as an immutable value.
+
+        @returns A tuple holding the bitboard rows, the type plane (as bytes), the row fill counts, the
+        dirty rows, the column heights, the contact flags, the statistics and the pause and main loop flags, to be
+        passed to restore().
+
+        """
+
+        return (tuple(self._row_masks), bytes(self._type_plane), tuple(self._row_fill_counts),
+                frozenset(self._dirty_rows), tuple(self._column_heights),
+                self._left_contact, self._right_contact, self._down_contact,
+                self._lines, self._score, self._level,
+                self._game_paused, self._game_resumed_timer_ms,
+                self.game_running, self.keys_pressed, self.pause_key_released)
+
+
+    def restore(self, snapshot: tuple) -> None:
+        """Puts the game state back as it was when a snapshot was taken and notifies listeners.
+
+        The event listeners are kept. Listeners of "board_updated" and "stats_updated" are notified, so that the
+        renderer redraws the board and the statistics.
+
+        @param snapshot Value returned by snapshot().
+        @returns None.
+
+        """
+
+        (row_masks, type_plane, row_fill_counts, dirty_rows, column_heights,
+         self._left_contact, self._right_contact, self._down_contact,
+         self._lines, self._score, self._level,
+         self._game_paused, self._game_resumed_timer_ms,
+         self.game_running, self.keys_pressed, self.pause_key_released) = snapshot
+        self._row_masks[:] = row_masks
+        self._type_plane[:] = type_plane
+        self._row_fill_counts[:] = row_fill_counts
+        self._dirty_rows.clear()
+        self._dirty_rows.update(dirty_rows)
+        self._column_heights[:] = column_heights
+        self._emit("board_updated")
+        self._emit("stats_updated")
+
+
     def game_over_check(self) -> None:
         """ Checks if the game is over by verifying if there are any occupied cells in the top row of the board.
 
@@ -415,6 +503,5 @@ class GameState:
         
         """
 
-        for col in range(0, par.GRID_NR_OF_COLS):
-            if self._board_occupancy_matrix[0][col] == 1:
-                self.game_running = False
\ No newline at end of file
+        if self._row_masks[0] != _EMPTY_ROW:
+            self.game_running = False
\ No newline at end of file
@@ -1,8 +1,6 @@
 import parameters as par
-import pygame as pyg
-import random
-from queue import Queue
 from state import GameState
+from generator import PieceQueue
 
 
 class Tile:
@@ -10,15 +8,22 @@ class Tile:
 
     The tetromino is defined by its type (I, O, T, S, Z, J, L), configuration (which is stored as a 4x4 matrix
     indicating filled and empty cells), position on the game board and event-driven state variables allowing it to fall
-    or soft drop.
+    or soft drop. The position is kept in board space, as the (row, col) cell of the configuration matrix top-left
+    corner: the tile knows nothing about pixels, which are only computed by the renderer. Like the game state, the
+    tile can be captured with snapshot() and put back with restore().
 
     """
 
+    ## Attributes of the tile (no per-instance __dict__, see __init__ and _reset for their description).
+    __slots__ = ("_listeners", "_down_contact_timer_ms", "_pieces", "_type", "_next_type", "_configuration_idx",
+                 "_configuration_matrix", "is_falling", "can_soft_drop", "row", "col")
 
-    def __init__(self, game_state: 'GameState') -> None:
+
+    def __init__(self, game_state: 'GameState', pieces: PieceQueue = None) -> None:
         """Initializes the Tile object.
         
         @param game_state The current game state.
+        @param pieces Queue dealing the tile types of the game (a queue with a random seed if None).
         @returns None.
 
         """
@@ -27,10 +32,8 @@ class Tile:
         self._listeners = {}
         ## Down contact timer, used to check how long the tile has been in contact with the ground.
         self._down_contact_timer_ms = 0
-        ## Tile queue holding the upcoming tile types.
-        self._tile_queue = Queue(maxsize=par.TILE_QUEUE_SIZE)
-        for _ in range(par.TILE_QUEUE_SIZE):
-            self._tile_queue.put(Tile.get_random_tile_type())
+        ## Queue of the upcoming tile types, current one first.
+        self._pieces = pieces if pieces is not None else PieceQueue()
         self._reset(game_state)
 
 
@@ -43,11 +46,9 @@ class Tile:
         """
         
         ## Current tile type.
-        self._type = self._tile_queue.queue[0]
+        self._type = self._pieces.peek(0)
         ## Next tile type.
-        self._next_type = self._tile_queue.queue[1]
-        ## Flag indicating if tile rotation is allowed.
-        self._rotation_allowed = False
+        self._next_type = self._pieces.peek(1)
         ## Current configuration index of the tile, used for rotation purposes.
         self._configuration_idx = 0
         ## Current configuration matrix of the tile, a 4x4 matrix where a entry of 1 indicates a filled cell and 0 an empty cell.
@@ -56,12 +57,13 @@ class Tile:
         self.is_falling = False
         ## Flag indicating if the tile can perform a soft drop this frame.
         self.can_soft_drop = False
-        ## Current position of the tile (top-left corner) in pixels.
-        self.position = self._get_initial_position()
+        ## Board row and column of the configuration matrix top-left corner.
+        self.row, self.col = self._get_initial_grid_coords()
         
-        # Check for contact and if occurred end the game
+        # Check for contact or overlap and if occurred end the game
         game_state.contact_detection(self)
-        if game_state.get_contact_flags("down"):
+        row, col = self.get_grid_coords()
+        if game_state.get_contact_flags("down") or game_state.collides(self._type, self._configuration_idx, row, col):
             game_state.game_running = False
 
 
@@ -93,18 +95,6 @@ class Tile:
                 callback(event, data)
 
 
-    @staticmethod
-    def get_random_tile_type() -> str:
-        """
-        @returns A random tile type from the available tile shapes.
-        
-        """
-
-        tile_types = list(par.TILE_SHAPES.keys())
-        idx = random.randint(0, len(tile_types) - 1)
-        return tile_types[idx]
-    
-
     def get_current_type(self) -> str:
         """
         @returns The current tile type.
@@ -123,6 +113,24 @@ class Tile:
         return self._next_type
     
 
+    def get_cfg_idx(self) -> int:
+        """
+        @returns The current configuration (rotation) index of the tile.
+        
+        """
+
+        return self._configuration_idx
+
+
+    def get_grid_coords(self) -> tuple:
+        """
+        @returns The (row, col) board cell of the tile's top-left corner.
+        
+        """
+
+        return (self.row, self.col)
+
+
     def get_cfg_matrix(self) -> list:
         """
         @returns The current configuration matrix of the tile.
@@ -130,6 +138,35 @@ class Tile:
         """
 
         return self._configuration_matrix
+
+
+    def snapshot(self) -> tuple:
+        """Captures the tile (everything but the event listeners) as an immutable value.
+
+        @returns A tuple holding the piece queue snapshot, the configuration index, the position, the fall and soft
+        drop flags and the down contact timer, to be passed to restore().
+
+        """
+
+        return (self._pieces.snapshot(), self._configuration_idx, self.row, self.col, self.is_falling, self.can_soft_drop,
+                self._down_contact_timer_ms)
+
+
+    def restore(self, snapshot: tuple) -> None:
+        """Puts the tile back as it was when a snapshot was taken and notifies the "moved" listeners.
+
+        @param snapshot Value returned by snapshot().
+        @returns None.
+
+        """
+
+        (pieces_snapshot, self._configuration_idx, self.row, self.col, self.is_falling, self.can_soft_drop,
+         self._down_contact_timer_ms) = snapshot
+        self._pieces.restore(pieces_snapshot)
+        self._type = self._pieces.peek(0)
+        self._next_type = self._pieces.peek(1)
+        self._configuration_matrix = par.TILE_SHAPES[self._type][self._configuration_idx]
+        self._emit("moved")
     
     
     def _rotate(self, direction: str) -> None:
@@ -149,37 +186,15 @@ class Tile:
         self._configuration_matrix = par.TILE_SHAPES[self._type][self._configuration_idx]
 
 
-    def _get_initial_position(self) -> pyg.Vector2:
+    def _get_initial_grid_coords(self) -> tuple:
         """
-        @returns The initial position of the tile based on its type.
+        @returns The initial (row, col) board cell of the tile's top-left corner, based on its type.
 
         """
 
         if self._type == "I" or self._type == "O":
-            pos = pyg.Vector2(par.GRID_TLC_x + par.GRID_ELEM_SIZE * (int(par.GRID_NR_OF_COLS / 2) - 2),
-                                    par.GRID_TLC_y - par.GRID_ELEM_SIZE)
-        else:
-            pos = pyg.Vector2(par.GRID_TLC_x + par.GRID_ELEM_SIZE * (int(par.GRID_NR_OF_COLS / 2) - 1),
-                                    par.GRID_TLC_y - par.GRID_ELEM_SIZE)
-        return pos
-
-
-    def _is_out_of_bounds(self, x: int, y: int) -> bool:
-        """Checks if the given (x, y) position is out of the game board bounds.
-
-        @param x The x coordinate to check.
-        @param y The y coordinate to check.
-        @returns True if the position is out of bounds, False otherwise.
-
-        """
-
-        if (x < par.GRID_TLC_x or \
-                x > par.GRID_TLC_x + (par.GRID_NR_OF_COLS - 1) * par.GRID_ELEM_SIZE or \
-                y < par.GRID_TLC_y or \
-                y > par.GRID_TLC_y + (par.GRID_NR_OF_ROWS - 1) * par.GRID_ELEM_SIZE):
-            return True
-        else:
-            return False
+            return (par.TILE_SPAWN_ROW, par.GRID_NR_OF_COLS // 2 - 2)
+        return (par.TILE_SPAWN_ROW, par.GRID_NR_OF_COLS // 2 - 1)
 
 
     def compute_smallest_drop_distance(self, game_state: GameState) -> int:
@@ -190,144 +205,68 @@ class Tile:
         @returns The smallest drop distance in number of cells.
 
         """
-         
-        drop_distances = []
-        for col in range(0, par.TILE_CONFIG_IDX_MAX):
-            d = 0
-            for row in range(par.TILE_CONFIG_IDX_MAX - 1, -1, -1):
-                if self._configuration_matrix[row][col] == 1:
-                    row_ = int((self.position.y - par.GRID_TLC_y) / par.GRID_ELEM_SIZE) + row
-                    col_ = int((self.position.x - par.GRID_TLC_x) / par.GRID_ELEM_SIZE) + col
-                    while(row_ + 1 < par.GRID_NR_OF_ROWS):
-                        if game_state.get_BOM_element(row_ + 1, col_) == None:
-                            d += 1
-                            row_ += 1
-                        else:
-                            break
-                    drop_distances.append(d)
-        return min(drop_distances)
-
-
-    def _is_position_permitted(self, game_state: GameState) -> bool:
-        """Checks if the current tile position is permitted (i.e., within bounds and not overlapping with the board).
-
-        @param game_state The current game state.
-        @returns True if the position is permitted, False otherwise.
-
-        """
-
-        for row in range(0, len(self._configuration_matrix)):
-            for col in range(0, len(self._configuration_matrix)):
-                # Check if the tile block is out of bounds
-                block_pos_x = self.position.x + par.GRID_ELEM_SIZE * col
-                block_pos_y = self.position.x + par.GRID_ELEM_SIZE * row
-                if self._configuration_matrix[row][col] == 1 and self._is_out_of_bounds(block_pos_x, block_pos_y):
-                    return False
-                elif self._configuration_matrix[row][col] == 1 and (not self._is_out_of_bounds(block_pos_x, block_pos_y)):
-                    # Check if the tile block is overlapping the board
-                    row_ = int((self.position.y - par.GRID_TLC_y) / par.GRID_ELEM_SIZE) + row
-                    col_ = int((self.position.x - par.GRID_TLC_x) / par.GRID_ELEM_SIZE) + col
-                    if game_state.get_BOM_element(row_, col_) != None:
-                        return False
-                else:
-                    pass
-        return True
-    
 
-    def _rotation_allowed_check(self, game_state: GameState, step: int) -> bool:
-        """Checks if rotation is allowed following the wall kick rules.
+        return game_state.get_drop_distance(self._type, self._configuration_idx, self.row, self.col)
 
-        @param game_state The current game state.
-        @param step The current step in the wall kick check process.
-        @returns True if rotation is allowed, False otherwise.
-
-        """
 
-        if step == 1:
-            # Attempt rotating and check if new position is ok
-            self._rotate('CCW')
-        elif step == 2:
-            # Translate to the right and try again
-            self.position.x += par.GRID_ELEM_SIZE
-        elif step == 3:
-            # Translate to the left and try again
-            self.position.x -= 2 * par.GRID_ELEM_SIZE
-        else: 
-            pass
-        if self._is_position_permitted(game_state):
-            self._rotate('CW')
-            return True
-        else:
-            if self._type == "I":
-                self._rotate('CW')
-                return False
-            else:
-                if step == 3:
-                    # reset position
-                    self.position.x += 2 * par.GRID_ELEM_SIZE
-                    return False
-                else:
-                    self._rotation_allowed_check(game_state, step + 1)
-                    
-
-    def update_position(self, game_state: GameState) -> None:
-        """Updates the tile position based on the current game state and user input.
+    def update_position(self, game_state: GameState, dt_ms: float) -> None:
+        """Updates the tile position based on the current game state and user input. Emits "moved" if the tile moved,
+        rotated or was replaced by the next one.
 
         @param game_state The current game state.
+        @param dt_ms Milliseconds elapsed since the last update.
         @returns None.
         
         """
 
-        # Check if lateral movement is disabled/enabled
-        game_state.lateral_movement_check()
-            
-        # Check if rotation is disabled/enabled
-        game_state.rotation_check()
-
+        old_row, old_col, old_cfg_idx, old_type = self.row, self.col, self._configuration_idx, self._type
         game_state.contact_detection(self)
         
         # Update left
-        if (game_state.keys_pressed[par.LEFT] and (not game_state.keys_pressed[par.RIGHT])
-                and (not game_state.get_contact_flags("left"))
-                and (not game_state.lateral_movement_disabled)):
-            self.position.x -= par.GRID_ELEM_SIZE
-            game_state.lateral_movement_disabled = True
+        if (par.LEFT in game_state.keys_pressed and (par.RIGHT not in game_state.keys_pressed)
+                and (not game_state.get_contact_flags("left"))):
+            self.col -= 1
             
         # Update right
-        if (game_state.keys_pressed[par.RIGHT] and (not game_state.keys_pressed[par.LEFT])
-                and (not game_state.get_contact_flags("right"))
-                and (not game_state.lateral_movement_disabled)):
-            self.position.x += par.GRID_ELEM_SIZE
-            game_state.lateral_movement_disabled = True
+        if (par.RIGHT in game_state.keys_pressed and (par.LEFT not in game_state.keys_pressed)
+                and (not game_state.get_contact_flags("right"))):
+            self.col += 1
             
         # Update rotation state
-        if (game_state.keys_pressed[par.ROTATE] and self._rotation_allowed_check(game_state, step=1) and (not game_state.rotation_disabled)):
-            self._rotate('CCW')
-            self._emit("rotation")
-            game_state.rotation_disabled = True
+        if par.ROTATE in game_state.keys_pressed:
+            pose = game_state.resolve_rotation(self._type, self._configuration_idx, self.row, self.col)
+            if pose is not None:
+                _, self.row, self.col = pose
+                self._rotate('CCW')
+                self._emit("rotation")
         
+        # Refresh contact flags, lateral movement and rotation may have changed them
+        game_state.contact_detection(self)
+
         # Update vertical position
         if (not game_state.get_contact_flags("down")):
-            if game_state.keys_pressed[par.DOWN]:
-                self.position.y += int(self.can_soft_drop) * par.GRID_ELEM_SIZE
+            if par.DOWN in game_state.keys_pressed:
+                self.row += int(self.can_soft_drop)
                 if self.can_soft_drop:
                     game_state.increase_score("soft_drop")
                 self.can_soft_drop = False
-            elif game_state.keys_pressed[par.HARD_DROP]:
+            elif par.HARD_DROP in game_state.keys_pressed:
                 drop_dist = self.compute_smallest_drop_distance(game_state)
-                self.position.y += drop_dist * par.GRID_ELEM_SIZE
+                self.row += drop_dist
                 game_state.increase_score("hard_drop", drop_distance=drop_dist)
             else: # else needed here to avoid dropping twice due to pressing DOWN and gravity tick
                 if (self.is_falling):
-                    self.position.y += par.GRID_ELEM_SIZE
+                    self.row += 1
                     self.is_falling = False                
         else:
             if (self._down_contact_timer_ms >= par.DOWN_CONTACT_TIMEOUT_ms):
                 self._down_contact_timer_ms = 0
                 game_state.update_occupancy_matrix(self)
-                # remove current tile from the queue...
-                self._tile_queue.get()
-                # ...and add a new one
-                self._tile_queue.put(Tile.get_random_tile_type())
+                # remove current tile from the queue
+                self._pieces.pop()
                 self._reset(game_state) 
-            self._down_contact_timer_ms += game_state.get_clock().get_time()           
\ No newline at end of file
+            self._down_contact_timer_ms += dt_ms
+
+        if (self.row != old_row or self.col != old_col or self._configuration_idx != old_cfg_idx
+                or self._type != old_type):
+            self._emit("moved")
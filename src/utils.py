@@ -1,5 +1,11 @@
 import sys
 import os
+from assetpack import AssetPack
+
+## File name of the asset pack, looked up in the project root or in the PyInstaller temp folder.
+ASSET_PACK_FILE_NAME = "assets.pack"
+## Asset pack opened by get_asset_pack (False until the first lookup).
+_asset_pack = False
 
 def get_base_path() -> str:
     '''Gets the base path of the application.
@@ -23,3 +29,44 @@ def get_resource_path(relative_path: str) -> str:
     
     return os.path.join(get_base_path(), relative_path)
 
+
+
+def get_cache_path() -> str:
+    '''Gets the folder where decoded assets are cached between launches.
+
+    @returns Path to assets/cache under the project root, or to a per-user folder for PyInstaller builds (their temp
+    folder is deleted when the application exits).
+
+    '''
+
+    if getattr(sys, "frozen", False):
+        return os.path.join(os.path.expanduser("~"), ".tetris", "cache")
+    return get_resource_path(os.path.join("assets", "cache"))
+
+
+def get_asset_pack() -> AssetPack:
+    '''Gets the asset pack, mapping it on first use.
+
+    @returns The asset pack, or None if the application runs from the individual asset files.
+
+    '''
+
+    global _asset_pack
+    if _asset_pack is False:
+        pack_path = get_resource_path(ASSET_PACK_FILE_NAME)
+        _asset_pack = AssetPack(pack_path) if os.path.exists(pack_path) else None
+    return _asset_pack
+
+
+def open_resource(relative_path: str):
+    '''Opens a resource for binary reading, from the asset pack if available.
+
+    @param relative_path: Path relative to the project root, e.g. "assets/images/tetris_logo.png".
+    @returns A readable and seekable binary file-like object, which can be passed to the pygame loaders.
+
+    '''
+
+    asset_pack = get_asset_pack()
+    if asset_pack is not None and relative_path in asset_pack:
+        return asset_pack.open(relative_path)
+    return open(get_resource_path(relative_path), "rb")
@@ -0,0 +1,7 @@
+import os
+import sys
+
+## Project root.
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_PATH, "src"))
+sys.path.insert(0, os.path.join(ROOT_PATH, "benchmarks"))
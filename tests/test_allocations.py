@@ -0,0 +1,5 @@
+from allocations import check_allocations, measure_allocations
+
+
+def test_steady_state_frames_allocate_nothing():
+    assert check_allocations(measure_allocations()) == []
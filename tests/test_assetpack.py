@@ -0,0 +1,94 @@
+import io
+import json
+import os
+import random
+import pytest
+from assetpack import _HEADER, PACK_MAGIC, PACK_VERSION, AssetPack, write_pack
+
+## Contents of the packed test files, indexed by path relative to the packed folder.
+ASSETS = {
+    "assets/images/tile.bin": random.Random(0).randbytes(3000),
+    "assets/audio/clear.wav": b"RIFF" + bytes(range(256)) * 4,
+    "assets/fonts/empty.ttf": b"",
+    "README.md": b"# packed\n",
+}
+
+
+@pytest.fixture
+def pack_path(tmp_path) -> str:
+    """Packs the test files.
+
+    @param tmp_path Temporary folder of the test.
+    @returns The path of the pack file.
+
+    """
+
+    root_path = tmp_path / "root"
+    for relative_path, data in ASSETS.items():
+        path = root_path / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    path = str(tmp_path / "assets.pack")
+    write_pack(str(root_path), [relative_path.replace("/", os.sep) for relative_path in ASSETS], path)
+    return path
+
+
+def test_pack_layout(pack_path):
+    with open(pack_path, "rb") as pack_file:
+        data = pack_file.read()
+    magic, version, index_size = _HEADER.unpack_from(data)
+    assert (magic, version) == (PACK_MAGIC, PACK_VERSION)
+    index = json.loads(data[_HEADER.size:_HEADER.size + index_size].decode("utf-8"))
+    assert list(index) == sorted(ASSETS)
+    # the assets are stored back to back in path order after the index
+    offset = 0
+    for name, (asset_offset, size) in index.items():
+        assert (asset_offset, size) == (offset, len(ASSETS[name]))
+        offset += size
+    data_offset = _HEADER.size + index_size
+    assert len(data) == data_offset + offset
+    for name, (asset_offset, size) in index.items():
+        assert data[data_offset + asset_offset:data_offset + asset_offset + size] == ASSETS[name]
+
+
+def test_pack_contents(pack_path):
+    asset_pack = AssetPack(pack_path)
+    assert sorted(asset_pack.get_names()) == sorted(ASSETS)
+    assert os.path.join("assets", "images", "tile.bin") in asset_pack
+    assert "assets/images/missing.bin" not in asset_pack
+    for name, data in ASSETS.items():
+        assert asset_pack.get_buffer(name) == data
+        assert asset_pack.open(name).read() == data
+
+
+def test_packed_file_view_seek_and_partial_reads(pack_path):
+    data = ASSETS["assets/images/tile.bin"]
+    view = AssetPack(pack_path).open("assets/images/tile.bin")
+    assert view.readable() and view.seekable()
+    assert view.read(10) == data[:10]
+    assert view.tell() == 10
+    assert view.seek(100) == 100
+    assert view.read(50) == data[100:150]
+    assert view.seek(-20, io.SEEK_CUR) == 130
+    assert view.read(5) == data[130:135]
+    assert view.seek(-8, io.SEEK_END) == len(data) - 8
+    assert view.read(100) == data[-8:]
+    assert view.read(1) == b""
+    buffer = bytearray(16)
+    view.seek(len(data) - 4)
+    assert view.readinto(buffer) == 4
+    assert buffer[:4] == data[-4:]
+    view.seek(len(data) + 10)
+    assert view.read() == b""
+    with pytest.raises(ValueError):
+        view.seek(-1)
+    with pytest.raises(ValueError):
+        view.seek(0, 3)
+    assert view.getbuffer() == data
+
+
+def test_invalid_pack_is_rejected(tmp_path):
+    path = tmp_path / "invalid.pack"
+    path.write_bytes(_HEADER.pack(b"NOTAPACK", PACK_VERSION, 2) + b"{}")
+    with pytest.raises(ValueError):
+        AssetPack(str(path))
@@ -0,0 +1,82 @@
+import random
+import numpy as np
+import pytest
+import parameters as par
+from batch import (BatchEngine, _CELL_OFFSETS, ACTION_NONE, ACTION_LEFT, ACTION_RIGHT, ACTION_ROTATE, ACTION_SOFT_DROP,
+                   ACTION_HARD_DROP)
+from engine import GameEngine
+
+## Keys pressed in GameEngine for each BatchEngine action.
+ACTION_KEYS = {
+    ACTION_NONE: frozenset(),
+    ACTION_LEFT: frozenset({par.LEFT}),
+    ACTION_RIGHT: frozenset({par.RIGHT}),
+    ACTION_ROTATE: frozenset({par.ROTATE}),
+    ACTION_SOFT_DROP: frozenset({par.DOWN}),
+    ACTION_HARD_DROP: frozenset({par.HARD_DROP}),
+}
+## Relative frequency of each action in the random inputs (mostly idle and soft drops, so that games last a while).
+ACTION_WEIGHTS = {ACTION_NONE: 40, ACTION_LEFT: 12, ACTION_RIGHT: 12, ACTION_ROTATE: 10, ACTION_SOFT_DROP: 25,
+                  ACTION_HARD_DROP: 1}
+## Maximum number of steps of a compared game.
+MAX_NR_OF_STEPS = 20000
+
+
+def get_stats(engine: GameEngine) -> tuple:
+    """
+    @param engine Game engine.
+    @returns The score, lines, level and running flag of the game.
+
+    """
+
+    state = engine.state
+    return (state.get_score(), state.get_lines(), state.get_level(), state.game_running)
+
+
+def get_batch_stats(batch: BatchEngine, board_idx: int) -> tuple:
+    """
+    @param batch Batch engine.
+    @param board_idx Board index.
+    @returns The score, lines, level and running flag of the game of the board.
+
+    """
+
+    return (int(batch.scores[board_idx]), int(batch.lines[board_idx]), int(batch.levels[board_idx]),
+            bool(batch.running[board_idx]))
+
+
+@pytest.mark.parametrize("randomizer", ["uniform", "bag", "history"])
+@pytest.mark.parametrize("seed", [1, 2])
+def test_batch_engine_matches_game_engine(monkeypatch, seed, randomizer):
+    # level up at every line, so that the games go through several levels
+    monkeypatch.setattr(par, "MAX_LINES_PER_LEVEL", 1)
+    nr_of_boards = 3
+    batch = BatchEngine(nr_of_boards, seed=seed, randomizer=randomizer)
+    engines = [GameEngine(seed=seed + idx, randomizer=randomizer) for idx in range(nr_of_boards)]
+    rng = random.Random(seed)
+    for step in range(MAX_NR_OF_STEPS):
+        actions = rng.choices(tuple(ACTION_WEIGHTS), weights=tuple(ACTION_WEIGHTS.values()), k=nr_of_boards)
+        batch.step(np.array(actions), par.LOGIC_TIME_STEP_ms)
+        for idx, engine in enumerate(engines):
+            engine.step(ACTION_KEYS[actions[idx]], par.LOGIC_TIME_STEP_ms)
+            assert get_batch_stats(batch, idx) == get_stats(engine), f"board {idx} differs at step {step}"
+        if not batch.running.any():
+            break
+    assert sum(engine.state.get_lines() for engine in engines) > 0
+
+
+def test_batch_engine_scores_lines_at_new_level():
+    batch = BatchEngine(1, seed=1)
+    batch.lines[0] = par.MAX_LINES_PER_LEVEL - 1
+    # fill the bottom row but the cells the current tile lands on
+    landing_row = batch.rows[0] + batch._drop_distances(np.array([0]))[0]
+    offsets = _CELL_OFFSETS[batch.tile_types[0], batch.cfg_idxs[0]]
+    batch.boards[0, -1] = 1
+    batch.boards[0, -1, batch.cols[0] + offsets[landing_row + offsets[:, 0] == par.GRID_NR_OF_ROWS - 1, 1]] = 0
+    batch.step(np.array([ACTION_HARD_DROP]), par.LOGIC_TIME_STEP_ms)
+    hard_drop_score = int(batch.scores[0])
+    for _ in range(int(par.DOWN_CONTACT_TIMEOUT_ms / par.LOGIC_TIME_STEP_ms) + 2):
+        batch.step(np.array([ACTION_NONE]), par.LOGIC_TIME_STEP_ms)
+    assert batch.lines[0] == par.MAX_LINES_PER_LEVEL
+    assert batch.levels[0] == 2
+    assert batch.scores[0] == hard_drop_score + par.LINE_CLEAR_SCORE_MULTIPLIERS[1] * 2
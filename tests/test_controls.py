@@ -0,0 +1,105 @@
+import parameters as par
+from controls import InputHandler
+
+
+## Duration of the synthetic logic steps in milliseconds.
+_DT_ms = 10
+
+
+def poll_until(input_handler: InputHandler, start_ms: float, end_ms: float, key_name: str) -> list:
+    """Polls the input handler once per step.
+
+    @param input_handler Input handler.
+    @param start_ms Simulated time of the first step in milliseconds.
+    @param end_ms Simulated time after the last step in milliseconds.
+    @param key_name Name of the key whose action is looked for.
+    @returns The times of the steps reporting the action of the key.
+
+    """
+
+    return [time_ms for time_ms in range(start_ms, end_ms, _DT_ms) if key_name in input_handler.poll(time_ms)]
+
+
+def test_lateral_movement_auto_repeats_after_das():
+    input_handler = InputHandler(das_ms=170, arr_ms=50)
+    input_handler.press(par.LEFT, 0)
+    assert poll_until(input_handler, 0, 400, par.LEFT) == [0, 170, 220, 270, 320, 370]
+    input_handler.release(par.LEFT, 400)
+    assert poll_until(input_handler, 400, 800, par.LEFT) == []
+
+
+def test_long_step_reports_a_single_repeat():
+    input_handler = InputHandler(das_ms=170, arr_ms=50)
+    input_handler.press(par.RIGHT, 0)
+    assert par.RIGHT in input_handler.poll(0)
+    # a single long step misses several repeats but reports one movement, and the repeats resume from its time
+    assert par.RIGHT in input_handler.poll(500)
+    assert poll_until(input_handler, 510, 620, par.RIGHT) == [510, 550, 600]
+
+
+def test_zero_arr_repeats_every_step():
+    input_handler = InputHandler(das_ms=100, arr_ms=0)
+    input_handler.press(par.RIGHT, 0)
+    assert poll_until(input_handler, 0, 150, par.RIGHT) == [0, 100, 110, 120, 130, 140]
+
+
+def test_new_press_restarts_das():
+    input_handler = InputHandler(das_ms=170, arr_ms=50)
+    input_handler.press(par.LEFT, 0)
+    assert poll_until(input_handler, 0, 100, par.LEFT) == [0]
+    input_handler.release(par.LEFT, 100)
+    input_handler.press(par.LEFT, 150)
+    assert poll_until(input_handler, 150, 400, par.LEFT) == [150, 320, 370]
+
+
+def test_os_key_repeats_are_ignored():
+    input_handler = InputHandler(das_ms=170, arr_ms=50)
+    input_handler.press(par.LEFT, 0)
+    assert par.LEFT in input_handler.poll(0)
+    input_handler.press(par.LEFT, 30)
+    assert par.LEFT not in input_handler.poll(40)
+
+
+def test_rotation_and_hard_drop_trigger_once_per_press():
+    input_handler = InputHandler()
+    input_handler.press(par.ROTATE, 0)
+    input_handler.press(par.HARD_DROP, 0)
+    assert input_handler.poll(0) == {par.ROTATE, par.HARD_DROP}
+    assert poll_until(input_handler, _DT_ms, 1000, par.ROTATE) == []
+    assert poll_until(input_handler, _DT_ms, 1000, par.HARD_DROP) == []
+    input_handler.release(par.ROTATE, 1000)
+    input_handler.press(par.ROTATE, 1000)
+    assert input_handler.poll(1000) == {par.ROTATE}
+
+
+def test_soft_drop_and_pause_are_reported_while_held():
+    input_handler = InputHandler()
+    input_handler.press(par.DOWN, 0)
+    input_handler.press(par.PAUSE, 0)
+    for time_ms in range(0, 500, _DT_ms):
+        assert input_handler.poll(time_ms) == {par.DOWN, par.PAUSE}
+    input_handler.release(par.DOWN, 500)
+    assert input_handler.poll(500) == {par.PAUSE}
+    input_handler.release(par.PAUSE, 510)
+    assert input_handler.poll(510) == set()
+
+
+def test_tap_between_steps_is_not_lost():
+    input_handler = InputHandler()
+    assert input_handler.poll(0) == set()
+    for key_name in (par.LEFT, par.ROTATE, par.HARD_DROP, par.DOWN):
+        input_handler.press(key_name, 3)
+        input_handler.release(key_name, 7)
+    assert not input_handler.is_held(par.LEFT)
+    assert input_handler.poll(_DT_ms) == {par.LEFT, par.ROTATE, par.HARD_DROP, par.DOWN}
+    assert input_handler.poll(2 * _DT_ms) == set()
+
+
+def test_release_all_forgets_held_and_pending_keys():
+    input_handler = InputHandler()
+    input_handler.press(par.LEFT, 0)
+    input_handler.press(par.DOWN, 0)
+    input_handler.release_all()
+    assert not input_handler.is_held(par.DOWN)
+    assert poll_until(input_handler, 0, 1000, par.LEFT) == []
+    assert poll_until(input_handler, 0, 1000, par.DOWN) == []
@@ -0,0 +1,75 @@
+import random
+import parameters as par
+from engine import GameEngine
+
+## Keys pressed during a step, with their relative frequency in the random inputs.
+INPUT_WEIGHTS = {
+    frozenset(): 40,
+    frozenset({par.LEFT}): 12,
+    frozenset({par.RIGHT}): 12,
+    frozenset({par.ROTATE}): 10,
+    frozenset({par.DOWN}): 25,
+    frozenset({par.HARD_DROP}): 1,
+}
+## Number of steps played before the snapshot and then again before the restore.
+NR_OF_STEPS = 4000
+
+
+def make_inputs(seed: int, nr_of_steps: int) -> list:
+    """
+    @param seed Seed of the random inputs.
+    @param nr_of_steps Number of steps.
+    @returns The keys pressed during each step.
+
+    """
+
+    return random.Random(seed).choices(tuple(INPUT_WEIGHTS), weights=tuple(INPUT_WEIGHTS.values()), k=nr_of_steps)
+
+
+def get_observable_state(engine: GameEngine) -> tuple:
+    """
+    @param engine Game engine.
+    @returns The board, the statistics, the falling tile and the preview of the next tiles of the game.
+
+    """
+
+    state = engine.state
+    board = tuple(state.get_BOM_element(row, col)
+                  for row in range(par.GRID_NR_OF_ROWS) for col in range(par.GRID_NR_OF_COLS))
+    tile = engine.tile
+    return (board, state.get_score(), state.get_lines(), state.get_level(), state.game_running,
+            tile.get_current_type(), tile.get_next_type(), tile.get_cfg_idx(), tile.row, tile.col,
+            engine.pieces.get_preview())
+
+
+def play(engine: GameEngine, inputs: list) -> None:
+    """
+    @param engine Game engine.
+    @param inputs Keys pressed during each step.
+    @returns None.
+
+    """
+
+    for step_inputs in inputs:
+        engine.step(step_inputs, par.LOGIC_TIME_STEP_ms)
+
+
+def test_restore_puts_back_a_mid_game_snapshot(monkeypatch):
+    # level up at every line, so that the level changes between the snapshot and the restore
+    monkeypatch.setattr(par, "MAX_LINES_PER_LEVEL", 1)
+    engine = GameEngine(seed=2)
+    play(engine, make_inputs(0, NR_OF_STEPS))
+    assert engine.state.game_running and engine.state.get_lines() > 0
+    lines = engine.state.get_lines()
+    snapshot = engine.snapshot()
+    observable_state = get_observable_state(engine)
+    later_inputs = make_inputs(1, NR_OF_STEPS)
+    play(engine, later_inputs)
+    final_snapshot = engine.snapshot()
+    assert engine.state.get_lines() > lines
+    engine.restore(snapshot)
+    assert get_observable_state(engine) == observable_state
+    assert engine.snapshot() == snapshot
+    # the restored game is dealt the same tiles, so it plays the same way
+    play(engine, later_inputs)
+    assert engine.snapshot() == final_snapshot
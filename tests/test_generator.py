@@ -0,0 +1,34 @@
+from collections import Counter
+import pytest
+import parameters as par
+from generator import RANDOMIZERS, TILE_TYPES, PieceQueue, generate_sequence
+
+## Number of tile types dealt in each test, several times the capacity of the ring buffer.
+NR_OF_TILES = 5 * par.PIECE_QUEUE_BUFFER_SIZE + 3
+
+
+def pop_tiles(piece_queue: PieceQueue, count: int) -> tuple:
+    """
+    @param piece_queue Piece queue.
+    @param count Number of tile types.
+    @returns The next count tile types popped from the queue.
+
+    """
+
+    return tuple(piece_queue.pop() for _ in range(count))
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_bag_deals_each_type_once_per_group_of_seven(seed):
+    tile_types = pop_tiles(PieceQueue(seed, "bag"), NR_OF_TILES)
+    nr_of_types = len(TILE_TYPES)
+    for start in range(0, NR_OF_TILES - nr_of_types + 1, nr_of_types):
+        assert Counter(tile_types[start:start + nr_of_types]) == Counter(TILE_TYPES), start
+
+
+@pytest.mark.parametrize("randomizer", list(RANDOMIZERS))
+@pytest.mark.parametrize("capacity", [par.TILE_QUEUE_SIZE, par.PIECE_QUEUE_BUFFER_SIZE])
+def test_generate_sequence_matches_piece_queue(randomizer, capacity):
+    for seed in (0, 1, 2):
+        piece_queue = PieceQueue(seed, randomizer, capacity)
+        assert generate_sequence(seed, NR_OF_TILES, randomizer) == pop_tiles(piece_queue, NR_OF_TILES), seed
@@ -0,0 +1,39 @@
+import geometry as geo
+import parameters as par
+
+
+def get_srs_cells(tile_type: str, srs_state: int) -> set:
+    """
+    @param tile_type Tile type.
+    @param srs_state SRS state (0, R=1, 2, L=3).
+    @returns The filled cells of the tile in that state, within its SRS bounding box.
+
+    """
+
+    cells = geo._SRS_SPAWN_CELLS[tile_type]
+    if tile_type != "O":
+        box_size = 4 if tile_type == "I" else 3
+        for _ in range(0, srs_state):
+            cells = tuple((col, box_size - 1 - row) for row, col in cells)
+    return set(cells)
+
+
+def test_srs_kicks_move_the_tiles_to_the_srs_cells():
+    for tile_type in par.TILE_SHAPES:
+        for (cfg_idx, to_cfg_idx), kicks in geo.KICK_TABLES["srs"][tile_type].items():
+            from_state, to_state = geo._SRS_STATES[cfg_idx], geo._SRS_STATES[to_cfg_idx]
+            # position of the SRS box of the tile placed at (0, 0)
+            box_row, box_col = min(geo.TILE_CELLS[tile_type][cfg_idx])
+            srs_row, srs_col = min(get_srs_cells(tile_type, from_state))
+            box_row, box_col = box_row - srs_row, box_col - srs_col
+            if tile_type == "O":
+                srs_kicks = ((0, 0),)
+            else:
+                kicks_xy = geo._SRS_I_KICKS_XY if tile_type == "I" else geo._SRS_JLSTZ_KICKS_XY
+                srs_kicks = tuple((-y, x) for x, y in kicks_xy[(from_state, to_state)])
+            assert len(kicks) == len(srs_kicks)
+            for (row, col), (srs_row, srs_col) in zip(kicks, srs_kicks):
+                cells = {(row + cell_row, col + cell_col) for cell_row, cell_col in geo.TILE_CELLS[tile_type][to_cfg_idx]}
+                srs_cells = {(box_row + srs_row + cell_row, box_col + srs_col + cell_col)
+                             for cell_row, cell_col in get_srs_cells(tile_type, to_state)}
+                assert cells == srs_cells, f"{tile_type} tile, rotation {cfg_idx} -> {to_cfg_idx}"
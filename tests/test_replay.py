@@ -0,0 +1,85 @@
+import random
+import pytest
+import parameters as par
+from engine import GameEngine
+from generator import RANDOMIZERS
+from replay import Replay, ReplayPlayer, _decode_varint, _encode_varint
+
+## Keys which may be pressed during the recorded games.
+INPUTS = (frozenset(), frozenset({par.LEFT}), frozenset({par.RIGHT}), frozenset({par.ROTATE}),
+          frozenset({par.DOWN}), frozenset({par.DOWN, par.LEFT}), frozenset({par.HARD_DROP}))
+## Number of steps of the recorded games.
+NR_OF_STEPS = 3000
+
+
+def make_inputs(seed: int, nr_of_steps: int) -> list:
+    """
+    @param seed Seed of the random inputs.
+    @param nr_of_steps Number of steps.
+    @returns The keys pressed during each step, each set being held from 1 to 300 steps (so that the step counts of the
+    records take one or two bytes).
+
+    """
+
+    rng = random.Random(seed)
+    inputs = []
+    while len(inputs) < nr_of_steps:
+        inputs += [rng.choice(INPUTS)] * rng.choice((1, 2, 5, 20, 300))
+    return inputs[:nr_of_steps]
+
+
+def record_game(path: str, seed: int, randomizer: str) -> GameEngine:
+    """Records a game played with random inputs.
+
+    @param path Path of the replay file.
+    @param seed Seed of the game (and of its inputs).
+    @param randomizer Randomizer name.
+    @returns The engine of the recorded game, at its last step.
+
+    """
+
+    engine = GameEngine(seed=seed, randomizer=randomizer)
+    engine.start_recording(path)
+    for inputs in make_inputs(seed, NR_OF_STEPS):
+        engine.step(inputs, par.LOGIC_TIME_STEP_ms)
+    engine.stop_recording()
+    return engine
+
+
+@pytest.mark.parametrize("value", [0, 1, 0x7F, 0x80, 300, 0x3FFF, 0x4000, 2 ** 40])
+def test_varint_roundtrip(value):
+    encoded = _encode_varint(value) + b"\xff"
+    assert _decode_varint(encoded, 0) == (value, len(encoded) - 1)
+
+
+@pytest.mark.parametrize("randomizer", list(RANDOMIZERS))
+def test_replay_reproduces_the_recorded_game(monkeypatch, tmp_path, randomizer):
+    # small chunks, so that the writer thread compresses and flushes many of them
+    monkeypatch.setattr(par, "REPLAY_CHUNK_SIZE", 16)
+    path = str(tmp_path / "game.trpl")
+    recorded_engine = record_game(path, 4, randomizer)
+    assert recorded_engine.state.get_score() > 0
+    replay = Replay(path)
+    assert (replay.seed, replay.randomizer, replay.nr_of_steps) == (4, randomizer, NR_OF_STEPS)
+    assert (replay.score, replay.lines) == (recorded_engine.state.get_score(), recorded_engine.state.get_lines())
+    assert list(replay.iter_inputs()) == make_inputs(4, NR_OF_STEPS)
+    engine = GameEngine(seed=replay.seed, randomizer=replay.randomizer)
+    assert ReplayPlayer(replay, engine).run()
+    assert engine.snapshot() == recorded_engine.snapshot()
+
+
+def test_truncated_replay_loads_up_to_its_last_complete_record(monkeypatch, tmp_path):
+    monkeypatch.setattr(par, "REPLAY_CHUNK_SIZE", 16)
+    path = str(tmp_path / "game.trpl")
+    record_game(path, 5, "bag")
+    complete_replay = Replay(path)
+    with open(path, "rb") as replay_file:
+        data = replay_file.read()
+    with open(path, "wb") as replay_file:
+        replay_file.write(data[:len(data) // 2])
+    replay = Replay(path)
+    assert (replay.score, replay.lines) == (None, None)
+    assert 0 < len(replay.changes) < len(complete_replay.changes)
+    assert replay.changes == complete_replay.changes[:len(replay.changes)]
+    engine = GameEngine(seed=replay.seed, randomizer=replay.randomizer)
+    assert ReplayPlayer(replay, engine).run()
@@ -0,0 +1,78 @@
+import parameters as par
+from engine import GameEngine
+from fixtures import PlacedTile
+from state import GameState
+
+
+def lock_tiles(game_state: GameState, placements: list) -> None:
+    """Locks tiles on the board.
+
+    @param game_state Game state.
+    @param placements (tile type, configuration index, row, col) of each tile.
+    @returns None.
+
+    """
+
+    for tile_type, cfg_idx, row, col in placements:
+        game_state.update_occupancy_matrix(PlacedTile(tile_type, cfg_idx, row, col))
+
+
+def test_spawned_tiles_rotate_on_an_empty_board():
+    game_state = GameState()
+    for tile_type in par.TILE_SHAPES:
+        col = par.GRID_NR_OF_COLS // 2 - (2 if tile_type in ("I", "O") else 1)
+        for step in (1, -1):
+            assert game_state.resolve_rotation(tile_type, 0, par.TILE_SPAWN_ROW, col, step) is not None, tile_type
+
+
+def test_rotate_right_after_spawn():
+    engine = GameEngine(seed=1)
+    tile = engine.tile
+    assert (tile.row, tile.get_cfg_idx()) == (par.TILE_SPAWN_ROW, 0)
+    engine.step(frozenset({par.ROTATE}), par.LOGIC_TIME_STEP_ms)
+    assert tile.row == par.TILE_SPAWN_ROW
+    assert tile.get_cfg_idx() == 1
+
+
+def test_clear_non_adjacent_rows():
+    game_state = GameState()
+    # rows 19 and 17 complete, row 18 filled in columns 0-3 and 8-9, row 16 in columns 8-9
+    lock_tiles(game_state, [("I", 0, 18, 0), ("I", 0, 18, 4), ("O", 0, 17, 7), ("I", 0, 17, 0),
+                            ("I", 0, 16, 0), ("I", 0, 16, 4), ("O", 0, 15, 7)])
+    assert game_state._row_fill_counts[16:] == [2, 10, 6, 10]
+    assert game_state._dirty_rows == {16, 17, 18, 19}
+    game_state.delete_completed_rows()
+
+    occupied = {(row, col) for row in range(0, par.GRID_NR_OF_ROWS) for col in range(0, par.GRID_NR_OF_COLS)
+                if game_state.get_BOM_element(row, col) is not None}
+    assert occupied == {(19, 0), (19, 1), (19, 2), (19, 3), (19, 8), (19, 9), (18, 8), (18, 9)}
+    assert game_state.get_BOM_element(19, 0) == par.TILE_COLORS["I"]
+    assert game_state.get_BOM_element(18, 8) == par.TILE_COLORS["O"]
+    assert game_state._row_fill_counts == [0] * (par.GRID_NR_OF_ROWS - 2) + [2, 6]
+    assert not game_state._dirty_rows
+    assert game_state.get_column_heights() == [1, 1, 1, 1, 0, 0, 0, 0, 2, 2]
+    assert game_state.get_lines() == 2
+    assert game_state.get_score() == par.LINE_CLEAR_SCORE_MULTIPLIERS[2]
+
+
+def test_column_heights_after_clearing_every_row():
+    game_state = GameState()
+    lock_tiles(game_state, [("I", 0, 18, 0), ("I", 0, 18, 4), ("O", 0, 17, 7), ("I", 0, 17, 0), ("I", 0, 17, 4)])
+    assert game_state.get_column_heights() == [2] * par.GRID_NR_OF_COLS
+    game_state.delete_completed_rows()
+    assert game_state.get_column_heights() == [0] * par.GRID_NR_OF_COLS
+    assert game_state.get_lines() == 2
+
+
+def test_drop_distance_under_an_overhang():
+    game_state = GameState()
+    # overhang in row 14 (columns 0-3), empty below
+    lock_tiles(game_state, [("I", 0, 13, 0)])
+    assert game_state.get_column_heights()[:5] == [6, 6, 6, 6, 0]
+    # O tile tucked below the overhang, its cells in rows 15-16 and columns 1-2
+    assert game_state.get_drop_distance("O", 0, 14, 0) == 3
+    # a block under the overhang stops it earlier
+    lock_tiles(game_state, [("O", 0, 17, 1)])
+    assert game_state.get_drop_distance("O", 0, 14, 0) == 1
+    # above the surface, the column height index is used
+    assert game_state.get_drop_distance("O", 0, 10, 0) == 1
@@ -0,0 +1,38 @@
+"""Builds the asset pack loaded by the game instead of the individual files in assets/.
+
+Usage: python tools/pack_assets.py [output path, defaults to assets.pack in the project root]
+
+"""
+
+import os
+import sys
+
+## Project root.
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_PATH, "src"))
+
+from assetpack import write_pack
+from utils import ASSET_PACK_FILE_NAME
+
+## Asset folders excluded from the pack (generated at runtime).
+EXCLUDED_FOLDERS = ("assets/cache",)
+
+
+def main() -> None:
+    """Packs every file under assets/.
+
+    """
+
+    pack_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT_PATH, ASSET_PACK_FILE_NAME)
+    relative_paths = []
+    for folder, _, file_names in os.walk(os.path.join(ROOT_PATH, "assets")):
+        relative_folder = os.path.relpath(folder, ROOT_PATH).replace(os.sep, "/")
+        if any(relative_folder == excluded or relative_folder.startswith(excluded + "/") for excluded in EXCLUDED_FOLDERS):
+            continue
+        relative_paths += [f"{relative_folder}/{file_name}" for file_name in file_names]
+    write_pack(ROOT_PATH, relative_paths, pack_path)
+    print(f"Packed {len(relative_paths)} assets into {pack_path} ({os.path.getsize(pack_path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
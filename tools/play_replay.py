@@ -0,0 +1,49 @@
+"""Re-simulates a recorded game as fast as possible and checks it ends as recorded.
+
+Usage: python tools/play_replay.py <replay file>
+
+Prints the replay contents and the final statistics of the re-simulated game, and exits with status 1 if they differ
+from the recorded ones. To watch a replay in the game window instead, run the game with TETRIS_REPLAY=<replay file>
+(and TETRIS_REPLAY_SPEED=<speed> to fast-forward it).
+
+"""
+
+import os
+import sys
+import time
+
+## Project root.
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT_PATH, "src"))
+
+from engine import GameEngine
+from replay import Replay, ReplayPlayer
+
+
+def main() -> None:
+    """Plays the replay given on the command line headless.
+
+    """
+
+    if len(sys.argv) != 2:
+        print(__doc__.strip().splitlines()[2])
+        sys.exit(2)
+    replay = Replay(sys.argv[1])
+    print(f"{sys.argv[1]}: {os.path.getsize(sys.argv[1])} bytes, seed {replay.seed}, {replay.randomizer} randomizer, "
+          f"{replay.nr_of_steps} steps ({replay.nr_of_steps * replay.step_ms / 1000:.1f} s), "
+          f"{len(replay.changes)} input changes")
+    player = ReplayPlayer(replay, GameEngine(seed=replay.seed, randomizer=replay.randomizer))
+    start_s = time.perf_counter()
+    matches = player.run()
+    state = player.engine.state
+    print(f"Re-simulated in {time.perf_counter() - start_s:.2f} s: score {state.get_score()}, "
+          f"lines {state.get_lines()}, level {state.get_level()}")
+    if replay.score is None:
+        print("The replay has no end record (the recording was interrupted)")
+    elif not matches:
+        print(f"Mismatch: the recorded game ended with score {replay.score}, lines {replay.lines}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()